@@ -0,0 +1,103 @@
+import argparse
+import sys
+from typing import Any
+
+from .api import Myob
+from .constants import DEFAULT_PAGE_SIZE
+from .export import FORMATS, export, load_credentials, resolve_method
+
+
+def parse_filters(raw_filters: list[str]) -> dict[str, Any]:
+    """Turn `Key=Value` pairs into manager filter kwargs. Repeated keys are OR'd together."""
+    filters: dict[str, Any] = {}
+    for raw in raw_filters:
+        key, sep, value = raw.partition("=")
+        if not sep:
+            raise argparse.ArgumentTypeError(f"Expected a filter like Key=Value, got {raw!r}.")
+        parsed: Any = {"true": True, "false": False}.get(value.lower(), value)
+        if key in filters:
+            existing = filters[key]
+            filters[key] = [*existing, parsed] if isinstance(existing, list) else [existing, parsed]
+        else:
+            filters[key] = parsed
+    return filters
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m myob")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser(
+        "export", help="Stream every record from an endpoint to NDJSON, CSV or parquet."
+    )
+    export_parser.add_argument(
+        "--credentials",
+        required=True,
+        help="JSON file holding saved credentials state. Refreshed tokens are written back here.",
+    )
+    export_parser.add_argument("--company-id", required=True)
+    export_parser.add_argument(
+        "--endpoint",
+        required=True,
+        help="Manager and ALL method to export, eg. `contacts.customer` or `general_ledger.account`.",
+    )
+    export_parser.add_argument(
+        "--filter",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="Filter as passed to the manager method, eg. `IsActive=true` or `DisplayID__gt=1-0000`.",
+    )
+    export_parser.add_argument("--raw-filter")
+    export_parser.add_argument("--orderby")
+    export_parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="ndjson",
+        help="CSV columns are fixed by the first page; columns only on later pages are left out.",
+    )
+    export_parser.add_argument(
+        "--output", required=True, help="Output file (or directory, for parquet)."
+    )
+    export_parser.add_argument(
+        "--checkpoint", help="File to save progress to, and resume from if it exists."
+    )
+    export_parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE)
+    export_parser.add_argument("--workers", type=int, default=4)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    credentials = load_credentials(args.credentials)
+    credentials.refresh_if_expired()
+    companyfile = Myob(credentials).companyfiles.get(args.company_id, call=False)
+    try:
+        func = resolve_method(companyfile, args.endpoint)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    filters = parse_filters(args.filter)
+    if args.raw_filter:
+        filters["raw_filter"] = args.raw_filter
+    if args.orderby:
+        filters["orderby"] = args.orderby
+
+    count = export(
+        func,
+        args.output,
+        format=args.format,
+        checkpoint_path=args.checkpoint,
+        endpoint=args.endpoint,
+        limit=args.page_size,
+        workers=args.workers,
+        **filters,
+    )
+    print(f"Exported {count} records to {args.output}.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
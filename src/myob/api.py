@@ -1,21 +1,64 @@
+import requests
+import threading
 from typing import Any
 
+from .breaker import CircuitBreaker
+from .cache import DiskCache
+from .codecs import Codec
+from .concurrency import SingleFlight, ThreadLocalSession
 from .credentials import PartnerCredentials
+from .dedup import WriteDedup
 from .endpoints import ALL, ENDPOINTS, GET
 from .managers import Manager
+from .outbox import Outbox
+from .reference import ReferenceData
+from .scheduler import Scheduler
 
 
 class Myob:
-    """An ORM-like interface to the MYOB API."""
+    """An ORM-like interface to the MYOB API.
 
-    def __init__(self, credentials: PartnerCredentials) -> None:
+    Pass `coalesce=True` to have concurrent identical GET requests made through this client
+    share a single HTTP call, a `requests.Session` to reuse pooled connections between calls (or a
+    `ThreadLocalSession`, if the client is to be shared between threads), and a
+    `codec` (see `myob.codecs`) to swap out the JSON encoder/decoder. Share a `Scheduler` between
+    clients to cap concurrent requests per company file and overall, and a `CircuitBreaker` to fail
+    fast on company files that keep erroring. With an `Outbox`, writes can be made with
+    `defer=True` to queue them durably instead of sending them straight away, a `DiskCache`
+    serves repeated reads from disk, and a `WriteDedup` skips PUTs that wouldn't change anything.
+    """
+
+    def __init__(
+        self,
+        credentials: PartnerCredentials,
+        coalesce: bool = False,
+        session: requests.Session | ThreadLocalSession | None = None,
+        codec: Codec | None = None,
+        scheduler: Scheduler | None = None,
+        breaker: CircuitBreaker | None = None,
+        outbox: Outbox | None = None,
+        cache: DiskCache | None = None,
+        dedup: WriteDedup | None = None,
+    ) -> None:
         if not isinstance(credentials, PartnerCredentials):
             raise TypeError(f"Expected a Credentials instance, got {type(credentials).__name__}.")
         self.credentials = credentials
-        self.companyfiles = CompanyFiles(credentials)
+        # Options shared by every manager built off this client.
+        self.manager_kwargs: dict[str, Any] = {
+            "single_flight": SingleFlight() if coalesce else None,
+            "session": session,
+            "codec": codec,
+            "scheduler": scheduler,
+            "breaker": breaker,
+            "outbox": outbox,
+            "cache": cache,
+            "dedup": dedup,
+        }
+        self.companyfiles = CompanyFiles(credentials, **self.manager_kwargs)
         self._manager = Manager(
             "",
             credentials,
+            **self.manager_kwargs,
             raw_endpoints=[
                 (
                     GET,
@@ -34,11 +77,17 @@ class Myob:
 
 
 class CompanyFiles:
-    def __init__(self, credentials: PartnerCredentials) -> None:
+    def __init__(self, credentials: PartnerCredentials, **manager_kwargs: Any) -> None:
         self.credentials = credentials
+        self.manager_kwargs = manager_kwargs
+        # Reference data by company id, shared by every `CompanyFile` got through this client, so
+        # that writes made through any of them invalidate it.
+        self._reference_data: dict[str, ReferenceData] = {}
+        self._reference_data_lock = threading.Lock()
         self._manager = Manager(
             "",
             self.credentials,
+            **manager_kwargs,
             raw_endpoints=[
                 (ALL, "", "Return a list of company files."),
                 (GET, "[id]/", "List endpoints available for a company file."),
@@ -48,9 +97,7 @@ class CompanyFiles:
 
     def all(self) -> list["CompanyFile"]:
         raw_companyfiles = self._manager.all()  # type: ignore[attr-defined]
-        return [
-            CompanyFile(raw_companyfile, self.credentials) for raw_companyfile in raw_companyfiles
-        ]
+        return [self._companyfile(raw_companyfile) for raw_companyfile in raw_companyfiles]
 
     def get(self, id: str, call: bool = True) -> "CompanyFile":
         if call:
@@ -59,29 +106,69 @@ class CompanyFiles:
             # on the GET endpoint. The only way we currently allow passing company_id is by setting it on the manager,
             # and we can't do that on init, as this is a manager for company files plural..
             # Reluctant to change manager code, as it would add confusion if the inner method let you override the company_id.
-            manager = Manager("", self.credentials, raw_endpoints=[(GET, "", "")], company_id=id)
+            manager = Manager(
+                "",
+                self.credentials,
+                raw_endpoints=[(GET, "", "")],
+                company_id=id,
+                **self.manager_kwargs,
+            )
             raw_companyfile = manager.get()["CompanyFile"]  # type: ignore[attr-defined]
         else:
             raw_companyfile = {"Id": id}
-        return CompanyFile(raw_companyfile, self.credentials)
+        return self._companyfile(raw_companyfile)
+
+    def _companyfile(self, raw: dict[str, Any]) -> "CompanyFile":
+        with self._reference_data_lock:
+            companyfile = CompanyFile(
+                raw,
+                self.credentials,
+                reference_data=self._reference_data.get(raw["Id"]),
+                **self.manager_kwargs,
+            )
+            self._reference_data.setdefault(raw["Id"], companyfile.reference_data)
+        return companyfile
 
     def __repr__(self) -> str:
         return self._manager.__repr__()
 
 
 class CompanyFile:
-    def __init__(self, raw: dict[str, Any], credentials: PartnerCredentials) -> None:
+    def __init__(
+        self,
+        raw: dict[str, Any],
+        credentials: PartnerCredentials,
+        reference_data: ReferenceData | None = None,
+        **manager_kwargs: Any,
+    ) -> None:
         self.id = raw["Id"]
         self.name = raw.get("Name")
         self.data = raw  # Dump remaining raw data here.
         self.credentials = credentials
+        self.manager_kwargs = manager_kwargs
         for k, v in ENDPOINTS.items():
             setattr(
                 self,
                 v["name"],  # type: ignore[arg-type]
-                Manager(k, credentials, endpoints=v["methods"], company_id=self.id),
+                Manager(
+                    k, credentials, endpoints=v["methods"], company_id=self.id, **manager_kwargs
+                ),
             )
+        # Cached tax codes, accounts and categories (loaded on first use), possibly shared with
+        # other instances for the same company file.
+        self.reference_data = reference_data or ReferenceData(self)
+        self.general_ledger.write_listeners.append(self.reference_data._on_write)
+
+    def __reduce__(self) -> tuple:
+        # Rebuilt from scratch on unpickling, eg. in a `ProcessPoolExecutor` worker.
+        return (_rebuild_companyfile, (self.data, self.credentials, self.manager_kwargs))
 
     def __repr__(self) -> str:
         options = "\n    ".join(sorted(v["name"] for v in ENDPOINTS.values()))  # type: ignore[misc]
         return f"CompanyFile:\n    {options}"
+
+
+def _rebuild_companyfile(
+    raw: dict[str, Any], credentials: PartnerCredentials, manager_kwargs: dict[str, Any]
+) -> CompanyFile:
+    return CompanyFile(raw, credentials, **manager_kwargs)
@@ -0,0 +1,151 @@
+import requests
+import threading
+import time
+from collections.abc import Callable, Hashable
+from typing import Any
+
+from .exceptions import MyobCircuitOpen, MyobGatewayTimeout, MyobInternalServerError
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Failures suggesting the company file (rather than the request) is the problem.
+DEFAULT_FAILURES = (
+    MyobInternalServerError,
+    MyobGatewayTimeout,
+    requests.Timeout,
+    requests.ConnectionError,
+)
+
+
+class _Circuit:
+    def __init__(self) -> None:
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probes = 0
+
+
+class CircuitBreaker:
+    """Fails fast on company files (and endpoints) that keep failing.
+
+    After `failure_threshold` consecutive failures for a key (eg. `(company_id, endpoint)`), its
+    circuit opens and calls raise `MyobCircuitOpen` straight away instead of waiting on MYOB.
+    After `reset_timeout` seconds, it half-opens to let up to `probes` calls through: if they
+    succeed the circuit closes again, and if they fail it re-opens.
+
+    `on_state_change(key, old_state, new_state)` is called on each transition, for reporting.
+    It's called once the breaker's lock is released, so it may look at the breaker's state.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30,
+        probes: int = 1,
+        failures: tuple[type[BaseException], ...] = DEFAULT_FAILURES,
+        on_state_change: Callable[[Hashable, str, str], None] | None = None,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.probes = probes
+        self.failures = failures
+        self.on_state_change = on_state_change
+        self._lock = threading.Lock()
+        self._circuits: dict[Hashable, _Circuit] = {}
+
+    def __reduce__(self) -> tuple:
+        # Unpickles with the same settings, but every circuit closed.
+        return (
+            CircuitBreaker,
+            (
+                self.failure_threshold,
+                self.reset_timeout,
+                self.probes,
+                self.failures,
+                self.on_state_change,
+            ),
+        )
+
+    def _transition(
+        self, key: Hashable, circuit: _Circuit, state: str
+    ) -> tuple[Hashable, str, str] | None:
+        """Move a circuit to `state`, returning the change to report (if any) once the lock is
+        released."""
+        old, circuit.state = circuit.state, state
+        if state == OPEN:
+            circuit.opened_at = time.monotonic()
+        if state != HALF_OPEN:
+            circuit.probes = 0
+        return (key, old, state) if old != state else None
+
+    def _report(self, change: tuple[Hashable, str, str] | None) -> None:
+        if self.on_state_change is not None and change is not None:
+            self.on_state_change(*change)
+
+    def _before(self, key: Hashable) -> None:
+        change = None
+        try:
+            with self._lock:
+                circuit = self._circuits.setdefault(key, _Circuit())
+                if circuit.state == OPEN:
+                    retry_after = circuit.opened_at + self.reset_timeout - time.monotonic()
+                    if retry_after > 0:
+                        raise MyobCircuitOpen(key, retry_after)
+                    change = self._transition(key, circuit, HALF_OPEN)
+                if circuit.state == HALF_OPEN:
+                    if circuit.probes >= self.probes:
+                        raise MyobCircuitOpen(key, 0)
+                    circuit.probes += 1
+        finally:
+            self._report(change)
+
+    def _after(self, key: Hashable, failed: bool) -> None:
+        change = None
+        with self._lock:
+            circuit = self._circuits[key]
+            if not failed:
+                circuit.failures = 0
+                if circuit.state != CLOSED:
+                    change = self._transition(key, circuit, CLOSED)
+            else:
+                circuit.failures += 1
+                if circuit.state == HALF_OPEN or circuit.failures >= self.failure_threshold:
+                    change = self._transition(key, circuit, OPEN)
+        self._report(change)
+
+    def call(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """Call `func` through the circuit for the given key."""
+        self._before(key)
+        try:
+            result = func()
+        except self.failures:
+            self._after(key, failed=True)
+            raise
+        except BaseException:
+            # Anything else (eg. a 404) means MYOB is answering us just fine.
+            self._after(key, failed=False)
+            raise
+        self._after(key, failed=False)
+        return result
+
+    def state(self, key: Hashable) -> str:
+        with self._lock:
+            circuit = self._circuits.get(key)
+            return CLOSED if circuit is None else circuit.state
+
+    def states(self) -> dict[Hashable, str]:
+        """Snapshot the state of every circuit that has seen traffic."""
+        with self._lock:
+            return {key: circuit.state for key, circuit in self._circuits.items()}
+
+    def reset(self, key: Hashable) -> None:
+        """Force a circuit closed, eg. once a company file is known to be back online."""
+        change = None
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is not None:
+                circuit.failures = 0
+                change = self._transition(key, circuit, CLOSED)
+        self._report(change)
@@ -0,0 +1,164 @@
+import gzip
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    content BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_used ON responses (used_at);
+CREATE INDEX IF NOT EXISTS responses_url ON responses (url);
+-- The total size of the responses, kept up to date as they come and go.
+CREATE TABLE IF NOT EXISTS responses_size (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    total INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO responses_size SELECT 0, COALESCE(SUM(size), 0) FROM responses;
+CREATE TRIGGER IF NOT EXISTS responses_added AFTER INSERT ON responses BEGIN
+    UPDATE responses_size SET total = total + new.size;
+END;
+CREATE TRIGGER IF NOT EXISTS responses_removed AFTER DELETE ON responses BEGIN
+    UPDATE responses_size SET total = total - old.size;
+END;
+"""
+
+
+class DiskCache:
+    """A persistent cache of GET responses, so restarted workers start warm.
+
+    Response bodies are stored compressed (with gzip, or zstd given `compression="zstd"` and
+    `pip install pymyob[zstd]`) in a SQLite file, keyed by a hash of the company file, URL and
+    query params. Once the cache holds more than `max_bytes` (compressed), the least recently used
+    responses are evicted. Responses older than `ttl` seconds, if given, are ignored.
+
+    Managers given a cache drop the cached responses for their endpoints after any write made
+    through them. Writes made elsewhere (eg. by another process) aren't seen, so use a `ttl` if
+    that matters.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 256 * 2**20,
+        ttl: float | None = None,
+        compression: str = "gzip",
+    ) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.compression = compression
+        self._compress, self._decompress = _codec(compression)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(SCHEMA)
+
+    def __reduce__(self) -> tuple:
+        return (DiskCache, (self.path, self.max_bytes, self.ttl, self.compression))
+
+    @staticmethod
+    def key(company_id: str | None, url: str, params: dict[str, Any]) -> str:
+        """The cache key for a request."""
+        identity = json.dumps([company_id, url, sorted(params.items())], default=str)
+        return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> bytes | None:
+        """Return the cached response body for the given key, if there is one."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT content, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            content, stored_at = row
+            if self.ttl is not None and stored_at + self.ttl <= now:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._db.execute("UPDATE responses SET used_at = ? WHERE key = ?", (now, key))
+        return self._decompress(content)
+
+    def put(self, key: str, url: str, content: bytes) -> None:
+        """Cache a response body, evicting the least recently used if over budget."""
+        compressed = self._compress(content)
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                # Deleted first rather than replaced, so the size trigger sees it go.
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.execute(
+                    "INSERT INTO responses (key, url, content, size, stored_at, used_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, url, compressed, len(compressed), now, now),
+                )
+                total = self._db.execute("SELECT total FROM responses_size").fetchone()[0]
+                if total > self.max_bytes:
+                    self._evict(total - self.max_bytes)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _evict(self, excess: int) -> None:
+        """Drop the least recently used responses until `excess` bytes are freed."""
+        keys = []
+        freed = 0
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY used_at, key"):
+            if freed >= excess:
+                break
+            keys.append((key,))
+            freed += size
+        self._db.executemany("DELETE FROM responses WHERE key = ?", keys)
+
+    def invalidate(self, prefix: str) -> None:
+        """Drop every cached response for URLs starting with `prefix`."""
+        if not prefix:
+            self.clear()
+            return
+        # A range rather than a prefix match, so it's looked up in the index.
+        end = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        with self._lock:
+            self._db.execute("DELETE FROM responses WHERE url >= ? AND url < ?", (prefix, end))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+
+    def size(self) -> int:
+        """The total compressed size of the cached responses, in bytes."""
+        with self._lock:
+            return self._db.execute("SELECT total FROM responses_size").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def _codec(compression: str) -> tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]:
+    if compression == "gzip":
+        return (lambda data: gzip.compress(data, mtime=0)), gzip.decompress
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError(
+                "zstd compression requires zstandard: `pip install pymyob[zstd]`."
+            ) from e
+        return zstandard.compress, zstandard.decompress
+    raise ValueError(f"Unknown compression {compression!r}. Expected 'gzip' or 'zstd'.")
@@ -0,0 +1,155 @@
+import json
+import os
+import threading
+from collections.abc import Callable, Iterator
+from typing import Any, Protocol
+
+from .constants import DEFAULT_PAGE_SIZE
+from .pagination import iter_keyset_pages, iter_pages
+
+
+class CheckpointStore(Protocol):
+    """Somewhere to save the progress of long-running reads, so they can be resumed.
+
+    Checkpoints are JSON-serialisable dicts, saved and loaded by key.
+    """
+
+    def load(self, key: str) -> dict | None: ...
+
+    def save(self, key: str, checkpoint: dict) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+
+class MemoryCheckpointStore:
+    """Keeps checkpoints in memory, eg. to resume after errors within one process."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._checkpoints: dict[str, str] = {}
+
+    def load(self, key: str) -> dict | None:
+        with self._lock:
+            saved = self._checkpoints.get(key)
+        return None if saved is None else json.loads(saved)
+
+    def save(self, key: str, checkpoint: dict) -> None:
+        # Stored serialised, so later changes to the dict aren't saved by accident.
+        saved = json.dumps(checkpoint, default=str)
+        with self._lock:
+            self._checkpoints[key] = saved
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._checkpoints.pop(key, None)
+
+
+class FileCheckpointStore:
+    """Keeps each checkpoint in a JSON file named by its key, in the given directory.
+
+    Files are replaced atomically, so a crash mid-save leaves the previous checkpoint intact.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+
+    def path(self, key: str) -> str:
+        if os.sep in key or key in ("", ".", ".."):
+            raise ValueError(f"Checkpoint key {key!r} isn't a valid file name.")
+        return os.path.join(self.directory, key)
+
+    def load(self, key: str) -> dict | None:
+        try:
+            with open(self.path(key), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, key: str, checkpoint: dict) -> None:
+        path = self.path(key)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f, default=str)
+        os.replace(tmp, path)
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+
+def load_checkpoint(store: CheckpointStore, key: str, **identity: Any) -> dict | None:
+    """Load the checkpoint saved under `key`, checking it was saved by the same read.
+
+    `identity` (eg. the endpoint, filters and page size) is compared as it would be saved.
+    """
+    checkpoint = store.load(key)
+    if checkpoint is None:
+        return None
+    identity = json.loads(json.dumps(identity, default=str))
+    if any(checkpoint.get(k) != v for k, v in identity.items()):
+        raise ValueError(f"Checkpoint {key!r} is for a different read.")
+    return checkpoint
+
+
+def iter_resumable_pages(
+    func: Callable[..., Any],
+    store: CheckpointStore,
+    key: str,
+    endpoint: str = "",
+    limit: int = DEFAULT_PAGE_SIZE,
+    keyset: str | None = None,
+    tiebreak: str | None = None,
+    **filters: Any,
+) -> Iterator[dict]:
+    """Walk every page of an ALL method, checkpointing progress to `store` under `key`.
+
+    Pages are walked by offset, or by `keyset` (and `tiebreak`) as in `iter_keyset_pages`.
+    Each page is checkpointed once the caller asks for the next, with the endpoint, filters,
+    page size, pages and items read, and the last key seen. Calling again with the same arguments
+    after a crash picks up after the last page checkpointed, and the checkpoint is deleted once
+    every page has been read.
+    """
+    identity = {"endpoint": endpoint, "filters": filters, "limit": limit, "keyset": keyset}
+    checkpoint = load_checkpoint(store, key, **identity)
+    if checkpoint is None:
+        checkpoint = {**identity, "page": 0, "after": None, "count": 0}
+
+    if keyset is None:
+        pages = iter_pages(func, limit=limit, page=checkpoint["page"] + 1, **filters)
+    else:
+        after = checkpoint["after"]
+        pages = iter_keyset_pages(
+            func,
+            key=keyset,
+            limit=limit,
+            tiebreak=tiebreak,
+            after=tuple(after) if isinstance(after, list) else after,
+            **filters,
+        )
+
+    for response in pages:
+        yield response
+        items = response.get("Items", [])
+        checkpoint["page"] += 1
+        checkpoint["count"] += len(items)
+        if keyset is not None and items:
+            last = items[-1]
+            checkpoint["after"] = (
+                last[keyset] if tiebreak is None else [last[keyset], last[tiebreak]]
+            )
+        store.save(key, checkpoint)
+    store.delete(key)
+
+
+def iter_resumable_items(
+    func: Callable[..., Any], store: CheckpointStore, key: str, **kwargs: Any
+) -> Iterator[dict]:
+    """Walk every page of an ALL method with checkpoints, yielding the individual items.
+
+    Checkpoints are per page, so after a crash, items from the page being worked through are
+    yielded again.
+    """
+    for response in iter_resumable_pages(func, store, key, **kwargs):
+        yield from response.get("Items", [])
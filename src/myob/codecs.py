@@ -0,0 +1,128 @@
+import json
+import re
+from decimal import Decimal
+from typing import Any, Protocol
+
+
+class Codec(Protocol):
+    """Encodes request bodies and decodes response bodies.
+
+    `decode` may be given a `schema` (eg. a `msgspec.Struct` subclass) to decode straight into,
+    and should raise `ValueError` on malformed input.
+    """
+
+    content_type: str
+
+    def encode(self, obj: Any) -> bytes: ...
+
+    def decode(self, content: bytes, schema: Any = None) -> Any: ...
+
+
+class JsonCodec:
+    """The standard library's json module.
+
+    With `use_decimal=True`, non-integral numbers are decoded as `Decimal` rather than `float`.
+    Decimals are encoded as plain JSON numbers either way.
+    """
+
+    content_type = "application/json"
+
+    def __init__(self, use_decimal: bool = False) -> None:
+        self.use_decimal = use_decimal
+
+    def encode(self, obj: Any) -> bytes:
+        content = json.dumps(obj, separators=(",", ":"), default=_encode_decimal)
+        return _decimal_numbers(content.encode("utf-8"))
+
+    def decode(self, content: bytes, schema: Any = None) -> Any:
+        if schema is not None:
+            raise ValueError(f"{type(self).__name__} doesn't support decoding into a schema.")
+        return json.loads(content, parse_float=Decimal if self.use_decimal else None)
+
+
+class OrjsonCodec:
+    """orjson (`pip install pymyob[orjson]`). Decimals are encoded as numbers, but always decoded
+    as floats."""
+
+    content_type = "application/json"
+
+    def __init__(self) -> None:
+        try:
+            import orjson
+        except ImportError as e:
+            raise ImportError("OrjsonCodec requires orjson: `pip install pymyob[orjson]`.") from e
+        self._orjson = orjson
+
+    def __reduce__(self) -> tuple:
+        return (OrjsonCodec, ())
+
+    def encode(self, obj: Any) -> bytes:
+        return _decimal_numbers(self._orjson.dumps(obj, default=_encode_decimal))
+
+    def decode(self, content: bytes, schema: Any = None) -> Any:
+        if schema is not None:
+            raise ValueError(f"{type(self).__name__} doesn't support decoding into a schema.")
+        return self._orjson.loads(content)
+
+
+class MsgspecCodec:
+    """msgspec (`pip install pymyob[msgspec]`).
+
+    Supports decoding into a `schema` such as a `msgspec.Struct` subclass (or `list[...]` of one),
+    validating and building typed objects in the one pass. With `use_decimal=True`,
+    non-integral numbers not otherwise typed by the schema are decoded as `Decimal`.
+    """
+
+    content_type = "application/json"
+
+    def __init__(self, use_decimal: bool = False) -> None:
+        try:
+            import msgspec
+        except ImportError as e:
+            raise ImportError(
+                "MsgspecCodec requires msgspec: `pip install pymyob[msgspec]`."
+            ) from e
+        self._msgspec = msgspec
+        self.use_decimal = use_decimal
+        self._encoder = msgspec.json.Encoder(decimal_format="number")
+        self._decoders: dict[Any, Any] = {}
+
+    def __reduce__(self) -> tuple:
+        # msgspec's encoders and decoders don't pickle; they're cheap enough to build again.
+        return (MsgspecCodec, (self.use_decimal,))
+
+    def _decoder(self, schema: Any) -> Any:
+        # Decoders are relatively expensive to build, so keep one per schema.
+        if schema not in self._decoders:
+            self._decoders[schema] = self._msgspec.json.Decoder(
+                Any if schema is None else schema,
+                float_hook=Decimal if self.use_decimal else None,
+            )
+        return self._decoders[schema]
+
+    def encode(self, obj: Any) -> bytes:
+        return self._encoder.encode(obj)
+
+    def decode(self, content: bytes, schema: Any = None) -> Any:
+        try:
+            return self._decoder(schema).decode(content)
+        except self._msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+
+# Neither json nor orjson can write a number from `default`, so Decimals are written as strings
+# marked with a leading NUL (which both escape as \u0000), then unquoted. Going through float()
+# instead would lose digits past the 15th or so.
+DECIMAL_PLACEHOLDER = re.compile(rb'"\\u0000([-+.0-9eE]+)"')
+
+
+def _encode_decimal(obj: Any) -> Any:
+    if isinstance(obj, Decimal):
+        if not obj.is_finite():
+            raise ValueError(f"Can't encode {obj} as JSON.")
+        return f"\x00{obj}"
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _decimal_numbers(content: bytes) -> bytes:
+    return DECIMAL_PLACEHOLDER.sub(rb"\1", content)
@@ -0,0 +1,261 @@
+from collections.abc import Iterable
+from typing import Any
+
+from .pagination import DATETIME
+from .utils import flatten
+
+DTYPES = {
+    "float": "float64",
+    "int": "int64",
+    "bool": "bool",
+    "datetime": "datetime64[ms]",
+    "category": "int32",  # Codes into `categories`.
+    "object": "object",
+}
+
+
+def value_kind(value: Any) -> str:
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, str):
+        return "datetime" if DATETIME.match(value) else "category"
+    return "object"
+
+
+def join_kinds(a: str | None, b: str | None) -> str | None:
+    """The narrowest kind of column that can hold values of both kinds."""
+    if a is None or a == b:
+        return b
+    if b is None:
+        return a
+    if {a, b} == {"int", "float"}:
+        return "float"
+    if {a, b} == {"datetime", "category"}:
+        return "category"
+    return "object"
+
+
+def nullable(kind: str | None) -> str | None:
+    """The kind of column needed once nulls are mixed in."""
+    return {"int": "float", "bool": "object"}.get(kind, kind)  # type: ignore[arg-type]
+
+
+class Column:
+    """One column of `Columns`, held in a NumPy array that grows as pages are added.
+
+    `kind` is one of "float", "int", "bool", "datetime" (`datetime64[ms]`, with NaT for nulls),
+    "category" (int32 codes into `categories`, -1 for nulls) or "object", widened as needed
+    (eg. from "int" to "float" when a null or fraction turns up). It's None until a value other
+    than null has been seen.
+    """
+
+    def __init__(self, np: Any, length: int = 0) -> None:
+        self._np = np
+        self.kind: str | None = None
+        self.length = length
+        self.categories: list[str] = []
+        self._codes: dict[str, int] = {}
+        self._data: Any = None
+        # Which rows of a float column held ints, so they're kept as ints if it becomes "object".
+        self._ints: Any = None
+
+    @property
+    def values(self) -> Any:
+        """The column's values (codes, for a category), as a view onto its buffer."""
+        if self._data is None:
+            return self._np.full(self.length, None, dtype=object)
+        return self._data[: self.length]
+
+    def extend(self, values: list) -> None:
+        has_nulls = self.length > 0 and self.kind is None
+        kind = self.kind
+        for value in values:
+            if value is None:
+                has_nulls = True
+            else:
+                kind = join_kinds(kind, value_kind(value))
+        if has_nulls:
+            kind = nullable(kind)
+        if kind is None:
+            # Nothing but nulls so far.
+            self.length += len(values)
+            return
+        if kind != self.kind:
+            self._convert(kind)
+
+        self._reserve(len(values))
+        self._data[self.length : self.length + len(values)] = self._array(values)
+        if self.kind == "float":
+            self._mark_ints(self.length, values)
+        self.length += len(values)
+
+    def _array(self, values: list) -> Any:
+        np = self._np
+        if self.kind == "float":
+            return np.array([np.nan if v is None else v for v in values], dtype="float64")
+        if self.kind == "datetime":
+            return np.array(["NaT" if v is None else v for v in values], dtype="datetime64[ms]")
+        if self.kind == "category":
+            return np.array([self._code(v) for v in values], dtype="int32")
+        if self.kind == "object":
+            array = np.empty(len(values), dtype=object)
+            # Assigned one by one, so lists are kept as values rather than spread into rows.
+            for i, v in enumerate(values):
+                array[i] = v
+            return array
+        return np.array(values, dtype=DTYPES[self.kind])  # type: ignore[index]
+
+    def _code(self, value: str | None) -> int:
+        if value is None:
+            return -1
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.categories)
+            self.categories.append(value)
+        return code
+
+    def _mark_ints(self, start: int, values: list) -> None:
+        ints = [isinstance(v, int) for v in values]
+        if self._ints is None:
+            if not any(ints):
+                return
+            self._ints = self._np.zeros(len(self._data), dtype=bool)
+        elif len(self._ints) < len(self._data):
+            grown = self._np.zeros(len(self._data), dtype=bool)
+            grown[:start] = self._ints[:start]
+            self._ints = grown
+        self._ints[start : start + len(values)] = ints
+
+    def _reserve(self, extra: int) -> None:
+        needed = self.length + extra
+        if len(self._data) >= needed:
+            return
+        # Grow geometrically, so adding pages costs amortised constant time per row.
+        data = self._np.empty(max(needed, 2 * len(self._data), 1024), dtype=self._data.dtype)
+        data[: self.length] = self._data[: self.length]
+        self._data = data
+
+    def _convert(self, kind: str) -> None:
+        """Widen the column to the given kind, converting the values held so far."""
+        np = self._np
+        if self._data is None:
+            # Only nulls so far.
+            values = [None] * self.length
+        elif self.kind == "category":
+            lookup = np.array([*self.categories, None], dtype=object)
+            values = lookup[self.values].tolist()
+            self.categories, self._codes = [], {}
+        elif self.kind == "datetime" and kind == "category":
+            values = np.datetime_as_string(self.values, unit="s").tolist()
+            values = [None if v == "NaT" else v for v in values]
+        elif self.kind == "float" and kind == "object":
+            ints = [False] * self.length if self._ints is None else self._ints[: self.length]
+            values = [
+                None if v != v else int(v) if is_int else v
+                for v, is_int in zip(self.values.tolist(), ints, strict=True)
+            ]
+        else:
+            values = self.values.tolist()
+
+        self.kind = kind
+        self._ints = None
+        self._data = np.empty(max(self.length, 1024), dtype=DTYPES[kind])
+        self._data[: self.length] = self._array(values)
+        if kind == "float":
+            self._mark_ints(0, values)
+
+
+class Columns:
+    """Records held column-wise in NumPy arrays (`pip install pymyob[numpy]`).
+
+    Records are flattened as for export (nested objects into dotted columns like `Customer.UID`,
+    lists into JSON), and only `fields` kept, if given. Amounts and other numbers are held as
+    float64 or int64 arrays, dates as datetime64, and strings as codes into a list of distinct
+    values, so the UIDs and codes repeated across a ledger are each held once. `to_pandas` and
+    `to_arrow` wrap the arrays rather than copying them (bar bools and anything left as objects,
+    for Arrow).
+    """
+
+    def __init__(self, fields: list[str] | None = None) -> None:
+        try:
+            import numpy as np
+        except ImportError as e:
+            raise ImportError("Columnar results require numpy: `pip install pymyob[numpy]`.") from e
+        self._np = np
+        self.fields = fields
+        self.length = 0
+        self.columns: dict[str, Column] = {name: Column(np) for name in fields or []}
+
+    @classmethod
+    def from_pages(cls, pages: Iterable[dict], fields: list[str] | None = None) -> "Columns":
+        """Gather the items from pages of an ALL method, eg. from `iter_pages_parallel`."""
+        columns = cls(fields)
+        for page in pages:
+            columns.extend(page.get("Items", []))
+        return columns
+
+    def extend(self, items: list[dict]) -> None:
+        rows = [flatten(item) for item in items]
+        names = self.fields or dict.fromkeys(k for row in rows for k in row)
+        for name in names:
+            if name not in self.columns:
+                self.columns[name] = Column(self._np, self.length)
+        for name, column in self.columns.items():
+            column.extend([row.get(name) for row in rows])
+        self.length += len(rows)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, name: str) -> Column:
+        return self.columns[name]
+
+    def to_pandas(self) -> Any:
+        """A pandas DataFrame, with strings as categoricals."""
+        try:
+            import pandas as pd
+        except ImportError as e:
+            raise ImportError("Converting to a DataFrame requires pandas.") from e
+        data = {}
+        for name, column in self.columns.items():
+            if column.kind == "category":
+                data[name] = pd.Categorical.from_codes(
+                    column.values, categories=pd.Index(column.categories, dtype=object)
+                )
+            else:
+                data[name] = column.values
+        return pd.DataFrame(data, copy=False)
+
+    def to_arrow(self) -> Any:
+        """A pyarrow Table (`pip install pymyob[parquet]`), with strings dictionary-encoded.
+
+        Columns of mixed types (eg. numbers and strings), which Arrow can't hold, become strings.
+        """
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError(
+                "Converting to Arrow requires pyarrow: `pip install pymyob[parquet]`."
+            ) from e
+        data = {}
+        for name, column in self.columns.items():
+            if column.kind == "category":
+                codes = column.values
+                data[name] = pa.DictionaryArray.from_arrays(
+                    pa.array(codes, mask=codes < 0), pa.array(column.categories, pa.string())
+                )
+            elif column.kind == "object" or column.kind is None:
+                values = column.values.tolist()
+                try:
+                    data[name] = pa.array(values)
+                except (pa.ArrowInvalid, pa.ArrowTypeError):
+                    strings = [None if v is None else str(v) for v in values]
+                    data[name] = pa.array(strings, pa.string())
+            else:
+                # NaN and NaT become nulls.
+                data[name] = pa.array(column.values, from_pandas=True)
+        return pa.table(data)
@@ -0,0 +1,148 @@
+import queue
+import requests
+import threading
+from collections.abc import Callable, Hashable, Iterable, Iterator
+from requests.adapters import HTTPAdapter
+from typing import Any
+
+_DONE = object()
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Coalesce concurrent identical calls into one.
+
+    The first caller for a given key runs the function; any callers arriving with the same key
+    while it's in flight block until it finishes and receive the same result (or exception).
+    Note all callers share the one result object, so treat it as read-only.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+
+    def __reduce__(self) -> tuple:
+        # In-flight calls belong to this process; unpickle to an idle one.
+        return (SingleFlight, ())
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+class ThreadLocalSession:
+    """A `requests.Session` per thread, all sharing the one pool of connections.
+
+    `requests.Session` isn't thread-safe (its cookies and settings are mutated while sending), but
+    urllib3's connection pools are, so each thread gets its own session mounted with a shared
+    `HTTPAdapter`. Pass one as a `Myob` client's `session` to share it across threads.
+    """
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 10) -> None:
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self._local = threading.local()
+
+    def __reduce__(self) -> tuple:
+        return (ThreadLocalSession, (self.pool_connections, self.pool_maxsize))
+
+    @property
+    def session(self) -> requests.Session:
+        """This thread's session."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.mount("https://", self.adapter)
+            session.mount("http://", self.adapter)
+        return session
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        return self.session.request(method, url, **kwargs)
+
+    def close(self) -> None:
+        """Close every pooled connection."""
+        self.adapter.close()
+
+
+def read_ahead(iterable: Iterable, depth: int = 1) -> Iterator:
+    """Run an iterator in a background thread, keeping up to `depth` items ready ahead of the
+    consumer.
+
+    Eg. wrapping a paginator lets page N+1 be fetched while the caller works through page N.
+    The buffer is bounded, so a slow consumer holds the producer back and memory stays capped.
+    Exceptions raised by the iterator are re-raised to the consumer.
+    """
+    if depth < 1:
+        yield from iterable
+        return
+
+    buffer: queue.Queue = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item: Any) -> bool:
+        # Give up if the consumer has gone away, rather than blocking forever on a full buffer.
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        iterator = iter(iterable)
+        try:
+            for item in iterator:
+                if not put((item, None)):
+                    return
+            put((_DONE, None))
+        except BaseException as e:
+            put((_DONE, e))
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = buffer.get()
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
@@ -5,6 +5,10 @@ AUTHORIZE_URL = "account/authorize/"
 ACCESS_TOKEN_URL = "v1/authorize/"  # noqa: S105
 
 DEFAULT_PAGE_SIZE = 400
+MAX_PAGE_SIZE = 1000  # The most MYOB will return in one page.
+# Longest `$filter` (before URL encoding) to build when batching values into OR filters, keeping
+# URLs well inside the limits of MYOB and the proxies in front of it.
+MAX_FILTER_LENGTH = 2000
 
 # Format in which MYOB returns datetimes
 # (pymyob won't parse these, but offers the constant for convenience).
@@ -1,4 +1,6 @@
 import base64
+import threading
+from collections.abc import Callable
 from datetime import datetime, timedelta
 from typing import Any
 
@@ -8,7 +10,12 @@ from .constants import ACCESS_TOKEN_URL, AUTHORIZE_URL, MYOB_PARTNER_BASE_URL
 
 
 class PartnerCredentials:
-    """An object wrapping the 3-step OAuth2 process for Partner MYOB API access."""
+    """An object wrapping the 3-step OAuth2 process for Partner MYOB API access.
+
+    Safe to share between threads: tokens and company file credentials are swapped in whole
+    under a lock rather than mutated in place, and `refresh_if_expired` refreshes only once however
+    many threads find the token expired.
+    """
 
     def __init__(
         self,
@@ -16,7 +23,7 @@ class PartnerCredentials:
         consumer_secret: str,
         callback_uri: str,
         verified: bool = False,
-        companyfile_credentials: dict[str, str] = {},  # noqa: B006
+        companyfile_credentials: dict[str, str] | None = None,
         oauth_token: str | None = None,
         refresh_token: str | None = None,
         oauth_expires_at: datetime | None = None,
@@ -28,7 +35,7 @@ class PartnerCredentials:
         self.callback_uri = callback_uri
 
         self.verified = verified
-        self.companyfile_credentials = companyfile_credentials
+        self.companyfile_credentials = dict(companyfile_credentials or {})
         self.oauth_token = oauth_token
         self.refresh_token = refresh_token
 
@@ -37,34 +44,72 @@ class PartnerCredentials:
                 raise ValueError("'oauth_expires_at' must be a datetime instance.")
         self.oauth_expires_at = oauth_expires_at
 
-        self._oauth = OAuth2Session(consumer_key, redirect_uri=callback_uri)
-        url, _ = self._oauth.authorization_url(MYOB_PARTNER_BASE_URL + AUTHORIZE_URL, state=state)
-        self.url = url + "&scope=CompanyFile"
+        # The OAuth session and authorisation url are only needed for the authorisation flow
+        # and token refreshes, so are built on first use rather than here.
+        self._oauth_state = state
+        self._oauth_session: OAuth2Session | None = None
+        self._url: str | None = None
+        # Guards token swaps and refreshes (re-entrant, as listeners may read `state`).
+        self._lock = threading.RLock()
+        # Called with this object whenever its `state` changes (eg. on token refresh).
+        self.state_listeners: list[Callable[[PartnerCredentials], None]] = []
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> "PartnerCredentials":
+        """Rebuild credentials from a previously saved `state`."""
+        return cls(**state)
+
+    def __reduce__(self) -> tuple:
+        # Pickle as `state`, leaving the OAuth session and state listeners behind.
+        return (PartnerCredentials.from_state, (self.state,))
+
+    @property
+    def _oauth(self) -> OAuth2Session:
+        with self._lock:
+            if self._oauth_session is None:
+                self._oauth_session = OAuth2Session(
+                    self.consumer_key, redirect_uri=self.callback_uri
+                )
+            return self._oauth_session
+
+    @property
+    def url(self) -> str:
+        """The url to send users to, to authorise partnership with your app."""
+        if self._url is None:
+            url, _ = self._oauth.authorization_url(
+                MYOB_PARTNER_BASE_URL + AUTHORIZE_URL, state=self._oauth_state
+            )
+            self._url = url + "&scope=CompanyFile"
+        return self._url
 
     # TODO: Add `verify` kwarg here, which will quickly throw the provided credentials at a
     # protected endpoint to ensure they are valid. If not, raise appropriate error.
     def authenticate_companyfile(self, company_id: str, username: str, password: str) -> None:
         """Store hashed username-password for logging into company file."""
         userpass = base64.b64encode(bytes(f"{username}:{password}", "utf-8")).decode("utf-8")
-        self.companyfile_credentials[company_id] = userpass
+        with self._lock:
+            # Copy on write, so threads building requests never see the dict change under them.
+            self.companyfile_credentials = {**self.companyfile_credentials, company_id: userpass}
+            self._notify_state_listeners()
 
     @property
     def state(self) -> dict[str, Any]:
         """Get a representation of this credentials object from which it can be reconstructed."""
-        return {
-            attr: getattr(self, attr)
-            for attr in (
-                "consumer_key",
-                "consumer_secret",
-                "callback_uri",
-                "verified",
-                "companyfile_credentials",
-                "oauth_token",
-                "refresh_token",
-                "oauth_expires_at",
-            )
-            if getattr(self, attr) is not None
-        }
+        with self._lock:
+            return {
+                attr: getattr(self, attr)
+                for attr in (
+                    "consumer_key",
+                    "consumer_secret",
+                    "callback_uri",
+                    "verified",
+                    "companyfile_credentials",
+                    "oauth_token",
+                    "refresh_token",
+                    "oauth_expires_at",
+                )
+                if getattr(self, attr) is not None
+            }
 
     def expired(self, now: datetime | None = None) -> bool:
         """Determine whether the current access token has expired."""
@@ -92,17 +137,36 @@ class PartnerCredentials:
 
     def refresh(self) -> None:
         """Refresh an expired token."""
-        token = self._oauth.refresh_token(
-            MYOB_PARTNER_BASE_URL + ACCESS_TOKEN_URL,
-            refresh_token=self.refresh_token,
-            client_id=self.consumer_key,
-            client_secret=self.consumer_secret,
-        )
-        self.save_token(token)
+        with self._lock:
+            token = self._oauth.refresh_token(
+                MYOB_PARTNER_BASE_URL + ACCESS_TOKEN_URL,
+                refresh_token=self.refresh_token,
+                client_id=self.consumer_key,
+                client_secret=self.consumer_secret,
+            )
+            self.save_token(token)
 
-    def save_token(self, token: dict) -> None:
-        self.oauth_token = token.get("access_token")
-        self.refresh_token = token.get("refresh_token")
+    def refresh_if_expired(self) -> bool:
+        """Refresh the token if it has expired, returning whether it was refreshed.
+
+        Refresh tokens can only be used once, so threads racing to refresh wait for the first to
+        finish, then find the token fresh.
+        """
+        with self._lock:
+            if not self.expired():
+                return False
+            self.refresh()
+            return True
 
-        self.oauth_expires_at = datetime.fromtimestamp(token.get("expires_at"))  # type: ignore[arg-type]
-        self.verified = True
+    def save_token(self, token: dict) -> None:
+        expires_at = datetime.fromtimestamp(token.get("expires_at"))  # type: ignore[arg-type]
+        with self._lock:
+            self.oauth_token = token.get("access_token")
+            self.refresh_token = token.get("refresh_token")
+            self.oauth_expires_at = expires_at
+            self.verified = True
+            self._notify_state_listeners()
+
+    def _notify_state_listeners(self) -> None:
+        for listener in self.state_listeners:
+            listener(self)
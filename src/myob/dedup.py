@@ -0,0 +1,110 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any
+
+from .constants import MYOB_BASE_URL
+from .endpoints import ALL, DELETE, GET, POST, PUT
+from .types import Method
+from .utils import local_url
+
+# Fields MYOB manages itself, which say nothing about whether the content has changed.
+IGNORED_FIELDS = ("RowVersion", "URI", "LastModified")
+
+
+def entity_url(url: str, item: dict) -> str:
+    """The URL to PUT an item listed at `url` to.
+
+    Taken from its `URI` where it has one (a listing may span several kinds of entity), on our
+    host (see `local_url`), as that's what PUTs are made to. Otherwise it's the item's UID under
+    `url`.
+    """
+    uri = item.get("URI")
+    company_id = url.removeprefix(MYOB_BASE_URL).split("/", 1)[0]
+    if uri and url.startswith(MYOB_BASE_URL) and company_id:
+        local = local_url(uri, company_id)
+        if local is not None:
+            return local.rstrip("/") + "/"
+    return f"{url}{item['UID']}/"
+
+
+class SkippedWrite(dict):
+    """Returned in place of MYOB's response to a PUT skipped by `WriteDedup`: the payload that
+    wasn't sent."""
+
+    skipped = True
+
+
+class WriteDedup:
+    """Skips PUTs that wouldn't change anything.
+
+    Remembers a hash of the content last fetched (by GET, or in a page of a listing) or written
+    (by POST/PUT) for each entity, and has PUTs with the same content return a `SkippedWrite`
+    instead of being sent. Fields in `ignore` (eg. `RowVersion`) are left out of the comparison.
+    Up to `max_entries` entities are remembered, forgetting the least recently used. `skipped`
+    counts the PUTs skipped, and `sent` those sent successfully.
+    """
+
+    def __init__(
+        self, max_entries: int = 100_000, ignore: tuple[str, ...] = IGNORED_FIELDS
+    ) -> None:
+        self.max_entries = max_entries
+        self.ignore = ignore
+        self.sent = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+        self._hashes: OrderedDict[str, frozenset[str]] = OrderedDict()
+
+    def __reduce__(self) -> tuple:
+        return (WriteDedup, (self.max_entries, self.ignore))
+
+    def hash(self, entity: dict) -> str:
+        """A hash of the entity's content, the same however its keys are ordered."""
+        content = {k: v for k, v in entity.items() if k not in self.ignore}
+        canonical = json.dumps(content, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def unchanged(self, url: str, data: dict) -> bool:
+        """Whether PUTting `data` to the entity at `url` would change nothing we know of."""
+        digest = self.hash(data)
+        with self._lock:
+            hashes = self._hashes.get(url)
+            if hashes is not None and digest in hashes:
+                self._hashes.move_to_end(url)
+                self.skipped += 1
+                return True
+            return False
+
+    def remember(self, url: str, *entities: dict) -> None:
+        """Remember the entity at `url` as having the content of any of `entities`."""
+        hashes = frozenset(self.hash(e) for e in entities)
+        with self._lock:
+            self._hashes[url] = hashes
+            self._hashes.move_to_end(url)
+            while len(self._hashes) > self.max_entries:
+                self._hashes.popitem(last=False)
+
+    def forget(self, url: str) -> None:
+        with self._lock:
+            self._hashes.pop(url, None)
+
+    def record(self, method: Method, url: str, data: dict | None, result: Any) -> None:
+        """Note the outcome of a request made through a manager."""
+        entity = result if isinstance(result, dict) and result.get("UID") else None
+        if method == GET and entity is not None:
+            self.remember(url, entity)
+        elif method == ALL and isinstance(result, dict):
+            for item in result.get("Items") or []:
+                if isinstance(item, dict) and item.get("UID"):
+                    self.remember(entity_url(url, item), item)
+        elif method == POST and entity is not None:
+            self.remember(f"{url}{entity['UID']}/", *[e for e in (entity, data) if e is not None])
+        elif method == PUT and data is not None:
+            with self._lock:
+                self.sent += 1
+            # MYOB's response may differ from what was sent (eg. in calculated fields), but both
+            # describe what it now holds.
+            self.remember(url, *[e for e in (entity, data) if e is not None])
+        elif method == DELETE:
+            self.forget(url)
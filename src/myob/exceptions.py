@@ -1,4 +1,5 @@
 from requests import Response
+from typing import Any
 
 
 class MyobException(Exception):  # noqa: N818
@@ -62,3 +63,19 @@ class MyobGatewayTimeout(MyobException):
 class MyobExceptionUnknown(MyobException):
     # Any other exception.
     pass
+
+
+class MyobCircuitOpen(Exception):  # noqa: N818
+    # Raised without calling MYOB, as recent calls against this company file/endpoint have failed.
+    def __init__(self, key: Any, retry_after: float) -> None:
+        self.key = key
+        self.retry_after = retry_after
+        super().__init__(f"Circuit open for {key}; retry in {retry_after:.0f}s.")
+
+
+class MyobOutboxFailed(Exception):  # noqa: N818
+    # A write queued in an outbox was given up on.
+    def __init__(self, id: int, error: str) -> None:
+        self.id = id
+        self.error = error
+        super().__init__(f"Outbox write {id} failed: {error}")
@@ -0,0 +1,289 @@
+import csv
+import json
+import os
+import warnings
+from collections.abc import Callable
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from .api import CompanyFile
+from .checkpoints import CheckpointStore, FileCheckpointStore, load_checkpoint
+from .constants import DEFAULT_PAGE_SIZE
+from .credentials import PartnerCredentials
+from .endpoints import ENDPOINTS
+from .pagination import iter_pages_parallel
+from .utils import flatten
+
+FORMATS = ["ndjson", "csv", "parquet"]
+
+
+class NdjsonWriter:
+    def __init__(self, path: str, append: bool = False, offset: int | None = None) -> None:
+        if append and offset is not None:
+            _truncate(path, offset)
+        self.file = open(path, "a" if append else "w", encoding="utf-8")
+
+    def write(self, records: list[dict]) -> None:
+        self.file.writelines(json.dumps(record) + "\n" for record in records)
+
+    def flush(self) -> bool:
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return True
+
+    def close(self) -> None:
+        self.file.close()
+
+    def abort(self) -> None:
+        self.file.close()
+
+    def tell(self) -> int | None:
+        return self.file.tell()
+
+
+class CsvWriter:
+    """Writes flattened records. Columns are fixed by the first page written to the file.
+
+    Columns that only turn up on later pages (eg. nested objects that were null throughout the
+    first) are left out, with a warning naming them. They're listed in `dropped`.
+    """
+
+    def __init__(self, path: str, append: bool = False, offset: int | None = None) -> None:
+        if append and offset is not None:
+            _truncate(path, offset)
+        self.fieldnames: list[str] | None = None
+        if append and os.path.exists(path):
+            with open(path, encoding="utf-8", newline="") as f:
+                self.fieldnames = next(csv.reader(f), None)
+        self.file = open(path, "a" if append else "w", encoding="utf-8", newline="")
+        self.writer: csv.DictWriter | None = None
+        self.dropped: set[str] = set()
+        if self.fieldnames:
+            self.writer = csv.DictWriter(self.file, self.fieldnames, extrasaction="ignore")
+
+    def write(self, records: list[dict]) -> None:
+        rows = [flatten(record) for record in records]
+        if self.writer is None:
+            if not rows:
+                return
+            self.fieldnames = list(dict.fromkeys(k for row in rows for k in row))
+            self.writer = csv.DictWriter(self.file, self.fieldnames, extrasaction="ignore")
+            self.writer.writeheader()
+        known = set(self.fieldnames or ())
+        dropped = {k for row in rows for k in row if k not in known} - self.dropped
+        if dropped:
+            self.dropped |= dropped
+            warnings.warn(
+                f"Columns not on the first page are left out of the CSV: {sorted(dropped)}.",
+                stacklevel=2,
+            )
+        self.writer.writerows(rows)
+
+    def flush(self) -> bool:
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return True
+
+    def close(self) -> None:
+        self.file.close()
+
+    def abort(self) -> None:
+        self.file.close()
+
+    def tell(self) -> int | None:
+        return self.file.tell()
+
+
+class ParquetWriter:
+    """Writes flattened records to a directory of parquet files (`pip install pymyob[parquet]`).
+
+    Parquet files aren't readable until closed, so records are written to parts of around
+    `rows_per_part` rows, each only made durable (and checkpointable) once closed. The schema of
+    each part is inferred from its first page.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        append: bool = False,
+        offset: int | None = None,
+        rows_per_part: int = 100_000,
+    ) -> None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError(
+                "Parquet export requires pyarrow: `pip install pymyob[parquet]`."
+            ) from e
+        self._pa = pa
+        self._pq = pq
+        self.directory = Path(path)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Unfinished parts from an interrupted run were never checkpointed, so bin them.
+        for part in self.directory.glob("part-*.parquet.tmp"):
+            part.unlink()
+        if not append:
+            for part in self.directory.glob("part-*.parquet"):
+                part.unlink()
+        self.rows_per_part = rows_per_part
+        self.rows = 0
+        self.part = len(list(self.directory.glob("part-*.parquet")))
+        self.writer: Any = None
+
+    def write(self, records: list[dict]) -> None:
+        rows = [flatten(record) for record in records]
+        if not rows:
+            return
+        if self.writer is None:
+            schema = self._pa.Table.from_pylist(rows).schema
+            # Columns that were empty on the first page could be anything later on.
+            schema = self._pa.schema(
+                field.with_type(self._pa.string()) if self._pa.types.is_null(field.type) else field
+                for field in schema
+            )
+            self.writer = self._pq.ParquetWriter(self._part_path(tmp=True), schema)
+        self.writer.write_table(self._pa.Table.from_pylist(rows, schema=self.writer.schema))
+        self.rows += len(rows)
+
+    def _part_path(self, tmp: bool = False) -> Path:
+        return self.directory / f"part-{self.part:05}.parquet{'.tmp' if tmp else ''}"
+
+    def flush(self) -> bool:
+        if self.writer is None:
+            return True
+        if self.rows < self.rows_per_part:
+            return False
+        self.close()
+        return True
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            os.replace(self._part_path(tmp=True), self._part_path())
+            self.writer = None
+            self.rows = 0
+            self.part += 1
+
+    def abort(self) -> None:
+        # Leave the unfinished part to be binned on resume.
+        if self.writer is not None:
+            self.writer.close()
+
+    def tell(self) -> int | None:
+        return None
+
+
+def _truncate(path: str, offset: int) -> None:
+    if os.path.exists(path):
+        with open(path, "r+b") as f:
+            f.truncate(offset)
+
+
+WRITERS: dict[str, type[NdjsonWriter | CsvWriter | ParquetWriter]] = {
+    "ndjson": NdjsonWriter,
+    "csv": CsvWriter,
+    "parquet": ParquetWriter,
+}
+
+
+def load_credentials(path: str) -> PartnerCredentials:
+    """Load credentials `state` saved as JSON, writing it back whenever it changes."""
+    with open(path, encoding="utf-8") as f:
+        state = json.load(f)
+    if state.get("oauth_expires_at"):
+        state["oauth_expires_at"] = datetime.fromisoformat(state["oauth_expires_at"])
+    credentials = PartnerCredentials.from_state(state)
+    credentials.state_listeners.append(lambda cred: save_credentials(cred, path))
+    return credentials
+
+
+def save_credentials(credentials: PartnerCredentials, path: str) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(credentials.state, f, default=lambda o: o.isoformat(), indent=2)
+    os.replace(tmp, path)
+
+
+def resolve_method(companyfile: CompanyFile, endpoint: str) -> Callable[..., Any]:
+    """Find the ALL method named like `contacts.customer` (or just `contacts` for `all`)."""
+    manager_name, _, method_name = endpoint.partition(".")
+    manager_names = sorted(v["name"] for v in ENDPOINTS.values())  # type: ignore[misc]
+    if manager_name not in manager_names:
+        raise ValueError(f"Unknown endpoint {manager_name!r}. Expected one of {manager_names}.")
+    manager = getattr(companyfile, manager_name)
+    method_name = method_name or "all"
+    # ALL methods are the only ones requiring no kwargs.
+    all_methods = sorted(k for k, v in manager.method_details.items() if not v["kwargs"])
+    if method_name not in all_methods:
+        raise ValueError(
+            f"Unknown method {method_name!r} for {manager_name}. Expected one of {all_methods}."
+        )
+    return getattr(manager, method_name)
+
+
+def export(
+    func: Callable[..., Any],
+    path: str,
+    format: str = "ndjson",
+    checkpoint_path: str | None = None,
+    endpoint: str = "",
+    limit: int = DEFAULT_PAGE_SIZE,
+    workers: int = 4,
+    checkpoint_store: CheckpointStore | None = None,
+    checkpoint_key: str | None = None,
+    **filters: Any,
+) -> int:
+    """Stream every record from an ALL method to a file, returning the number written.
+
+    Pages are fetched `workers` at a time, and written as they arrive, so memory use doesn't
+    grow with the size of the collection. If a `checkpoint_path` (or a `checkpoint_store` and
+    `checkpoint_key`) is given, progress is saved there after each page, and a later call with
+    the same arguments picks up where it left off.
+    """
+    if checkpoint_path:
+        checkpoint_store = FileCheckpointStore(os.path.dirname(checkpoint_path) or ".")
+        checkpoint_key = os.path.basename(checkpoint_path)
+    if checkpoint_store is not None and checkpoint_key is None:
+        raise ValueError("A `checkpoint_key` is required to checkpoint to a store.")
+
+    identity = {"endpoint": endpoint, "filters": filters, "limit": limit}
+    checkpoint = None
+    if checkpoint_store is not None:
+        try:
+            checkpoint = load_checkpoint(checkpoint_store, checkpoint_key, **identity)  # type: ignore[arg-type]
+        except ValueError:
+            raise ValueError(f"Checkpoint {checkpoint_key} is for a different export.") from None
+    resume = checkpoint is not None
+    if checkpoint is None:
+        checkpoint = {**identity, "page": 0, "count": 0}
+
+    # Anything written after the last checkpoint is dropped and redone on resume.
+    writer = WRITERS[format](path, append=resume, offset=checkpoint.get("offset"))
+    pending_pages = pending_count = 0
+    try:
+        for response in iter_pages_parallel(
+            func, page=checkpoint["page"] + 1, limit=limit, workers=workers, **filters
+        ):
+            items = response.get("Items", [])
+            writer.write(items)
+            pending_pages += 1
+            pending_count += len(items)
+            # Only checkpoint once pages are safely on disk.
+            if writer.flush():
+                checkpoint["page"] += pending_pages
+                checkpoint["count"] += pending_count
+                pending_pages = pending_count = 0
+                checkpoint["offset"] = writer.tell()
+                if checkpoint_store is not None:
+                    checkpoint_store.save(checkpoint_key, checkpoint)  # type: ignore[arg-type]
+        writer.close()
+        checkpoint["count"] += pending_count
+    except BaseException:
+        writer.abort()
+        raise
+
+    if checkpoint_store is not None:
+        checkpoint_store.delete(checkpoint_key)  # type: ignore[arg-type]
+    return checkpoint["count"]
@@ -0,0 +1,81 @@
+from datetime import date
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+
+from .constants import MAX_FILTER_LENGTH, MAX_PAGE_SIZE
+
+# Lookup suffixes for filter kwargs, and the expressions they render to. There's also `isnull`.
+LOOKUPS = {
+    "eq": "{field} eq {value}",
+    "ne": "{field} ne {value}",
+    "lt": "{field} lt {value}",
+    "le": "{field} le {value}",
+    "gt": "{field} gt {value}",
+    "ge": "{field} ge {value}",
+    "in": "{field} eq {value}",
+    "startswith": "startswith({field}, {value})",
+    "endswith": "endswith({field}, {value})",
+    "contains": "substringof({value}, {field})",
+}
+
+# Lookups that compare by order, and so compare numbers as numbers.
+COMPARISONS = ("lt", "le", "gt", "ge")
+
+
+def build_value(value: Any, numeric: bool = False) -> str:
+    """Render a python value as an OData literal for use in a `$filter`.
+
+    Numbers are quoted like strings (as field types can't be told from here), unless `numeric`.
+    """
+    if isinstance(value, UUID):
+        return f"guid'{value}'"
+    if issubclass(type(value), date):
+        return f"datetime'{value}'"
+    if isinstance(value, bool):
+        return str(value).lower()
+    if numeric and isinstance(value, Decimal):
+        return format(value, "f")
+    if numeric and isinstance(value, int | float):
+        return str(value)
+    # Quotes are escaped by doubling them.
+    return "'{}'".format(str(value).replace("'", "''"))
+
+
+def build_filter(key: str, value: Any) -> str:
+    """Render a filter kwarg as a `$filter` expression, eg. `Name__startswith="Acme"`.
+
+    Keys without a known lookup suffix are compared with `eq`. A list of values matches any of
+    them (or, for `__ne`, none of them).
+    """
+    field, _, lookup = key.rpartition("__")
+    if not field or (lookup not in LOOKUPS and lookup != "isnull"):
+        field, lookup = key, "eq"
+    if lookup == "isnull":
+        return f"{field} {'eq' if value else 'ne'} null"
+    values = value if isinstance(value, list | tuple) else [value]
+    if not values:
+        raise ValueError(f"No values given to filter {key!r} on.")
+    joiner = " and " if lookup == "ne" else " or "
+    numeric = lookup in COMPARISONS
+    return joiner.join(
+        LOOKUPS[lookup].format(field=field, value=build_value(v, numeric)) for v in values
+    )
+
+
+def chunk_values(key: str, values: list, max_length: int = MAX_FILTER_LENGTH) -> list[list]:
+    """Split `values` into runs whose OR filter (as `build_filter` renders it) fits in
+    `max_length` characters (and whose results fit in a page)."""
+    chunks: list[list] = []
+    chunk: list = []
+    length = 0
+    for value in values:
+        term = len(build_filter(key, [value]))
+        if chunk and (length + len(" or ") + term > max_length or len(chunk) == MAX_PAGE_SIZE):
+            chunks.append(chunk)
+            chunk, length = [], 0
+        length += term + (len(" or ") if chunk else 0)
+        chunk.append(value)
+    if chunk:
+        chunks.append(chunk)
+    return chunks
@@ -0,0 +1,145 @@
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any
+
+from .endpoints import POST, PUT
+from .types import WriteGraphResult
+
+
+class Ref:
+    """A placeholder for part of an earlier write's result, eg. the UID of a new customer.
+
+    `path` is dotted, with list indices as numbers (eg. "Lines.0.UID").
+    """
+
+    def __init__(self, name: str, path: str = "UID") -> None:
+        self.name = name
+        self.path = path
+
+    def __repr__(self) -> str:
+        return f"Ref({self.name!r}, {self.path!r})"
+
+    def resolve(self, results: dict[str, Any]) -> Any:
+        value = results[self.name]
+        for part in self.path.split("."):
+            value = value[int(part)] if isinstance(value, list) else value[part]
+        return value
+
+
+def refs(value: Any) -> list[Ref]:
+    """Every `Ref` in a value, descending into dicts, lists and tuples."""
+    if isinstance(value, Ref):
+        return [value]
+    if isinstance(value, dict):
+        return [r for v in value.values() for r in refs(v)]
+    if isinstance(value, list | tuple):
+        return [r for v in value for r in refs(v)]
+    return []
+
+
+def substitute(value: Any, results: dict[str, Any]) -> Any:
+    """A copy of a value with each `Ref` replaced by what it points to in `results`."""
+    if isinstance(value, Ref):
+        return value.resolve(results)
+    if isinstance(value, dict):
+        return {k: substitute(v, results) for k, v in value.items()}
+    if isinstance(value, list | tuple):
+        return type(value)(substitute(v, results) for v in value)
+    return value
+
+
+class WriteGraph:
+    """A set of POSTs and PUTs, possibly across managers, run in dependency order.
+
+    Each write is added under a name, and may refer to the results of others with `ref`, eg. an
+    invoice posted with `{"Customer": {"UID": graph.ref("customer")}}`. Writes wait for those they
+    refer to (and any named in `after`), and `run` sends the rest concurrently, within the limits
+    of any `Scheduler` the managers share. A write that fails doesn't stop others, but those that
+    depend on it are skipped.
+    """
+
+    def __init__(self) -> None:
+        self.writes: dict[str, tuple[Callable[..., Any], dict[str, Any]]] = {}
+        self.dependencies: dict[str, set[str]] = {}
+
+    def add(
+        self, name: str, func: Callable[..., Any], after: tuple[str, ...] = (), **kwargs: Any
+    ) -> Ref:
+        """Add a write, eg. `graph.add("customer", comp.contacts.post_customer, data=...)`.
+
+        Returns a `Ref` to its UID, for convenience.
+        """
+        if name in self.writes:
+            raise ValueError(f"There's already a write named {name!r}.")
+        if getattr(func, "method", None) not in (POST, PUT):
+            raise ValueError(f"{name!r} isn't a POST or PUT method.")
+        self.writes[name] = (func, kwargs)
+        self.dependencies[name] = {r.name for r in refs(kwargs)} | set(after)
+        return Ref(name)
+
+    def ref(self, name: str, path: str = "UID") -> Ref:
+        return Ref(name, path)
+
+    def order(self) -> list[str]:
+        """The writes in an order that satisfies their dependencies, checking there is one."""
+        for name, dependencies in self.dependencies.items():
+            unknown = dependencies - self.writes.keys()
+            if unknown:
+                raise ValueError(f"{name!r} depends on unknown writes {sorted(unknown)}.")
+        order: list[str] = []
+        done: set[str] = set()
+        remaining = dict(self.dependencies)
+        while remaining:
+            ready = [name for name, dependencies in remaining.items() if dependencies <= done]
+            if not ready:
+                raise ValueError(f"Writes {sorted(remaining)} depend on each other.")
+            for name in ready:
+                del remaining[name]
+            order += ready
+            done.update(ready)
+        return order
+
+    def run(self, workers: int = 4) -> WriteGraphResult:
+        """Send every write, returning the results of those that succeeded, the errors of those
+        that failed, and the names of those skipped because a dependency failed."""
+        order = self.order()
+        dependents: dict[str, list[str]] = {name: [] for name in order}
+        waiting_on = {name: len(self.dependencies[name]) for name in order}
+        for name in order:
+            for dependency in self.dependencies[name]:
+                dependents[dependency].append(name)
+
+        results: dict[str, Any] = {}
+        failed: dict[str, Exception] = {}
+        skipped: list[str] = []
+
+        def send(name: str) -> Any:
+            func, kwargs = self.writes[name]
+            return func(**substitute(kwargs, results))
+
+        def skip(name: str) -> None:
+            for dependent in dependents[name]:
+                if dependent not in skipped:
+                    skipped.append(dependent)
+                    skip(dependent)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            running: dict[Future, str] = {
+                executor.submit(send, name): name for name in order if not waiting_on[name]
+            }
+            while running:
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        failed[name] = e
+                        skip(name)
+                        continue
+                    for dependent in dependents[name]:
+                        waiting_on[dependent] -= 1
+                        if not waiting_on[dependent] and dependent not in skipped:
+                            running[executor.submit(send, dependent)] = dependent
+
+        return {"results": results, "failed": failed, "skipped": skipped}
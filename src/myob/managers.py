@@ -1,11 +1,32 @@
+import copy
+import json
 import re
 import requests
-from datetime import date
-from typing import Any
-
-from .constants import DEFAULT_PAGE_SIZE, MYOB_BASE_URL
+import threading
+import weakref
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any
+
+from .breaker import CircuitBreaker
+from .cache import DiskCache
+from .codecs import Codec
+from .concurrency import SingleFlight, ThreadLocalSession
+from .constants import DEFAULT_PAGE_SIZE, MAX_FILTER_LENGTH, MAX_PAGE_SIZE, MYOB_BASE_URL
 from .credentials import PartnerCredentials
-from .endpoints import ALL, CRUD, GET, METHOD_MAPPING, METHOD_ORDER, POST, PUT, Method
+from .dedup import SkippedWrite, WriteDedup
+from .endpoints import (
+    ALL,
+    CRUD,
+    DELETE,
+    ENDPOINTS,
+    GET,
+    METHOD_MAPPING,
+    METHOD_ORDER,
+    POST,
+    PUT,
+    Method,
+)
 from .exceptions import (
     MyobBadRequest,
     MyobConflict,
@@ -17,7 +38,41 @@ from .exceptions import (
     MyobRateLimitExceeded,
     MyobUnauthorized,
 )
-from .types import MethodDetails
+from .filters import build_filter, build_value, chunk_values
+from .prefetch import fetch_in_batches, prefetch_result
+from .scheduler import Scheduler
+from .types import GetManyResult, MethodDetails
+
+if TYPE_CHECKING:
+    from .outbox import Outbox
+
+
+# Kwargs taken by the ORM methods themselves, rather than sent on.
+INNER_KWARGS = ("timeout", "schema", "priority", "defer", "prefetch")
+
+# Request kwargs that aren't filters.
+RESERVED_KWARGS = (
+    "orderby",
+    "format",
+    "headers",
+    "page",
+    "offset",
+    "limit",
+    "templatename",
+    "timeout",
+    "raw_filter",
+)
+
+
+def merge_changes(entity: dict, changes: dict) -> dict:
+    """Return a copy of `entity` with `changes` applied, merging nested objects field by field."""
+    merged = dict(entity)
+    for k, v in changes.items():
+        if isinstance(v, dict) and isinstance(merged.get(k), dict):
+            merged[k] = merge_changes(merged[k], v)
+        else:
+            merged[k] = v
+    return merged
 
 
 class Manager:
@@ -28,16 +83,44 @@ class Manager:
         company_id: str | None = None,
         endpoints: list = [],  # noqa: B006
         raw_endpoints: list = [],  # noqa: B006
+        single_flight: SingleFlight | None = None,
+        session: requests.Session | ThreadLocalSession | None = None,
+        codec: Codec | None = None,
+        scheduler: Scheduler | None = None,
+        breaker: CircuitBreaker | None = None,
+        outbox: "Outbox | None" = None,
+        cache: DiskCache | None = None,
+        dedup: WriteDedup | None = None,
     ) -> None:
         self.credentials = credentials
+        self.single_flight = single_flight
+        self.session = session
+        self.codec = codec
+        self.scheduler = scheduler
+        self.breaker = breaker
+        self.outbox = outbox
+        self.cache = cache
+        self.dedup = dedup
+        # Locks serialising `update`s per entity; dropped once no update holds them.
+        self._update_locks: weakref.WeakValueDictionary[str, threading.Lock] = (
+            weakref.WeakValueDictionary()
+        )
+        self._update_locks_lock = threading.Lock()
+        # Called with (method, url) after each successful write made through this manager.
+        self.write_listeners: list[Callable[[Method, str], None]] = []
         self.name = "_".join(p for p in name.rstrip("/").split("/") if "[" not in p)
+        self.path = name
         self.base_url = MYOB_BASE_URL
         if company_id is not None:
             self.base_url += company_id + "/"
         if name:
             self.base_url += name
+        if cache is not None:
+            self.write_listeners.append(self._invalidate_cache)
         self.method_details: dict[str, MethodDetails] = {}
         self.company_id = company_id
+        self._endpoints = endpoints
+        self._raw_endpoints = raw_endpoints
 
         # Build ORM methods from given url endpoints.
         for method, base, name in endpoints:
@@ -58,6 +141,39 @@ class Manager:
         for method, endpoint, hint in raw_endpoints:
             self.build_method(method, endpoint, hint)
 
+    def options(self) -> dict[str, Any]:
+        """The keyword args shared with other managers (see `Myob.manager_kwargs`)."""
+        return {
+            "single_flight": self.single_flight,
+            "session": self.session,
+            "codec": self.codec,
+            "scheduler": self.scheduler,
+            "breaker": self.breaker,
+            "outbox": self.outbox,
+            "cache": self.cache,
+            "dedup": self.dedup,
+        }
+
+    def __reduce__(self) -> tuple:
+        # The ORM methods are closures, which can't be pickled, so pickle what's needed to build
+        # them again instead: endpoints defined in `ENDPOINTS` go by their key alone. Write
+        # listeners aren't carried over.
+        endpoints = self._endpoints
+        if endpoints is ENDPOINTS.get(self.path, {}).get("methods"):
+            endpoints = None
+        return (
+            _rebuild_manager,
+            (
+                self.path,
+                self.credentials,
+                self.company_id,
+                endpoints,
+                self._raw_endpoints,
+                self.options(),
+            ),
+            {"name": self.name},
+        )
+
     def build_method(self, method: Method, endpoint: str, hint: str) -> None:
         full_endpoint = self.base_url + endpoint
         url_keys = re.findall(r"\[([^\]]*)\]", full_endpoint)
@@ -67,7 +183,15 @@ class Manager:
         if method in (PUT, POST):
             required_kwargs.append("data")
 
-        def inner(*args: Any, timeout: int | None = None, **kwargs: Any) -> str | dict:
+        def inner(
+            *args: Any,
+            timeout: int | None = None,
+            schema: Any = None,
+            priority: str | None = None,
+            defer: bool = False,
+            prefetch: list[str] | None = None,
+            **kwargs: Any,
+        ) -> Any:
             if args:
                 raise AttributeError("Unnamed args provided. Only keyword args accepted.")
 
@@ -78,6 +202,16 @@ class Manager:
                     f"Missing kwargs {list(missing_kwargs)}. Endpoint requires {required_kwargs}."
                 )
 
+            # Queue writes to be sent later, if asked to.
+            if defer:
+                if self.outbox is None or method not in (POST, PUT, DELETE):
+                    raise ValueError(
+                        "Only writes through a manager with an outbox can be deferred."
+                    )
+                return self.outbox.enqueue(inner, **kwargs)
+            if prefetch and method not in (GET, ALL):
+                raise ValueError("Only GET and ALL requests can prefetch related entities.")
+
             # Parse kwargs.
             url_kwargs = {}
             request_kwargs_raw = {}
@@ -92,45 +226,37 @@ class Manager:
 
             # Build url.
             url = template.format(**url_kwargs)
+            if (
+                self.dedup is not None
+                and method == PUT
+                and self.dedup.unchanged(url, kwargs["data"])
+            ):
+                return SkippedWrite(kwargs["data"])
 
             # Build request kwargs (header/query/body)
             request_kwargs = self.build_request_kwargs(
                 request_method, data=kwargs.get("data"), **request_kwargs_raw
             )
-            response = requests.request(request_method, url, timeout=timeout, **request_kwargs)
-
-            if response.status_code == 200:
-                # We don't want to be deserialising binary responses..
-                if not response.headers.get("content-type", "").startswith("application/json"):
-                    return response.content
-
-                try:
-                    return response.json()
-                except ValueError:
-                    # Handle possible empty string response to DELETE request
-                    if method == "DELETE" and response.content == b"":
-                        return {}
-                    raise
-            elif response.status_code == 201:
-                return response.json()
-            elif response.status_code == 400:
-                raise MyobBadRequest(response)
-            elif response.status_code == 401:
-                raise MyobUnauthorized(response)
-            elif response.status_code == 403:
-                if response.json()["Errors"][0]["Name"] == "RateLimitError":
-                    raise MyobRateLimitExceeded(response)
-                raise MyobForbidden(response)
-            elif response.status_code == 404:
-                raise MyobNotFound(response)
-            elif response.status_code == 409:
-                raise MyobConflict(response)
-            elif response.status_code == 500:
-                raise MyobInternalServerError(response)
-            elif response.status_code == 504:
-                raise MyobGatewayTimeout(response)
+            send_kwargs = {
+                "timeout": timeout,
+                "schema": schema,
+                "priority": priority,
+                "endpoint": self.path + endpoint,
+            }
+            filter_ = request_kwargs["params"].get("$filter", "")
+            if method == ALL and schema is None and len(filter_) > MAX_FILTER_LENGTH:
+                result = self.send_split(url, request_kwargs_raw, **send_kwargs)
             else:
-                raise MyobExceptionUnknown(response)
+                result = self.send(method, url, **send_kwargs, **request_kwargs)
+            if self.dedup is not None:
+                self.dedup.record(method, url, kwargs.get("data"), result)
+            if prefetch:
+                if self.single_flight is not None:
+                    # Prefetching fills in references in place, and a coalesced result is shared
+                    # with other callers, so fill in a copy of our own.
+                    result = copy.deepcopy(result)
+                result = prefetch_result(self, result, prefetch)
+            return result
 
         # Build method name
         method_name = "_".join(p for p in endpoint.rstrip("/").split("/") if "[" not in p).lower()
@@ -144,8 +270,240 @@ class Manager:
             kwargs=required_kwargs,
             hint=hint,
         )
+
+        def split_runs(**kwargs: Any) -> list[dict[str, Any]]:
+            """Split the kwargs for a call into runs whose filters fit in a URL (see `send_split`),
+            or return them as they are if they fit already."""
+            if kwargs.get("schema") is not None:
+                return [kwargs]
+            split = self._split(
+                {k: v for k, v in kwargs.items() if k not in url_keys and k not in INNER_KWARGS}
+            )
+            if split is None:
+                return [kwargs]
+            key, runs = split
+            return [{**kwargs, key: run} for run in runs]
+
+        # Let helpers (eg. paginators) tell which endpoint a method hits.
+        inner.__name__ = method_name
+        inner.method = method  # type: ignore[attr-defined]
+        inner.endpoint = self.path + endpoint  # type: ignore[attr-defined]
+        inner.manager = self  # type: ignore[attr-defined]
+        if method == ALL:
+            inner.split_runs = split_runs  # type: ignore[attr-defined]
         setattr(self, method_name, inner)
 
+    def send(
+        self,
+        method: Method,
+        url: str,
+        timeout: int | None = None,
+        schema: Any = None,
+        priority: str | None = None,
+        endpoint: str | None = None,
+        **request_kwargs: Any,
+    ) -> Any:
+        """Make a request, serving reads from the cache or coalescing identical concurrent reads
+        if so configured.
+
+        `schema` is passed to the manager's codec to decode the response body into, and
+        `priority` to the manager's scheduler as the lane to queue the request in. Calls go through
+        the manager's circuit breaker keyed on company file and `endpoint` (or `url`).
+        """
+        request_method = GET if method == ALL else method
+
+        cache_key = None
+        if request_method == GET and self.cache is not None:
+            cache_key = self.cache.key(self.company_id, url, request_kwargs["params"])
+            content = self.cache.get(cache_key)
+            if content is not None:
+                return self.decode_content(content, schema)
+
+        def call() -> Any:
+            def send() -> Any:
+                return self._send(
+                    method,
+                    url,
+                    timeout=timeout,
+                    schema=schema,
+                    priority=priority,
+                    cache_key=cache_key,
+                    **request_kwargs,
+                )
+
+            if self.breaker is None:
+                return send()
+            return self.breaker.call((self.company_id, endpoint or url), send)
+
+        if request_method == GET and self.single_flight is not None:
+            key = (
+                url,
+                tuple(sorted(request_kwargs["params"].items())),
+                tuple(sorted(request_kwargs["headers"].items())),
+                schema,
+            )
+            return self.single_flight.do(key, call)
+        result = call()
+        if request_method != GET:
+            for listener in self.write_listeners:
+                listener(method, url)
+        return result
+
+    def _split(self, kwargs: dict[str, Any]) -> tuple[str, list[list]] | None:
+        """Pick the longest OR list in `kwargs` and split it into runs short enough for a URL,
+        returning its key and the runs, or None if there's no need (or nothing to split)."""
+        if len(self.build_request_kwargs(GET, **kwargs)["params"].get("$filter", "")) <= (
+            MAX_FILTER_LENGTH
+        ):
+            return None
+        lists = {
+            k: v
+            for k, v in kwargs.items()
+            if k not in RESERVED_KWARGS
+            and isinstance(v, list | tuple)
+            and len(v) > 1
+            # Runs are merged as a union, which only works for lists of alternatives.
+            and not k.endswith("__ne")
+        }
+        if not lists:
+            return None
+        key = max(lists, key=lambda k: sum(len(build_value(v)) for v in lists[k]))
+        rest = {k: v for k, v in kwargs.items() if k not in (key, "page", "offset", "limit")}
+        others = self.build_request_kwargs(GET, **rest)["params"].get("$filter", "")
+        return key, chunk_values(key, list(lists[key]), MAX_FILTER_LENGTH - len(others) - 10)
+
+    def send_split(self, url: str, kwargs: dict[str, Any], **send_kwargs: Any) -> dict:
+        """List everything matching a filter too long for one URL, in several requests.
+
+        The longest OR list in `kwargs` is split into runs that fit, and a request made for each
+        run (through all its pages) in parallel. The results are merged, dropping duplicates by
+        UID, and paged back according to `page`/`offset` and `limit`, so the caller sees one
+        logical result set. Ordering only holds within each run. As every call fetches all the
+        runs, walk such queries with the helpers in `myob.pagination`, which page through each
+        run in turn instead.
+        """
+        split = self._split(kwargs)
+        if split is None:
+            # Nothing to split, so let MYOB decide whether it can cope.
+            request_kwargs = self.build_request_kwargs(GET, **kwargs)
+            return self.send(ALL, url, **send_kwargs, **request_kwargs)
+        key, runs = split
+        rest = {k: v for k, v in kwargs.items() if k not in (key, "page", "offset", "limit")}
+
+        def fetch(run: list) -> list[dict]:
+            items: list[dict] = []
+            while True:
+                request_kwargs = self.build_request_kwargs(
+                    GET, **rest, **{key: run}, offset=len(items), limit=MAX_PAGE_SIZE
+                )
+                page = self.send(ALL, url, **send_kwargs, **request_kwargs)
+                items.extend(page["Items"])
+                if not page.get("NextPageLink") or len(page["Items"]) < MAX_PAGE_SIZE:
+                    return items
+
+        with ThreadPoolExecutor(max_workers=min(len(runs), 4)) as executor:
+            pages = list(executor.map(fetch, runs))
+        merged: list[dict] = []
+        seen = set()
+        for item in (item for page in pages for item in page):
+            uid = item.get("UID")
+            if uid is not None:
+                if uid in seen:
+                    continue
+                seen.add(uid)
+            merged.append(item)
+
+        limit = int(kwargs.get("limit", DEFAULT_PAGE_SIZE))
+        if "offset" in kwargs:
+            offset = int(kwargs["offset"])
+        else:
+            offset = (int(kwargs.get("page", 1)) - 1) * limit
+        next_page_link = None
+        if offset + limit < len(merged):
+            params = self.build_request_kwargs(GET, **kwargs)["params"]
+            params.update({"$top": limit, "$skip": offset + limit})
+            next_page_link = requests.Request(GET, url, params=params).prepare().url
+        return {
+            "Items": merged[offset : offset + limit],
+            "NextPageLink": next_page_link,
+            "Count": len(merged),
+        }
+
+    def _send(
+        self,
+        method: Method,
+        url: str,
+        timeout: int | None = None,
+        schema: Any = None,
+        priority: str | None = None,
+        cache_key: str | None = None,
+        **request_kwargs: Any,
+    ) -> Any:
+        request_method = GET if method == ALL else method
+        # Reuse pooled connections where we've been given a session.
+        request = self.session.request if self.session is not None else requests.request
+        if self.scheduler is not None:
+            with self.scheduler.slot(self.company_id, priority):
+                response = request(request_method, url, timeout=timeout, **request_kwargs)
+        else:
+            response = request(request_method, url, timeout=timeout, **request_kwargs)
+
+        if response.status_code == 200:
+            # We don't want to be deserialising binary responses..
+            if not response.headers.get("content-type", "").startswith("application/json"):
+                return response.content
+
+            try:
+                result = self.decode(response, schema)
+            except ValueError:
+                # Handle possible empty string response to DELETE request
+                if method == "DELETE" and response.content == b"":
+                    return {}
+                raise
+            if cache_key is not None:
+                self.cache.put(cache_key, url, response.content)  # type: ignore[union-attr]
+            return result
+        elif response.status_code == 201:
+            return self.decode(response, schema)
+        elif response.status_code == 400:
+            raise MyobBadRequest(response)
+        elif response.status_code == 401:
+            raise MyobUnauthorized(response)
+        elif response.status_code == 403:
+            if response.json()["Errors"][0]["Name"] == "RateLimitError":
+                raise MyobRateLimitExceeded(response)
+            raise MyobForbidden(response)
+        elif response.status_code == 404:
+            raise MyobNotFound(response)
+        elif response.status_code == 409:
+            raise MyobConflict(response)
+        elif response.status_code == 500:
+            raise MyobInternalServerError(response)
+        elif response.status_code == 504:
+            raise MyobGatewayTimeout(response)
+        else:
+            raise MyobExceptionUnknown(response)
+
+    def decode(self, response: requests.Response, schema: Any = None) -> Any:
+        """Decode a JSON response body, using the manager's codec if it has one."""
+        if self.codec is None:
+            if schema is not None:
+                raise ValueError("Decoding into a schema requires a codec that supports it.")
+            return response.json()
+        return self.codec.decode(response.content, schema)
+
+    def decode_content(self, content: bytes, schema: Any = None) -> Any:
+        """Decode a JSON body, using the manager's codec if it has one."""
+        if self.codec is None:
+            if schema is not None:
+                raise ValueError("Decoding into a schema requires a codec that supports it.")
+            return json.loads(content)
+        return self.codec.decode(content, schema)
+
+    def _invalidate_cache(self, method: Method, url: str) -> None:
+        # A write may show up in any of this manager's listings, not just the entity's own URL.
+        self.cache.invalidate(self.base_url)  # type: ignore[union-attr]
+
     def build_request_kwargs(self, method: Method, data: dict | None = None, **kwargs: Any) -> dict:
         request_kwargs = {}
 
@@ -176,35 +534,12 @@ class Manager:
         request_kwargs["params"] = {}
         filters = []
 
-        def build_value(value: Any) -> str:
-            if issubclass(type(value), date):
-                return f"datetime'{value}'"
-            if isinstance(value, bool):
-                return str(value).lower()
-            return f"'{value}'"
-
         if "raw_filter" in kwargs:
             filters.append(kwargs["raw_filter"])
 
         for k, v in kwargs.items():
-            if k not in [
-                "orderby",
-                "format",
-                "headers",
-                "page",
-                "limit",
-                "templatename",
-                "timeout",
-                "raw_filter",
-            ]:
-                operator = "eq"
-                for op in ["lt", "gt"]:
-                    if k.endswith(f"__{op}"):
-                        k = k[:-4]
-                        operator = op
-                if not isinstance(v, list | tuple):
-                    v = [v]
-                filters.append(" or ".join(f"{k} {operator} {build_value(v_)}" for v_ in v))
+            if k not in RESERVED_KWARGS:
+                filters.append(build_filter(k, v))
 
         if filters:
             request_kwargs["params"]["$filter"] = " and ".join(f"({f})" for f in filters)
@@ -217,7 +552,9 @@ class Manager:
             page_size = int(kwargs["limit"])
             request_kwargs["params"]["$top"] = page_size  # type: ignore[assignment]
 
-        if "page" in kwargs:
+        if "offset" in kwargs:
+            request_kwargs["params"]["$skip"] = int(kwargs["offset"])  # type: ignore[assignment]
+        elif "page" in kwargs:
             request_kwargs["params"]["$skip"] = (int(kwargs["page"]) - 1) * page_size  # type: ignore[assignment]
 
         if "format" in kwargs:
@@ -231,10 +568,80 @@ class Manager:
 
         # Build body.
         if data is not None:
-            request_kwargs["json"] = data
+            if self.codec is not None:
+                request_kwargs["data"] = self.codec.encode(data)
+                request_kwargs["headers"]["Content-Type"] = self.codec.content_type
+            else:
+                request_kwargs["json"] = data
 
         return request_kwargs
 
+    def update(
+        self,
+        name: str,
+        uid: str,
+        changes: dict,
+        merge: Callable[[dict, dict], dict] | None = None,
+        entity: dict | None = None,
+        retries: int = 3,
+        **kwargs: Any,
+    ) -> Any:
+        """Apply `changes` to an entity, retrying if someone else updated it first.
+
+        `name` picks the GET/PUT pair, eg. `customer` for `get_customer`/`put_customer` (or `""`
+        for plain `get`/`put`). The changes are merged onto `entity` (or a freshly fetched copy)
+        with `merge` (by default, `merge_changes`) and PUT. If MYOB rejects that with a 409
+        because the RowVersion is stale, the entity is refetched, the changes re-applied, and
+        the PUT retried, up to `retries` times. Updates to the same entity through this manager
+        are run one at a time, so they don't conflict with each other.
+        """
+        get = getattr(self, f"get_{name}" if name else "get", None)
+        put = getattr(self, f"put_{name}" if name else "put", None)
+        if get is None or put is None:
+            raise AttributeError(
+                f"{self.name}{self.__class__.__name__} can't GET and PUT {name!r}."
+            )
+        merge = merge or merge_changes
+
+        with self._update_lock(uid):
+            current = entity if entity is not None else get(uid=uid, **kwargs)
+            for attempt in range(retries + 1):
+                try:
+                    return put(uid=uid, data=merge(current, changes), **kwargs)
+                except MyobConflict:
+                    if attempt == retries:
+                        raise
+                    current = get(uid=uid, **kwargs)
+
+    def get_many(
+        self, name: str, uids: Iterable[str], workers: int = 4, **kwargs: Any
+    ) -> GetManyResult:
+        """Fetch the entities with the given UIDs, eg. `get_many("customer", uids)`.
+
+        `name` picks the ALL method to filter (or `""` for plain `all`). The UIDs are batched into
+        OR filters short enough for a URL, and the batches fetched concurrently. Returns the
+        entities found, keyed by UID, and the UIDs that weren't.
+        """
+        func = getattr(self, name or "all", None)
+        if func is None or func.method != ALL:
+            raise AttributeError(f"{self.name}{self.__class__.__name__} can't list {name!r}.")
+        uids = list(dict.fromkeys(uids))
+
+        def fetch(batch: list) -> list[dict]:
+            return func(UID=batch, limit=len(batch), **kwargs)["Items"]
+
+        found = fetch_in_batches(fetch, uids, workers=workers)
+        # MYOB's UIDs are lower case, but may not have been asked for that way.
+        seen = {uid.lower() for uid in found}
+        return {"found": found, "missing": [uid for uid in uids if uid.lower() not in seen]}
+
+    def _update_lock(self, uid: str) -> threading.Lock:
+        with self._update_locks_lock:
+            lock = self._update_locks.get(uid)
+            if lock is None:
+                lock = self._update_locks[uid] = threading.Lock()
+            return lock
+
     def __repr__(self) -> str:
         def _get_signature(name: str, kwargs: list[str]) -> str:
             return f"{name}({', '.join(kwargs)})"
@@ -248,3 +655,23 @@ class Manager:
             for k, v in sorted(self.method_details.items())
         )
         return f"{self.name}{self.__class__.__name__}:\n    {options}"
+
+
+def _rebuild_manager(
+    path: str,
+    credentials: PartnerCredentials,
+    company_id: str | None,
+    endpoints: list | None,
+    raw_endpoints: list,
+    options: dict[str, Any],
+) -> Manager:
+    if endpoints is None:
+        endpoints = ENDPOINTS[path]["methods"]  # type: ignore[assignment]
+    return Manager(
+        path,
+        credentials,
+        company_id=company_id,
+        endpoints=endpoints,  # type: ignore[arg-type]
+        raw_endpoints=raw_endpoints,
+        **options,
+    )
@@ -0,0 +1,340 @@
+import json
+import logging
+import requests
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any
+
+from .codecs import Codec
+from .endpoints import DELETE, ENDPOINTS, POST, PUT
+from .exceptions import (
+    MyobCircuitOpen,
+    MyobGatewayTimeout,
+    MyobInternalServerError,
+    MyobOutboxFailed,
+    MyobRateLimitExceeded,
+)
+
+if TYPE_CHECKING:
+    from .api import CompanyFile, Myob
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+DONE = "done"
+FAILED = "failed"
+
+# Errors worth trying again later; anything else fails the write outright.
+RETRYABLE = (
+    MyobRateLimitExceeded,
+    MyobInternalServerError,
+    MyobGatewayTimeout,
+    MyobCircuitOpen,
+    requests.Timeout,
+    requests.ConnectionError,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    company_id TEXT NOT NULL,
+    path TEXT NOT NULL,
+    method_name TEXT NOT NULL,
+    ordering_key TEXT NOT NULL,
+    kwargs TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_ordering ON outbox (ordering_key, status);
+CREATE INDEX IF NOT EXISTS outbox_status ON outbox (status, next_attempt_at);
+"""
+
+
+def encode(obj: Any, codec: Codec | None) -> str:
+    """Serialise kwargs or a result for storage, with the manager's codec if it has one (so eg.
+    Decimals survive the trip)."""
+    if codec is not None:
+        return codec.encode(obj).decode("utf-8")
+    return json.dumps(obj)
+
+
+def decode(content: str, codec: Codec | None) -> Any:
+    if codec is not None:
+        return codec.decode(content.encode("utf-8"))
+    return json.loads(content)
+
+
+class OutboxHandle:
+    """A write queued in an `Outbox`, to poll or wait on."""
+
+    def __init__(self, outbox: "Outbox", id: int, codec: Codec | None = None) -> None:
+        self.outbox = outbox
+        self.id = id
+        self.codec = codec
+
+    def status(self) -> str:
+        return self.outbox._row(self.id)["status"]
+
+    def done(self) -> bool:
+        return self.status() in (DONE, FAILED)
+
+    def result(self, timeout: float | None = None) -> Any:
+        """Wait for the write to be sent, returning MYOB's response or raising if it failed."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            row = self.outbox._row(self.id)
+            if row["status"] == DONE:
+                return decode(row["result"], self.codec)
+            if row["status"] == FAILED:
+                raise MyobOutboxFailed(self.id, row["error"])
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise TimeoutError(f"Outbox write {self.id} still {row['status']}.")
+            # Writes flushed by another process won't notify us, so poll as well.
+            self.outbox._wait(0.5 if remaining is None else min(remaining, 0.5))
+
+    def __repr__(self) -> str:
+        return f"OutboxHandle({self.id})"
+
+
+class Outbox:
+    """A durable, SQLite-backed queue of writes (POST/PUT/DELETE) to send to MYOB later.
+
+    Writes are made through managers as usual, but with `defer=True` (given a `Myob` built
+    with this outbox), and an `OutboxHandle` is returned in place of MYOB's response. An
+    `OutboxFlusher` sends them. Writes to the same entity UID are sent in the order queued.
+
+    Writes are sent at least once: any still in flight when a process dies are resent, once
+    `recover` is called (or the outbox is opened with `recover=True`, or a flusher started). Only
+    do that when no other process is flushing the outbox, as their writes in flight would be
+    sent again.
+    """
+
+    def __init__(self, path: str, recover: bool = False) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._changed = threading.Condition()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(SCHEMA)
+        if recover:
+            self.recover()
+
+    def __reduce__(self) -> tuple:
+        # The database is safe to share between processes; the connection isn't. Nothing is
+        # recovered, as the writes in flight are the pickling process's.
+        return (Outbox, (self.path,))
+
+    def recover(self) -> int:
+        """Requeue writes left in flight by a process that died before recording their results,
+        returning how many there were."""
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE outbox SET status = ? WHERE status = ?", (PENDING, IN_FLIGHT)
+            )
+        return cursor.rowcount
+
+    def enqueue(self, func: Callable[..., Any], **kwargs: Any) -> OutboxHandle:
+        """Queue a call to a manager's write method, eg. `comp.contacts.put_customer`."""
+        manager = getattr(func, "manager", None)
+        if manager is None or func.method not in (POST, PUT, DELETE):  # type: ignore[attr-defined]
+            raise ValueError("Only POST, PUT and DELETE manager methods can be queued.")
+        if manager.company_id is None:
+            raise ValueError("Only company file writes can be queued.")
+        content = encode(kwargs, manager.codec)
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO outbox (company_id, path, method_name, ordering_key, kwargs, status, "
+                "next_attempt_at) VALUES (?, ?, ?, '', ?, ?, 0)",
+                (manager.company_id, manager.path, func.__name__, content, PENDING),
+            )
+            id = cursor.lastrowid
+            # Order writes per entity; creates have no UID yet so stand alone.
+            ordering_key = f"{manager.company_id}:{kwargs['uid']}" if "uid" in kwargs else f"#{id}"
+            self._db.execute("UPDATE outbox SET ordering_key = ? WHERE id = ?", (ordering_key, id))
+        return OutboxHandle(self, id, manager.codec)  # type: ignore[arg-type]
+
+    def _row(self, id: int) -> sqlite3.Row:
+        with self._lock:
+            return self._db.execute("SELECT * FROM outbox WHERE id = ?", (id,)).fetchone()
+
+    def _wait(self, timeout: float) -> None:
+        with self._changed:
+            self._changed.wait(timeout)
+
+    def _notify(self) -> None:
+        with self._changed:
+            self._changed.notify_all()
+
+    def claim(self, limit: int) -> list[sqlite3.Row]:
+        """Mark up to `limit` writes that are due, and not behind another for the same entity,
+        as in flight, and return them."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._db.execute(
+                    "SELECT * FROM outbox AS o WHERE status = ? AND next_attempt_at <= ? AND id = ("
+                    "  SELECT MIN(id) FROM outbox WHERE ordering_key = o.ordering_key"
+                    "  AND status IN (?, ?)"
+                    ") ORDER BY id LIMIT ?",
+                    (PENDING, time.time(), PENDING, IN_FLIGHT, limit),
+                ).fetchall()
+                self._db.executemany(
+                    "UPDATE outbox SET status = ? WHERE id = ?",
+                    [(IN_FLIGHT, r["id"]) for r in rows],
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return rows
+
+    def complete(
+        self, id: int, result: Any, codec: Codec | None = None, note: str | None = None
+    ) -> None:
+        """Record a write as sent, with MYOB's response and any `note` (kept as its error)."""
+        content = encode(result, codec)
+        with self._lock:
+            self._db.execute(
+                "UPDATE outbox SET status = ?, result = ?, error = ?, attempts = attempts + 1 "
+                "WHERE id = ?",
+                (DONE, content, note, id),
+            )
+        self._notify()
+
+    def fail(self, id: int, error: str, retry_at: float | None = None) -> None:
+        """Record a failed attempt, scheduling it for another go at `retry_at` if given."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE outbox SET status = ?, error = ?, next_attempt_at = ?, "
+                "attempts = attempts + 1 WHERE id = ?",
+                (PENDING if retry_at is not None else FAILED, error, retry_at or 0, id),
+            )
+        self._notify()
+
+    def pending(self) -> int:
+        """The number of writes not yet sent (or given up on)."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM outbox WHERE status IN (?, ?)", (PENDING, IN_FLIGHT)
+            ).fetchone()[0]
+
+    def next_due(self) -> float | None:
+        with self._lock:
+            return self._db.execute(
+                "SELECT MIN(next_attempt_at) FROM outbox WHERE status = ?", (PENDING,)
+            ).fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class OutboxFlusher:
+    """Sends the writes queued in an `Outbox` through the given `Myob` client.
+
+    Up to `workers` writes are sent at once (different entities only). Rate limiting, 5xx,
+    timeouts and open circuits are retried with exponential backoff up to `max_attempts` times;
+    any other error fails the write straight away.
+    """
+
+    def __init__(
+        self,
+        outbox: Outbox,
+        myob: "Myob",
+        workers: int = 4,
+        max_attempts: int = 5,
+        backoff: float = 1.0,
+        max_backoff: float = 300.0,
+    ) -> None:
+        self.outbox = outbox
+        self.myob = myob
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._companyfiles: dict[str, CompanyFile] = {}
+        self._manager_names = {path: v["name"] for path, v in ENDPOINTS.items()}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _method(self, row: sqlite3.Row) -> Callable[..., Any]:
+        company_id = row["company_id"]
+        if company_id not in self._companyfiles:
+            self._companyfiles[company_id] = self.myob.companyfiles.get(company_id, call=False)
+        manager = getattr(self._companyfiles[company_id], self._manager_names[row["path"]])  # type: ignore[arg-type]
+        return getattr(manager, row["method_name"])
+
+    def _send(self, row: sqlite3.Row) -> None:
+        try:
+            method = self._method(row)
+            codec = method.manager.codec  # type: ignore[attr-defined]
+            result = method(priority="background", **decode(row["kwargs"], codec))
+        except RETRYABLE as e:
+            attempts = row["attempts"] + 1
+            if attempts >= self.max_attempts:
+                self.outbox.fail(row["id"], repr(e))
+            else:
+                delay = min(self.backoff * 2 ** (attempts - 1), self.max_backoff)
+                if isinstance(e, MyobCircuitOpen):
+                    delay = max(delay, e.retry_after)
+                self.outbox.fail(row["id"], repr(e), retry_at=time.time() + delay)
+        except Exception as e:
+            self.outbox.fail(row["id"], repr(e))
+        else:
+            try:
+                self.outbox.complete(
+                    row["id"], result if isinstance(result, dict | list) else None, codec
+                )
+            except Exception as e:
+                # Sent, but the result can't be stored. It's done all the same (failing it would
+                # have it sent again by whoever retries it), so record it without the result.
+                self.outbox.complete(
+                    row["id"], None, note=f"Sent, but couldn't store the result: {e!r}"
+                )
+
+    def flush(self) -> int:
+        """Send everything that's due, returning the number of attempts made."""
+        attempts = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while True:
+                rows = self.outbox.claim(self.workers * 4)
+                if not rows:
+                    return attempts
+                list(executor.map(self._send, rows))
+                attempts += len(rows)
+
+    def start(self, interval: float = 1.0) -> None:
+        """Keep flushing in a background thread, checking for new writes every `interval`.
+
+        Writes left in flight by an earlier process are recovered first (see `Outbox.recover`).
+        """
+        self._stop.clear()
+        self.outbox.recover()
+
+        def run() -> None:
+            while not self._stop.is_set():
+                try:
+                    self.flush()
+                except Exception:
+                    # Eg. the database locked by another process; the writes will keep.
+                    logger.exception("Couldn't flush the outbox; trying again shortly.")
+                self._stop.wait(interval)
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
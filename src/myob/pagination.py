@@ -0,0 +1,395 @@
+import json
+import math
+import re
+import requests
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+from uuid import UUID
+
+from .concurrency import read_ahead as _read_ahead
+from .constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from .exceptions import MyobGatewayTimeout
+from .filters import build_value
+from .prefetch import uid_value
+
+# Naive ISO dates and datetimes, as MYOB sends them (eg. "2024-07-01T00:00:00").
+DATETIME = re.compile(r"\d{4}-\d{2}-\d{2}(T\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?\Z")
+
+
+def split_runs(func: Callable[..., Any], kwargs: dict[str, Any]) -> list[dict[str, Any]]:
+    """The kwargs for an ALL method split into runs whose filters fit in a URL, if they don't.
+
+    Walks page through each run in turn rather than have MYOB's pages merged from every run on
+    each call (see `Manager.send_split`).
+    """
+    split = getattr(func, "split_runs", None)
+    return [kwargs] if split is None else split(**kwargs)
+
+
+def _distinct(walks: Iterable[Iterator[dict]]) -> Iterator[dict]:
+    """Chain walks over several runs, dropping items (by UID) already seen in an earlier one."""
+    seen = set()
+    for walk in walks:
+        for response in walk:
+            items = []
+            for item in response.get("Items", []):
+                uid = item.get("UID")
+                if uid is not None:
+                    if uid in seen:
+                        continue
+                    seen.add(uid)
+                items.append(item)
+            yield {**response, "Items": items}
+
+
+def iter_pages(
+    func: Callable[..., Any], limit: int = DEFAULT_PAGE_SIZE, **kwargs: Any
+) -> Iterator[dict]:
+    """Walk every page of an ALL method (eg. `comp.contacts.customer`), yielding raw pages.
+
+    A filter too long for one URL is split into runs, which are walked one after the other.
+    """
+    if "page" not in kwargs:
+        runs = split_runs(func, kwargs)
+        if len(runs) > 1:
+            yield from _distinct(iter_pages(func, limit=limit, page=1, **run) for run in runs)
+            return
+    page = int(kwargs.pop("page", 1))
+    while True:
+        response = func(page=page, limit=limit, **kwargs)
+        yield response
+        if not response.get("NextPageLink") or len(response.get("Items", [])) < limit:
+            return
+        page += 1
+
+
+def iter_items(
+    func: Callable[..., Any], limit: int = DEFAULT_PAGE_SIZE, read_ahead: int = 0, **kwargs: Any
+) -> Iterator[dict]:
+    """Walk every page of an ALL method, yielding the individual items.
+
+    With `read_ahead`, up to that many pages are fetched in the background while the caller
+    works through the current one.
+    """
+    for response in _read_ahead(iter_pages(func, limit=limit, **kwargs), read_ahead):
+        yield from response.get("Items", [])
+
+
+def iter_pages_parallel(
+    func: Callable[..., Any],
+    limit: int = DEFAULT_PAGE_SIZE,
+    workers: int = 4,
+    **kwargs: Any,
+) -> Iterator[dict]:
+    """Walk every page of an ALL method, fetching up to `workers` pages at a time.
+
+    Pages are still yielded in order, and no more than `workers` are held at once. Once MYOB
+    has told us the total `Count`, we stop asking for pages past the end. A filter too long for
+    one URL is split into runs, which are walked one after the other.
+    """
+    if "page" not in kwargs:
+        runs = split_runs(func, kwargs)
+        if len(runs) > 1:
+            yield from _distinct(
+                iter_pages_parallel(func, limit=limit, workers=workers, page=1, **run)
+                for run in runs
+            )
+            return
+    page = int(kwargs.pop("page", 1))
+    last_page: int | None = None
+    pending: deque[Future] = deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            while len(pending) < workers and (last_page is None or page <= last_page):
+                pending.append(executor.submit(func, page=page, limit=limit, **kwargs))
+                page += 1
+            if not pending:
+                return
+            response = pending.popleft().result()
+            yield response
+            if last_page is None and response.get("Count") is not None:
+                # Count is the total number of matching items, not just those on this page.
+                last_page = math.ceil(response["Count"] / limit)
+            if not response.get("NextPageLink") or len(response.get("Items", [])) < limit:
+                for future in pending:
+                    future.cancel()
+                return
+
+
+class PageSizeTuner:
+    """Learns a good page size per endpoint.
+
+    Full pages that come back well under `target_seconds` (and `max_page_bytes`) grow the page
+    size, slow or oversized pages shrink it in proportion, and timeouts halve it. Learned sizes
+    can be saved from `sizes` and passed back in to start from them next time.
+    """
+
+    def __init__(
+        self,
+        target_seconds: float = 2.0,
+        max_page_bytes: int = 2_000_000,
+        min_size: int = 25,
+        max_size: int = MAX_PAGE_SIZE,
+        initial_size: int = DEFAULT_PAGE_SIZE,
+        sizes: dict[str, int] | None = None,
+    ) -> None:
+        self.target_seconds = target_seconds
+        self.max_page_bytes = max_page_bytes
+        self.min_size = min_size
+        self.max_size = max_size
+        self.initial_size = initial_size
+        self.sizes = dict(sizes or {})
+        self._lock = threading.Lock()
+
+    def size(self, key: str) -> int:
+        return self.sizes.get(key, self.initial_size)
+
+    def _set(self, key: str, size: float) -> None:
+        self.sizes[key] = max(self.min_size, min(self.max_size, int(size)))
+
+    def record(self, key: str, size: int, items: int, seconds: float, nbytes: int) -> None:
+        """Adjust the page size for an endpoint after fetching a page of it."""
+        with self._lock:
+            if seconds > self.target_seconds or nbytes > self.max_page_bytes:
+                factor = min(self.target_seconds / seconds, self.max_page_bytes / max(nbytes, 1))
+                self._set(key, size * max(factor, 0.5))
+            elif (
+                # Only full pages tell us whether a bigger page would be worth it.
+                items >= size
+                and seconds < self.target_seconds / 2
+                and nbytes < self.max_page_bytes / 2
+            ):
+                self._set(key, size * 1.5)
+
+    def record_error(self, key: str, size: int) -> None:
+        """Back off after a page timed out."""
+        with self._lock:
+            self._set(key, size / 2)
+
+
+# Used by adaptive walks not given a tuner, so what one walk learns carries over to the next.
+DEFAULT_TUNER = PageSizeTuner()
+
+
+def _estimate_bytes(items: list) -> int:
+    # Serialising every item just to measure it would cost as much as decoding did, so sample one.
+    if not items:
+        return 0
+    return len(json.dumps(items[0], default=str)) * len(items)
+
+
+def iter_adaptive_pages(
+    func: Callable[..., Any],
+    tuner: PageSizeTuner | None = None,
+    key: str | None = None,
+    retries: int = 3,
+    **kwargs: Any,
+) -> Iterator[dict]:
+    """Walk every page of an ALL method, adapting the page size as we go, yielding raw pages.
+
+    The page size for the endpoint (or `key`) is taken from, and reported back to, `tuner`
+    (by default one shared across the process), so later walks start from what earlier ones
+    learned. A page that times out
+    (`MyobGatewayTimeout` or a client-side timeout) is retried up to `retries` times at a smaller
+    size. A filter too long for one URL is split into runs, which are walked one after the other.
+    """
+    if "page" in kwargs or "limit" in kwargs:
+        raise ValueError(
+            "Adaptive pagination picks its own page size and doesn't accept `page` or `limit`."
+        )
+    if "offset" not in kwargs:
+        runs = split_runs(func, kwargs)
+        if len(runs) > 1:
+            yield from _distinct(
+                iter_adaptive_pages(func, tuner=tuner, key=key, retries=retries, offset=0, **run)
+                for run in runs
+            )
+            return
+    if tuner is None:
+        tuner = DEFAULT_TUNER
+    key = key or getattr(func, "endpoint", None) or repr(func)
+    offset = int(kwargs.pop("offset", 0))
+    attempts = 0
+    while True:
+        size = tuner.size(key)
+        start = time.monotonic()
+        try:
+            response = func(offset=offset, limit=size, **kwargs)
+        except (MyobGatewayTimeout, requests.Timeout):
+            tuner.record_error(key, size)
+            attempts += 1
+            if attempts > retries:
+                raise
+            continue
+        attempts = 0
+        items = response.get("Items", [])
+        tuner.record(key, size, len(items), time.monotonic() - start, _estimate_bytes(items))
+        yield response
+        if not response.get("NextPageLink") or len(items) < size:
+            return
+        offset += len(items)
+
+
+def iter_adaptive_items(
+    func: Callable[..., Any],
+    tuner: PageSizeTuner | None = None,
+    read_ahead: int = 0,
+    **kwargs: Any,
+) -> Iterator[dict]:
+    """Walk every page of an ALL method with adaptive page sizes, yielding the individual items.
+
+    With `read_ahead`, up to that many pages are fetched in the background while the caller
+    works through the current one.
+    """
+    for response in _read_ahead(iter_adaptive_pages(func, tuner=tuner, **kwargs), read_ahead):
+        yield from response.get("Items", [])
+
+
+def key_literal(value: Any) -> str:
+    """Render a key read back from a page as an OData literal of the field's own type.
+
+    MYOB sends GUIDs and datetimes as strings, which compare differently from the fields
+    themselves if filtered on as strings. Numbers are compared as numbers.
+    """
+    if isinstance(value, str):
+        if DATETIME.match(value):
+            # Written as sent, as MYOB's fractional seconds may be too precise for `datetime`.
+            return f"datetime'{value}'"
+        if isinstance(uid_value(value), UUID):
+            return build_value(uid_value(value))
+    return build_value(value, numeric=True)
+
+
+def iter_keyset_pages(
+    func: Callable[..., Any],
+    key: str,
+    limit: int = DEFAULT_PAGE_SIZE,
+    tiebreak: str | None = None,
+    after: Any = None,
+    **kwargs: Any,
+) -> Iterator[dict]:
+    """Walk every page of an ALL method by key rather than by offset, yielding raw pages.
+
+    Results are ordered by `key`, and each following page is requested with a `{key} gt` filter
+    on the last key seen, so MYOB never has to scan past a deep `$skip`, and rows changing
+    mid-walk can't shift page boundaries. `key` should be unique (eg. `UID`, `RowVersion`); for
+    non-unique keys such as `LastModified`, pass a unique `tiebreak` field (eg. `UID`) to break
+    ties between rows sharing a key.
+
+    `after` (or a `{key}__gt` kwarg) resumes the walk past the given key, or `(key, tiebreak)`
+    pair. Keys are filtered on as the field's own type (see `key_literal`).
+    """
+    if "page" in kwargs or "orderby" in kwargs:
+        raise ValueError(
+            "Keyset pagination sets its own ordering and doesn't accept `page` or `orderby`."
+        )
+    if after is None:
+        after = kwargs.pop(f"{key}__gt", None)
+    raw_filter = kwargs.pop("raw_filter", None)
+    orderby = key if tiebreak is None else f"{key},{tiebreak}"
+
+    last = after
+    while True:
+        page_kwargs = dict(kwargs)
+        filters = [raw_filter] if raw_filter else []
+        if last is not None:
+            if tiebreak is None or not isinstance(last, list | tuple):
+                # Without a tiebreak value, start strictly past the key.
+                filters.append(f"{key} gt {key_literal(last)}")
+            else:
+                value, tiebreak_value = (key_literal(v) for v in last)
+                filters.append(
+                    f"{key} gt {value} or ({key} eq {value} and {tiebreak} gt {tiebreak_value})"
+                )
+        if filters:
+            page_kwargs["raw_filter"] = " and ".join(f"({f})" for f in filters)
+
+        response = func(orderby=orderby, limit=limit, **page_kwargs)
+        yield response
+        items = response.get("Items", [])
+        if len(items) < limit:
+            return
+        last = items[-1][key] if tiebreak is None else (items[-1][key], items[-1][tiebreak])
+
+
+def iter_keyset_items(
+    func: Callable[..., Any],
+    key: str,
+    limit: int = DEFAULT_PAGE_SIZE,
+    read_ahead: int = 0,
+    **kwargs: Any,
+) -> Iterator[dict]:
+    """Walk every page of an ALL method by key, yielding the individual items.
+
+    With `read_ahead`, up to that many pages are fetched in the background while the caller
+    works through the current one.
+    """
+    pages = iter_keyset_pages(func, key=key, limit=limit, **kwargs)
+    for response in _read_ahead(pages, read_ahead):
+        yield from response.get("Items", [])
+
+
+def _date_bounds(start: Any, end: Any, partitions: int) -> list[Any]:
+    step = (end - start) / partitions
+    bounds = [start] + [start + step * i for i in range(1, partitions)] + [end]
+    # Dates can't be split finer than a day, so neighbouring bounds may coincide.
+    return [b for i, b in enumerate(bounds) if i == 0 or b > bounds[i - 1]]
+
+
+def iter_date_range_items(
+    func: Callable[..., Any],
+    field: str,
+    start: Any,
+    end: Any,
+    partitions: int = 8,
+    workers: int = 4,
+    max_rows: int | None = 5000,
+    limit: int = MAX_PAGE_SIZE,
+    **kwargs: Any,
+) -> Iterator[dict]:
+    """Walk everything in an ALL method with `field` (a date) in `[start, end)`, yielding items.
+
+    The range is split into `partitions` equal spans, filtered with `{field}__ge`/`{field}__lt`,
+    which are paged through separately, up to `workers` at a time. Spans matching more than
+    `max_rows` items are halved (until they can't be) before being paged through, so dense
+    periods don't end up with deep `$skip`s. Items are yielded in order of `field` (then `UID`).
+    Items without a `field` are never matched.
+    """
+    if "page" in kwargs or "offset" in kwargs or "orderby" in kwargs:
+        raise ValueError(
+            "Date range pagination sets its own ordering and doesn't accept `page`, `offset` "
+            "or `orderby`."
+        )
+
+    def fetch(lo: Any, hi: Any) -> tuple[list[tuple[Any, Any]], list[dict]]:
+        # Returns either the halves to fetch instead, or the span's items.
+        items: list[dict] = []
+        filters = {f"{field}__ge": lo, f"{field}__lt": hi}
+        while True:
+            response = func(
+                orderby=f"{field},UID", offset=len(items), limit=limit, **filters, **kwargs
+            )
+            if not items and max_rows is not None and response.get("Count", 0) > max_rows:
+                mid = lo + (hi - lo) / 2
+                if lo < mid < hi:
+                    return [(lo, mid), (mid, hi)], []
+            items.extend(response.get("Items", []))
+            if not response.get("NextPageLink") or len(response.get("Items", [])) < limit:
+                return [], items
+
+    bounds = _date_bounds(start, end, partitions)
+    spans = deque(zip(bounds, bounds[1:], strict=False))
+    pending: deque[Future] = deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while spans or pending:
+            while spans and len(pending) < workers:
+                pending.append(executor.submit(fetch, *spans.popleft()))
+            halves, items = pending.popleft().result()
+            # Halves take the place of their span, ahead of everything later.
+            for lo, hi in reversed(halves):
+                pending.appendleft(executor.submit(fetch, lo, hi))
+            yield from items
@@ -0,0 +1,136 @@
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+from .api import CompanyFile, Myob
+from .concurrency import ThreadLocalSession
+from .credentials import PartnerCredentials
+
+
+class PooledClient:
+    """A tenant's client, along with its connection pool and the company files opened on it."""
+
+    def __init__(self, myob: Myob, session: ThreadLocalSession) -> None:
+        self.myob = myob
+        self.session = session
+        self.companyfiles: dict[str, CompanyFile] = {}
+
+    @property
+    def credentials(self) -> PartnerCredentials:
+        return self.myob.credentials
+
+    def companyfile(self, company_id: str) -> CompanyFile:
+        if company_id not in self.companyfiles:
+            self.companyfiles[company_id] = self.myob.companyfiles.get(company_id, call=False)
+        return self.companyfiles[company_id]
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class ClientPool:
+    """Keep `Myob` clients for many tenants alive between jobs.
+
+    Clients are built from the credentials state returned by `load_state(tenant)`, and are kept
+    along with their managers, pooled connections and caches until evicted. The least recently
+    used tenants are evicted once there are more than `max_clients`, or, if `max_weight` is given,
+    once the summed `weigh(client)` of all clients exceeds it (eg. an estimate of memory use).
+
+    `on_state_change(tenant, state)` is called whenever a tenant's credentials state changes
+    (eg. on token refresh), so the new state can be persisted. Expired tokens are refreshed on
+    checkout.
+    """
+
+    def __init__(
+        self,
+        load_state: Callable[[Hashable], dict[str, Any]],
+        on_state_change: Callable[[Hashable, dict[str, Any]], None] | None = None,
+        max_clients: int = 100,
+        max_weight: int | None = None,
+        weigh: Callable[[PooledClient], int] | None = None,
+        **myob_kwargs: Any,
+    ) -> None:
+        if max_weight is not None and weigh is None:
+            raise ValueError("A `weigh` function is required to enforce `max_weight`.")
+        self.load_state = load_state
+        self.on_state_change = on_state_change
+        self.max_clients = max_clients
+        self.max_weight = max_weight
+        self.weigh = weigh
+        self.myob_kwargs = myob_kwargs
+        self._lock = threading.Lock()
+        self._clients: OrderedDict[Hashable, PooledClient] = OrderedDict()
+
+    def _build(self, tenant: Hashable) -> PooledClient:
+        credentials = PartnerCredentials.from_state(self.load_state(tenant))
+        if self.on_state_change is not None:
+            on_state_change = self.on_state_change
+            credentials.state_listeners.append(lambda cred: on_state_change(tenant, cred.state))
+        session = ThreadLocalSession()
+        return PooledClient(Myob(credentials, session=session, **self.myob_kwargs), session)
+
+    def checkout(self, tenant: Hashable) -> PooledClient:
+        """Return the pooled client for the given tenant, building it if need be."""
+        with self._lock:
+            client = self._clients.get(tenant)
+            if client is not None:
+                self._clients.move_to_end(tenant)
+
+        if client is None:
+            built = self._build(tenant)
+            with self._lock:
+                # Another thread may have beaten us to it.
+                client = self._clients.setdefault(tenant, built)
+                self._clients.move_to_end(tenant)
+                evicted = self._evict()
+            if client is not built:
+                built.close()
+            for old in evicted:
+                old.close()
+
+        client.credentials.refresh_if_expired()
+        return client
+
+    def get(self, tenant: Hashable) -> Myob:
+        """Return the `Myob` client for the given tenant."""
+        return self.checkout(tenant).myob
+
+    def companyfile(self, tenant: Hashable, company_id: str) -> CompanyFile:
+        """Return the given company file for the given tenant, without calling MYOB."""
+        return self.checkout(tenant).companyfile(company_id)
+
+    def _over_budget(self) -> bool:
+        if len(self._clients) > self.max_clients:
+            return True
+        if self.max_weight is None or self.weigh is None:
+            return False
+        return sum(self.weigh(c) for c in self._clients.values()) > self.max_weight
+
+    def _evict(self) -> list[PooledClient]:
+        # Always keep the most recently used client, even if it alone busts the budget.
+        evicted = []
+        while len(self._clients) > 1 and self._over_budget():
+            _, client = self._clients.popitem(last=False)
+            evicted.append(client)
+        return evicted
+
+    def evict(self, tenant: Hashable) -> None:
+        """Drop the given tenant's client, eg. after their partnership is revoked."""
+        with self._lock:
+            client = self._clients.pop(tenant, None)
+        if client is not None:
+            client.close()
+
+    def clear(self) -> None:
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            client.close()
+
+    def __contains__(self, tenant: Hashable) -> bool:
+        return tenant in self._clients
+
+    def __len__(self) -> int:
+        return len(self._clients)
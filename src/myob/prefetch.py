@@ -0,0 +1,119 @@
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any
+from uuid import UUID
+
+from .constants import MAX_FILTER_LENGTH, MYOB_BASE_URL
+from .endpoints import ALL
+from .filters import chunk_values
+from .utils import local_url
+
+if TYPE_CHECKING:
+    from .managers import Manager
+
+
+def references(items: list[dict], path: str) -> Iterator[dict]:
+    """Yield the references found at a dotted `path` (eg. "Lines.Item") in each item.
+
+    Lists along the way are descended into, and missing or null references skipped.
+    """
+    head, _, rest = path.partition(".")
+    for item in items:
+        value = item.get(head)
+        values = value if isinstance(value, list) else [value]
+        for v in values:
+            if not isinstance(v, dict):
+                continue
+            if rest:
+                yield from references([v], rest)
+            elif v.get("UID"):
+                yield v
+
+
+def uid_value(uid: str) -> UUID | str:
+    """A UID as a value to filter on (rendered `guid'...'` where it is one)."""
+    try:
+        return UUID(uid)
+    except ValueError:
+        return uid
+
+
+def fetch_in_batches(
+    fetch: Callable[[list], list[dict]],
+    uids: list[str],
+    max_length: int = MAX_FILTER_LENGTH,
+    workers: int = 4,
+) -> dict[str, dict]:
+    """Fetch entities by UID, keyed by UID. The UIDs are batched into runs short enough for an OR
+    filter, and `fetch(batch)` called for each batch concurrently."""
+    batches = chunk_values("UID", [uid_value(uid) for uid in uids], max_length)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return {entity["UID"]: entity for page in executor.map(fetch, batches) for entity in page}
+
+
+def fetch_by_uid(
+    manager: "Manager",
+    url: str,
+    uids: list[str],
+    max_length: int = MAX_FILTER_LENGTH,
+    workers: int = 4,
+) -> dict[str, dict]:
+    """Fetch entities from the collection at `url` by UID, in batches of OR filters."""
+
+    def fetch(batch: list) -> list[dict]:
+        request_kwargs = manager.build_request_kwargs(ALL, UID=batch, limit=len(batch))
+        return manager.send(ALL, url, **request_kwargs)["Items"]
+
+    return fetch_in_batches(fetch, uids, max_length, workers)
+
+
+def collection_url(manager: "Manager", ref: dict) -> str | None:
+    """The URL of the collection a reference points into, going by its `URI` (on our host, see
+    `local_url`)."""
+    uri, company_id = ref.get("URI"), manager.company_id
+    if not uri or company_id is None:
+        return None
+    url = local_url(uri, company_id)
+    if url is None:
+        return None
+    end = url.lower().rfind(ref["UID"].lower())
+    if end <= len(MYOB_BASE_URL) + len(company_id):
+        return None
+    return url[:end]
+
+
+def prefetch(
+    manager: "Manager",
+    items: list[dict],
+    paths: list[str],
+    workers: int = 4,
+) -> None:
+    """Resolve the references at each of `paths` in `items`, filling them in place.
+
+    Distinct UIDs are gathered across all the items and fetched in batches, so a page of invoices
+    referencing 200 customers costs a handful of requests rather than 200. The collection to
+    fetch from is taken from each reference's `URI`. References that can't be found are left
+    as they are.
+    """
+    # Group references by the collection they point into.
+    collections: dict[str, dict[str, list[dict]]] = {}
+    for path in paths:
+        for ref in references(items, path):
+            url = collection_url(manager, ref)
+            if url is None:
+                continue
+            collections.setdefault(url, {}).setdefault(ref["UID"], []).append(ref)
+
+    for url, refs in collections.items():
+        entities = fetch_by_uid(manager, url, list(refs), workers=workers)
+        for uid, entity in entities.items():
+            for ref in refs.get(uid, []):
+                ref.update(entity)
+
+
+def prefetch_result(manager: "Manager", result: Any, paths: list[str]) -> Any:
+    """Prefetch references in the result of a GET (an entity) or ALL (a page of them)."""
+    if isinstance(result, dict):
+        items = result["Items"] if isinstance(result.get("Items"), list) else [result]
+        prefetch(manager, items, paths)
+    return result
@@ -0,0 +1,109 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any
+
+from .pagination import iter_items
+from .types import Method
+
+if TYPE_CHECKING:
+    from .api import CompanyFile
+
+# Reference collections under GeneralLedger/, keyed by the name of their ALL method.
+# Tax codes are identified by `Code` where the other collections use `DisplayID`.
+REFERENCE_COLLECTIONS = {
+    "taxcode": ("TaxCode/", "Code"),
+    "account": ("Account/", "DisplayID"),
+    "category": ("Category/", "DisplayID"),
+}
+
+
+class ReferenceData:
+    """A per-company-file cache of tax codes, accounts and categories.
+
+    All collections are loaded in parallel on first use and indexed by UID and DisplayID
+    (or Code, for tax codes). They're reloaded after `ttl` seconds, on `refresh()`, or after
+    any write to the collection made through the `general_ledger` manager of a company file
+    using them. Company files got through the same client share one `ReferenceData` each.
+    """
+
+    def __init__(self, companyfile: "CompanyFile", ttl: float = 300) -> None:
+        self.companyfile = companyfile
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._indexes: dict[str, dict[str, dict]] = {}
+        self._loaded_at: float | None = None
+        # Bumped by each `invalidate`, so a load that was under way when a write came in isn't
+        # taken as fresh. Has its own lock, so writes don't wait on a load.
+        self._generation = 0
+        self._generation_lock = threading.Lock()
+
+    def _on_write(self, method: Method, url: str) -> None:
+        base_url = self.companyfile.general_ledger.base_url
+        for endpoint, _ in REFERENCE_COLLECTIONS.values():
+            if url.startswith(base_url + endpoint):
+                self.invalidate()
+
+    def _load(self, kind: str) -> list[dict]:
+        return list(iter_items(getattr(self.companyfile.general_ledger, kind)))
+
+    def refresh(self) -> None:
+        """Reload all collections now."""
+        with self._generation_lock:
+            generation = self._generation
+        with ThreadPoolExecutor(max_workers=len(REFERENCE_COLLECTIONS)) as executor:
+            loaded = dict(
+                zip(
+                    REFERENCE_COLLECTIONS,
+                    executor.map(self._load, REFERENCE_COLLECTIONS),
+                    strict=True,
+                )
+            )
+        indexes = {}
+        for kind, items in loaded.items():
+            _, display_key = REFERENCE_COLLECTIONS[kind]
+            index = {}
+            for item in items:
+                if item.get(display_key):
+                    index[item[display_key]] = item
+                index[item["UID"]] = item
+            indexes[kind] = index
+        with self._generation_lock:
+            self._indexes = indexes
+            # If invalidated while loading, what was loaded may predate the write, so leave it to
+            # be reloaded on next use.
+            self._loaded_at = time.monotonic() if generation == self._generation else None
+
+    def invalidate(self) -> None:
+        """Drop cached collections, so they're reloaded on next use."""
+        with self._generation_lock:
+            self._generation += 1
+            self._loaded_at = None
+
+    def _index(self, kind: str) -> dict[str, dict]:
+        with self._lock:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl:
+                self.refresh()
+            return self._indexes[kind]
+
+    def get(self, kind: str, key: str, default: Any = None) -> Any:
+        """Look up a `taxcode`, `account` or `category` by UID or DisplayID/Code."""
+        if kind not in REFERENCE_COLLECTIONS:
+            raise KeyError(
+                f"Unknown reference collection {kind!r}. Expected one of {list(REFERENCE_COLLECTIONS)}."
+            )
+        return self._index(kind).get(key, default)
+
+    def all(self, kind: str) -> list[dict]:
+        """Return every cached item in the given collection."""
+        index = self._index(kind)
+        return list({item["UID"]: item for item in index.values()}.values())
+
+    def taxcode(self, key: str) -> dict | None:
+        return self.get("taxcode", key)
+
+    def account(self, key: str) -> dict | None:
+        return self.get("account", key)
+
+    def category(self, key: str) -> dict | None:
+        return self.get("category", key)
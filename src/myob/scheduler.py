@@ -0,0 +1,106 @@
+import threading
+from collections import OrderedDict, deque
+from collections.abc import Hashable, Iterator
+from contextlib import contextmanager
+
+DEFAULT_LANES = ("interactive", "normal", "background")
+
+
+class Scheduler:
+    """Caps concurrent requests per company file and overall.
+
+    MYOB throttles heavy concurrency against any one company file, so no more than
+    `per_company` requests run against each at once, and no more than `max_concurrent` in total.
+    Waiting requests are started by lane, in the order given by `lanes` (so `interactive` calls
+    jump ahead of `background` syncs), and round-robin across company files within a lane, so
+    one busy tenant can't starve the others.
+    """
+
+    def __init__(
+        self,
+        per_company: int = 4,
+        max_concurrent: int = 16,
+        lanes: tuple[str, ...] = DEFAULT_LANES,
+        default_lane: str = "normal",
+    ) -> None:
+        if default_lane not in lanes:
+            raise ValueError(f"Default lane {default_lane!r} isn't one of {lanes}.")
+        self.per_company = per_company
+        self.max_concurrent = max_concurrent
+        self.lanes = lanes
+        self.default_lane = default_lane
+        self._lock = threading.Lock()
+        self._active: dict[Hashable, int] = {}
+        self._total = 0
+        # Per lane, the queue of waiters for each company file, in round-robin order.
+        self._waiting: dict[str, OrderedDict[Hashable, deque[threading.Event]]] = {
+            lane: OrderedDict() for lane in lanes
+        }
+
+    def __reduce__(self) -> tuple:
+        # Slots can't be shared across processes, so each unpickled copy caps its own process.
+        return (Scheduler, (self.per_company, self.max_concurrent, self.lanes, self.default_lane))
+
+    @contextmanager
+    def slot(self, company_id: Hashable, lane: str | None = None) -> Iterator[None]:
+        """Block until a request against the given company file may run, then hold its slot."""
+        self.acquire(company_id, lane)
+        try:
+            yield
+        finally:
+            self.release(company_id)
+
+    def acquire(self, company_id: Hashable, lane: str | None = None) -> None:
+        lane = lane or self.default_lane
+        if lane not in self._waiting:
+            raise ValueError(f"Unknown lane {lane!r}. Expected one of {self.lanes}.")
+        ready = threading.Event()
+        with self._lock:
+            self._waiting[lane].setdefault(company_id, deque()).append(ready)
+            self._dispatch()
+        ready.wait()
+
+    def release(self, company_id: Hashable) -> None:
+        with self._lock:
+            self._active[company_id] -= 1
+            if not self._active[company_id]:
+                del self._active[company_id]
+            self._total -= 1
+            self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._total < self.max_concurrent:
+            ready = self._next()
+            if ready is None:
+                return
+            ready.set()
+
+    def _next(self) -> threading.Event | None:
+        for lane in self.lanes:
+            waiting = self._waiting[lane]
+            for company_id, queue in waiting.items():
+                if self._active.get(company_id, 0) >= self.per_company:
+                    continue
+                ready = queue.popleft()
+                # Send this company file to the back of the line.
+                del waiting[company_id]
+                if queue:
+                    waiting[company_id] = queue
+                self._active[company_id] = self._active.get(company_id, 0) + 1
+                self._total += 1
+                return ready
+        return None
+
+    def active(self) -> int:
+        """The number of requests running overall."""
+        with self._lock:
+            return self._total
+
+    def active_for(self, company_id: Hashable) -> int:
+        """The number of requests running against the given company file."""
+        with self._lock:
+            return self._active.get(company_id, 0)
+
+    def waiting(self) -> int:
+        with self._lock:
+            return sum(len(q) for lane in self._waiting.values() for q in lane.values())
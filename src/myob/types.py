@@ -1,4 +1,4 @@
-from typing import Literal, TypedDict
+from typing import Any, Literal, TypedDict
 
 # TODO: This could probs do better as an enum..
 Method = Literal["ALL", "GET", "POST", "PUT", "DELETE"]
@@ -7,3 +7,14 @@ Method = Literal["ALL", "GET", "POST", "PUT", "DELETE"]
 class MethodDetails(TypedDict):
     kwargs: list[str]
     hint: str
+
+
+class GetManyResult(TypedDict):
+    found: dict[str, dict]  # Keyed by UID.
+    missing: list[str]
+
+
+class WriteGraphResult(TypedDict):
+    results: dict[str, Any]  # Keyed by write name.
+    failed: dict[str, Exception]
+    skipped: list[str]  # Because a write they depend on failed.
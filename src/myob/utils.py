@@ -1,3 +1,9 @@
+import json
+from typing import Any
+
+from .constants import MYOB_BASE_URL
+
+
 def pluralise(s: str) -> str:
     if s.endswith("y"):
         return s[:-1] + "ies"
@@ -5,3 +11,29 @@ def pluralise(s: str) -> str:
         return s[:-1] + "ces"
     else:
         return s + "s"
+
+
+def local_url(uri: str, company_id: str) -> str | None:
+    """A `URI` from MYOB rewritten onto our host, or None if it isn't in the company file.
+
+    Only the path within the company file is taken from the `URI`. Its host may differ from
+    ours (eg. `arl2.api.myob.com`), and requests to it would dodge the cache and breaker keys
+    (and `WriteDedup` entries) our URLs are tracked under.
+    """
+    start = uri.lower().find(f"/{company_id.lower()}/")
+    if start == -1:
+        return None
+    return f"{MYOB_BASE_URL}{company_id}{uri[start + len(company_id) + 1 :]}"
+
+
+def flatten(record: dict, prefix: str = "") -> dict[str, Any]:
+    """Flatten nested objects into dotted columns (eg. `Customer.UID`), and lists into JSON."""
+    flat: dict[str, Any] = {}
+    for k, v in record.items():
+        if isinstance(v, dict):
+            flat.update(flatten(v, f"{prefix}{k}."))
+        elif isinstance(v, list):
+            flat[f"{prefix}{k}"] = json.dumps(v)
+        else:
+            flat[f"{prefix}{k}"] = v
+    return flat
@@ -0,0 +1,116 @@
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from myob import Myob
+from myob.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from myob.credentials import PartnerCredentials
+from myob.exceptions import MyobCircuitOpen, MyobGatewayTimeout, MyobNotFound
+
+
+def fail():
+    raise MyobGatewayTimeout(MagicMock())
+
+
+class CircuitBreakerTests(TestCase):
+    def setUp(self):
+        self.on_state_change = MagicMock()
+        self.breaker = CircuitBreaker(
+            failure_threshold=2, reset_timeout=30, on_state_change=self.on_state_change
+        )
+
+    def test_opens_after_failures(self):
+        with self.assertRaises(MyobGatewayTimeout):
+            self.breaker.call("a", fail)
+        self.assertEqual(self.breaker.state("a"), CLOSED)
+        with self.assertRaises(MyobGatewayTimeout):
+            self.breaker.call("a", fail)
+        self.assertEqual(self.breaker.state("a"), OPEN)
+        self.on_state_change.assert_called_once_with("a", CLOSED, OPEN)
+
+        func = MagicMock()
+        with self.assertRaises(MyobCircuitOpen) as cm:
+            self.breaker.call("a", func)
+        func.assert_not_called()
+        self.assertEqual(cm.exception.key, "a")
+        self.assertGreater(cm.exception.retry_after, 0)
+
+        # Other keys are unaffected.
+        self.assertEqual(self.breaker.call("b", lambda: 1), 1)
+        self.assertEqual(self.breaker.states(), {"a": OPEN, "b": CLOSED})
+
+    def test_callback_may_read_states(self):
+        seen = []
+        self.breaker.on_state_change = lambda key, old, new: seen.append(self.breaker.states())
+        for _ in range(2):
+            with self.assertRaises(MyobGatewayTimeout):
+                self.breaker.call("a", fail)
+        self.breaker.reset("a")
+        self.assertEqual(seen, [{"a": OPEN}, {"a": CLOSED}])
+
+    def test_other_errors_dont_count(self):
+        def not_found():
+            raise MyobNotFound(MagicMock())
+
+        for func in (fail, not_found, fail, not_found):
+            with self.assertRaises((MyobGatewayTimeout, MyobNotFound)):
+                self.breaker.call("a", func)
+        self.assertEqual(self.breaker.state("a"), CLOSED)
+
+    def open_and_expire(self):
+        for _ in range(2):
+            with self.assertRaises(MyobGatewayTimeout):
+                self.breaker.call("a", fail)
+        self.breaker._circuits["a"].opened_at -= 31
+
+    def test_half_open_probe_success(self):
+        self.open_and_expire()
+
+        def probe():
+            self.assertEqual(self.breaker.state("a"), HALF_OPEN)
+            # Only one probe at a time.
+            with self.assertRaises(MyobCircuitOpen):
+                self.breaker.call("a", lambda: None)
+            return "ok"
+
+        self.assertEqual(self.breaker.call("a", probe), "ok")
+        self.assertEqual(self.breaker.state("a"), CLOSED)
+        self.assertEqual(
+            [c.args[1:] for c in self.on_state_change.call_args_list],
+            [(CLOSED, OPEN), (OPEN, HALF_OPEN), (HALF_OPEN, CLOSED)],
+        )
+
+    def test_half_open_probe_failure(self):
+        self.open_and_expire()
+        with self.assertRaises(MyobGatewayTimeout):
+            self.breaker.call("a", fail)
+        self.assertEqual(self.breaker.state("a"), OPEN)
+        with self.assertRaises(MyobCircuitOpen):
+            self.breaker.call("a", lambda: None)
+
+        self.breaker.reset("a")
+        self.assertEqual(self.breaker.call("a", lambda: 1), 1)
+
+
+class ManagerBreakerTests(TestCase):
+    @patch("myob.managers.requests.request")
+    def test_keyed_by_company_and_endpoint(self, mock_request):
+        mock_request.return_value.status_code = 504
+        breaker = CircuitBreaker(failure_threshold=1)
+        cred = PartnerCredentials(
+            consumer_key="KeyToTheKingdom",
+            consumer_secret="TellNoOne",  # noqa: S106
+            callback_uri="CallOnlyWhenCalledTo",
+        )
+        companyfile = Myob(cred, breaker=breaker).companyfiles.get("cid", call=False)
+
+        with self.assertRaises(MyobGatewayTimeout):
+            companyfile.contacts.get_customer(uid="abc")
+        self.assertEqual(breaker.states(), {("cid", "Contact/Customer/[uid]/"): OPEN})
+        with self.assertRaises(MyobCircuitOpen):
+            companyfile.contacts.get_customer(uid="def")
+        self.assertEqual(mock_request.call_count, 1)
+
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.headers = {"content-type": "application/json"}
+        companyfile.contacts.supplier()
+        self.assertEqual(mock_request.call_count, 2)
@@ -0,0 +1,177 @@
+import os
+import tempfile
+import time
+from unittest import TestCase, skipUnless
+from unittest.mock import patch
+
+from myob import Myob
+from myob.cache import DiskCache
+from myob.credentials import PartnerCredentials
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CID = "DummyCompanyId"
+URL = f"https://api.myob.com/accountright/{CID}/Contact/Customer/"
+
+
+class DiskCacheTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache.db")
+        self.cache = DiskCache(self.path)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        key = DiskCache.key(CID, URL, {"$top": 10})
+        self.assertIsNone(self.cache.get(key))
+        content = b'{"Items": []}' * 100
+        self.cache.put(key, URL, content)
+        self.assertEqual(self.cache.get(key), content)
+        # Stored compressed.
+        self.assertLess(self.cache.size(), len(content))
+
+    def test_keys(self):
+        key = DiskCache.key(CID, URL, {"$top": 10, "$skip": 0})
+        self.assertEqual(key, DiskCache.key(CID, URL, {"$skip": 0, "$top": 10}))
+        self.assertNotEqual(key, DiskCache.key(CID, URL, {"$top": 20, "$skip": 0}))
+        self.assertNotEqual(key, DiskCache.key("Other", URL, {"$top": 10, "$skip": 0}))
+
+    def test_evicts_least_recently_used(self):
+        for i in range(3):
+            self.cache.put(str(i), URL, os.urandom(1000))
+        self.cache.max_bytes = self.cache.size()
+        self.assertIsNotNone(self.cache.get("0"))
+        self.cache.put("3", URL, os.urandom(1000))
+        self.assertEqual(len(self.cache), 3)
+        self.assertIsNone(self.cache.get("1"))
+        for key in ("0", "2", "3"):
+            self.assertIsNotNone(self.cache.get(key))
+
+    def test_size_kept_as_responses_come_and_go(self):
+        def total():
+            return self.cache._db.execute("SELECT SUM(size) FROM responses").fetchone()[0] or 0
+
+        self.cache.put("a", URL, os.urandom(1000))
+        self.cache.put("a", URL, os.urandom(500))
+        self.cache.put("b", URL + "b/", os.urandom(500))
+        self.assertEqual(self.cache.size(), total())
+        self.cache.invalidate(URL + "b/")
+        self.assertEqual(self.cache.size(), total())
+        self.cache.clear()
+        self.assertEqual(self.cache.size(), 0)
+
+    def test_invalidate_uses_index(self):
+        statements = []
+        self.cache._db.set_trace_callback(statements.append)
+        self.cache.invalidate(URL)
+        self.cache._db.set_trace_callback(None)
+        (delete,) = [s for s in statements if s.startswith("DELETE")]
+        plan = self.cache._db.execute(f"EXPLAIN QUERY PLAN {delete}").fetchall()
+        self.assertIn("responses_url", str([tuple(row) for row in plan]))
+
+    def test_ttl(self):
+        self.cache.ttl = 60
+        self.cache.put("a", URL, b"{}")
+        self.assertEqual(self.cache.get("a"), b"{}")
+        with patch("myob.cache.time.time", return_value=time.time() + 61):
+            self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_invalidate(self):
+        self.cache.put("a", URL, b"{}")
+        self.cache.put("b", URL + "abc/", b"{}")
+        self.cache.put("c", URL.replace("Contact", "Sale"), b"{}")
+        self.cache.invalidate(URL)
+        self.assertEqual(len(self.cache), 1)
+        self.assertIsNotNone(self.cache.get("c"))
+
+    def test_survives_restart(self):
+        self.cache.put("a", URL, b"{}")
+        self.cache.close()
+        self.cache = DiskCache(self.path)
+        self.assertEqual(self.cache.get("a"), b"{}")
+
+    def test_unknown_compression(self):
+        with self.assertRaises(ValueError):
+            DiskCache(self.path, compression="lzma")
+
+    @skipUnless(zstandard, "zstandard not installed")
+    def test_zstd(self):
+        cache = DiskCache(os.path.join(self.tmp.name, "zstd.db"), compression="zstd")
+        cache.put("a", URL, b"{}" * 100)
+        self.assertEqual(cache.get("a"), b"{}" * 100)
+        cache.close()
+
+
+class CachedManagerTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache.db")
+        self.cache = DiskCache(self.path)
+        self.companyfile = self.build_companyfile(self.cache)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def build_companyfile(self, cache):
+        cred = PartnerCredentials(
+            consumer_key="KeyToTheKingdom",
+            consumer_secret="TellNoOne",  # noqa: S106
+            callback_uri="CallOnlyWhenCalledTo",
+        )
+        return Myob(cred, cache=cache).companyfiles.get(CID, call=False)
+
+    def mock_response(self, mock_request, content):
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.headers = {"content-type": "application/json"}
+        mock_request.return_value.content = content
+        mock_request.return_value.json.return_value = {"Items": ["fresh"]}
+
+    @patch("myob.managers.requests.request")
+    def test_reads_served_from_cache(self, mock_request):
+        self.mock_response(mock_request, b'{"Items": ["fresh"]}')
+        self.assertEqual(self.companyfile.contacts.customer(), {"Items": ["fresh"]})
+        self.assertEqual(self.companyfile.contacts.customer(), {"Items": ["fresh"]})
+        self.assertEqual(mock_request.call_count, 1)
+        # Different params are a different request.
+        self.companyfile.contacts.customer(limit=10)
+        self.assertEqual(mock_request.call_count, 2)
+
+    @patch("myob.managers.requests.request")
+    def test_warm_restart(self, mock_request):
+        self.mock_response(mock_request, b'{"Items": ["fresh"]}')
+        self.companyfile.contacts.customer()
+        self.cache.close()
+
+        self.cache = DiskCache(self.path)
+        companyfile = self.build_companyfile(self.cache)
+        self.assertEqual(companyfile.contacts.customer(), {"Items": ["fresh"]})
+        self.assertEqual(mock_request.call_count, 1)
+
+    @patch("myob.managers.requests.request")
+    def test_writes_invalidate_endpoint(self, mock_request):
+        self.mock_response(mock_request, b'{"Items": ["fresh"]}')
+        self.companyfile.contacts.customer()
+        self.companyfile.invoices.item()
+        self.assertEqual(len(self.cache), 2)
+
+        self.companyfile.contacts.put_customer(uid="1", data={})
+        self.assertEqual(len(self.cache), 1)
+        self.companyfile.contacts.customer()
+        self.companyfile.invoices.item()
+        self.assertEqual(mock_request.call_count, 4)
+
+    @patch("myob.managers.requests.request")
+    def test_binary_responses_not_cached(self, mock_request):
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.headers = {"content-type": "application/pdf"}
+        mock_request.return_value.content = b"%PDF"
+        self.companyfile.invoices.get_item(uid="1", format="pdf")
+        self.assertEqual(len(self.cache), 0)
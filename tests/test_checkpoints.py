@@ -0,0 +1,102 @@
+import os
+import tempfile
+from datetime import date
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from myob.checkpoints import (
+    FileCheckpointStore,
+    MemoryCheckpointStore,
+    iter_resumable_items,
+    iter_resumable_pages,
+)
+
+ROWS = [{"UID": f"uid-{i:02}"} for i in range(7)]
+
+
+def offset_func(page, limit, **kwargs):
+    items = ROWS[(page - 1) * limit : page * limit]
+    return {"Items": items, "NextPageLink": "next" if page * limit < len(ROWS) else None}
+
+
+def keyset_func(orderby, limit, raw_filter=None, **kwargs):
+    # Filters look like "(UID gt 'uid-01')".
+    after = raw_filter and raw_filter.split("'")[1]
+    rows = [r for r in ROWS if after is None or r["UID"] > after]
+    return {"Items": rows[:limit]}
+
+
+class CheckpointStoreTests(TestCase):
+    def test_memory(self):
+        store = MemoryCheckpointStore()
+        self.assertIsNone(store.load("a"))
+        checkpoint = {"page": 1}
+        store.save("a", checkpoint)
+        checkpoint["page"] = 2
+        self.assertEqual(store.load("a"), {"page": 1})
+        store.delete("a")
+        store.delete("a")
+        self.assertIsNone(store.load("a"))
+
+    def test_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = FileCheckpointStore(tmp)
+            store.save("a", {"page": 1, "filters": {"Date__gt": date(2024, 1, 1)}})
+            self.assertEqual(
+                FileCheckpointStore(tmp).load("a"),
+                {"page": 1, "filters": {"Date__gt": "2024-01-01"}},
+            )
+            self.assertEqual(os.listdir(tmp), ["a"])
+            store.delete("a")
+            self.assertIsNone(store.load("a"))
+            with self.assertRaises(ValueError):
+                store.load("../a")
+
+
+class ResumablePaginationTests(TestCase):
+    def crash_after(self, pages, func, store, **kwargs):
+        # Read `pages` pages, then ask for the next which blows up.
+        calls = iter(range(pages + 1))
+
+        def crashing(**kw):
+            if next(calls) == pages:
+                raise ConnectionError("boom")
+            return func(**kw)
+
+        seen = []
+        with self.assertRaises(ConnectionError):
+            for response in iter_resumable_pages(crashing, store, "job", limit=2, **kwargs):
+                seen.extend(response["Items"])
+        return seen
+
+    def test_resumes_by_offset(self):
+        store = MemoryCheckpointStore()
+        seen = self.crash_after(2, offset_func, store, Date__gt=date(2024, 1, 1))
+        self.assertEqual(seen, ROWS[:4])
+        checkpoint = store.load("job")
+        self.assertEqual(checkpoint["page"], 2)
+        self.assertEqual(checkpoint["count"], 4)
+        self.assertEqual(checkpoint["filters"], {"Date__gt": "2024-01-01"})
+
+        func = MagicMock(side_effect=offset_func)
+        rest = list(iter_resumable_items(func, store, "job", limit=2, Date__gt=date(2024, 1, 1)))
+        self.assertEqual(rest, ROWS[4:])
+        self.assertEqual(func.call_args_list[0].kwargs["page"], 3)
+        self.assertIsNone(store.load("job"))
+
+    def test_resumes_by_key(self):
+        store = MemoryCheckpointStore()
+        seen = self.crash_after(1, keyset_func, store, keyset="UID")
+        self.assertEqual(seen, ROWS[:2])
+        self.assertEqual(store.load("job")["after"], "uid-01")
+
+        func = MagicMock(side_effect=keyset_func)
+        rest = list(iter_resumable_items(func, store, "job", limit=2, keyset="UID"))
+        self.assertEqual(rest, ROWS[2:])
+        self.assertEqual(func.call_args_list[0].kwargs["raw_filter"], "(UID gt 'uid-01')")
+
+    def test_checkpoint_for_other_read(self):
+        store = MemoryCheckpointStore()
+        self.crash_after(1, offset_func, store, Type="Customer")
+        with self.assertRaises(ValueError):
+            list(iter_resumable_pages(offset_func, store, "job", limit=2, Type="Supplier"))
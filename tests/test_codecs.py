@@ -0,0 +1,107 @@
+import importlib.util
+from decimal import Decimal
+from unittest import TestCase, skipUnless
+from unittest.mock import patch
+
+from myob import Myob
+from myob.codecs import JsonCodec, MsgspecCodec, OrjsonCodec
+from myob.credentials import PartnerCredentials
+
+CID = "DummyCompanyId"
+BODY = b'{"UID":"abc","Amount":12.34,"Qty":3}'
+
+HAS_ORJSON = importlib.util.find_spec("orjson") is not None
+HAS_MSGSPEC = importlib.util.find_spec("msgspec") is not None
+
+
+class JsonCodecTests(TestCase):
+    def test_roundtrip(self):
+        codec = JsonCodec()
+        self.assertEqual(codec.decode(BODY), {"UID": "abc", "Amount": 12.34, "Qty": 3})
+        self.assertEqual(codec.encode({"Amount": Decimal("12.34")}), b'{"Amount":12.34}')
+
+    def test_decimal(self):
+        data = JsonCodec(use_decimal=True).decode(BODY)
+        self.assertEqual(data["Amount"], Decimal("12.34"))
+        self.assertEqual(data["Qty"], 3)
+
+    def test_schema_unsupported(self):
+        with self.assertRaises(ValueError):
+            JsonCodec().decode(BODY, schema=dict)
+
+    def test_decimal_digits_kept(self):
+        codec = JsonCodec(use_decimal=True)
+        data = {"Amount": Decimal("12345678901234567.891"), "Rate": Decimal("1.10"), "Note": "x"}
+        content = codec.encode(data)
+        self.assertEqual(content, b'{"Amount":12345678901234567.891,"Rate":1.10,"Note":"x"}')
+        self.assertEqual(codec.decode(content), data)
+        with self.assertRaises(ValueError):
+            codec.encode({"Amount": Decimal("NaN")})
+
+
+@skipUnless(HAS_ORJSON, "orjson not installed")
+class OrjsonCodecTests(TestCase):
+    def test_roundtrip(self):
+        codec = OrjsonCodec()
+        self.assertEqual(codec.decode(BODY), {"UID": "abc", "Amount": 12.34, "Qty": 3})
+        self.assertEqual(codec.encode({"Amount": Decimal("12.34")}), b'{"Amount":12.34}')
+        self.assertEqual(
+            codec.encode([Decimal("12345678901234567.891")]), b"[12345678901234567.891]"
+        )
+        with self.assertRaises(ValueError):
+            codec.decode(b"")
+
+
+@skipUnless(HAS_MSGSPEC, "msgspec not installed")
+class MsgspecCodecTests(TestCase):
+    def test_schema(self):
+        import msgspec
+
+        class Item(msgspec.Struct):
+            UID: str
+            Amount: Decimal
+
+        item = MsgspecCodec().decode(BODY, schema=Item)
+        self.assertEqual(item, Item(UID="abc", Amount=Decimal("12.34")))
+        with self.assertRaises(ValueError):
+            MsgspecCodec().decode(b'{"UID": 1}', schema=Item)
+
+    def test_decimal(self):
+        self.assertEqual(MsgspecCodec(use_decimal=True).decode(BODY)["Amount"], Decimal("12.34"))
+        self.assertEqual(MsgspecCodec().encode({"Amount": Decimal("12.34")}), b'{"Amount":12.34}')
+
+
+class ManagerCodecTests(TestCase):
+    def setUp(self):
+        cred = PartnerCredentials(
+            consumer_key="KeyToTheKingdom",
+            consumer_secret="TellNoOne",  # noqa: S106
+            callback_uri="CallOnlyWhenCalledTo",
+        )
+        self.myob = Myob(cred, codec=JsonCodec(use_decimal=True))
+        self.companyfile = self.myob.companyfiles.get(CID, call=False)
+
+    @patch("myob.managers.requests.request")
+    def test_codec_used(self, mock_request):
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.headers = {"content-type": "application/json; charset=utf-8"}
+        mock_request.return_value.content = BODY
+
+        result = self.companyfile.contacts.get_customer(uid="abc")
+        self.assertEqual(result["Amount"], Decimal("12.34"))
+        mock_request.return_value.json.assert_not_called()
+
+        self.companyfile.contacts.put_customer(uid="abc", data={"Amount": Decimal("1.10")})
+        kwargs = mock_request.call_args.kwargs
+        self.assertEqual(kwargs["data"], b'{"Amount":1.10}')
+        self.assertEqual(kwargs["headers"]["Content-Type"], "application/json")
+        self.assertNotIn("json", kwargs)
+
+    @patch("myob.managers.requests.request")
+    def test_schema_requires_codec(self, mock_request):
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.headers = {"content-type": "application/json"}
+        cred = self.myob.credentials
+        companyfile = Myob(cred).companyfiles.get(CID, call=False)
+        with self.assertRaises(ValueError):
+            companyfile.contacts.customer(schema=dict)
@@ -0,0 +1,144 @@
+import builtins
+from unittest import TestCase, skipUnless
+from unittest.mock import patch
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+from myob.columnar import Columns
+
+CUSTOMERS = ["c1", "c2", "c1"]
+
+
+def invoice(i, **extra):
+    return {
+        "UID": f"uid-{i}",
+        "Date": f"2024-07-0{i + 1}T00:00:00",
+        "Customer": {"UID": CUSTOMERS[i % 3]},
+        "TotalAmount": 10.5 * i,
+        "Lines": [{"Total": 1}],
+        "IsActive": True,
+        "Number": i,
+        **extra,
+    }
+
+
+class MissingNumpyTests(TestCase):
+    def test_missing_numpy(self):
+        real_import = builtins.__import__
+
+        def fake_import(name, *args, **kwargs):
+            if name == "numpy":
+                raise ImportError
+            return real_import(name, *args, **kwargs)
+
+        with patch("builtins.__import__", fake_import):
+            with self.assertRaisesRegex(ImportError, "pymyob\\[numpy\\]"):
+                Columns()
+
+
+@skipUnless(np, "numpy not installed")
+class ColumnsTests(TestCase):
+    def test_kinds(self):
+        columns = Columns.from_pages(
+            [{"Items": [invoice(0), invoice(1)]}, {"Items": [invoice(2)]}, {"Items": []}]
+        )
+        self.assertEqual(len(columns), 3)
+        self.assertEqual(columns["TotalAmount"].kind, "float")
+        self.assertEqual(columns["TotalAmount"].values.tolist(), [0.0, 10.5, 21.0])
+        self.assertEqual(columns["Number"].values.dtype, np.int64)
+        self.assertEqual(columns["IsActive"].values.dtype, np.bool_)
+        self.assertEqual(columns["Date"].values[2], np.datetime64("2024-07-03"))
+        customer = columns["Customer.UID"]
+        self.assertEqual(customer.kind, "category")
+        self.assertEqual(customer.categories, ["c1", "c2"])
+        self.assertEqual(customer.values.tolist(), [0, 1, 0])
+        # Lists are kept as JSON, as for export.
+        self.assertEqual(columns["Lines"].categories, ['[{"Total": 1}]'])
+
+    def test_only_fields(self):
+        columns = Columns(fields=["Customer.UID", "Missing"])
+        columns.extend([invoice(0)])
+        self.assertEqual(list(columns.columns), ["Customer.UID", "Missing"])
+        self.assertIsNone(columns["Missing"].kind)
+        self.assertEqual(columns["Missing"].values.tolist(), [None])
+
+    def test_nulls_and_widening(self):
+        columns = Columns()
+        columns.extend([invoice(0, Notes=None, Number=None, Date=None)])
+        columns.extend([invoice(1, Notes="late", Number=2), invoice(2, Date="Soon")])
+        self.assertEqual(columns["Notes"].kind, "category")
+        self.assertEqual(columns["Notes"].values.tolist(), [-1, 0, -1])
+        # A null int makes it float.
+        self.assertEqual(columns["Number"].kind, "float")
+        self.assertTrue(np.isnan(columns["Number"].values[0]))
+        self.assertEqual(columns["Number"].values[1:].tolist(), [2.0, 2.0])
+        # A string that isn't a date makes it a category.
+        self.assertEqual(columns["Date"].kind, "category")
+        self.assertEqual(columns["Date"].categories, ["2024-07-02T00:00:00", "Soon"])
+        self.assertEqual(columns["Date"].values.tolist(), [-1, 0, 1])
+
+        columns.extend([invoice(0, Notes=5, IsActive=None)])
+        self.assertEqual(columns["Notes"].kind, "object")
+        self.assertEqual(columns["Notes"].values.tolist(), [None, "late", None, 5])
+        self.assertEqual(columns["IsActive"].values.tolist(), [True, True, True, None])
+
+    def test_ints_kept_when_widened_to_objects(self):
+        columns = Columns()
+        columns.extend([invoice(0, Number=None)])
+        columns.extend([invoice(1, Number=7), invoice(2, Number=2.5)])
+        self.assertEqual(columns["Number"].kind, "float")
+        columns.extend([invoice(0, Number="n/a")])
+        self.assertEqual(columns["Number"].kind, "object")
+        values = columns["Number"].values.tolist()
+        self.assertEqual(values, [None, 7, 2.5, "n/a"])
+        self.assertIsInstance(values[1], int)
+
+    def test_columns_appearing_later(self):
+        columns = Columns()
+        columns.extend([invoice(0)])
+        columns.extend([invoice(1, Comment="hi")] * 2000)
+        self.assertEqual(len(columns["Comment"].values), 2001)
+        self.assertEqual(columns["Comment"].values[:2].tolist(), [-1, 0])
+
+    @skipUnless(pd, "pandas not installed")
+    def test_to_pandas(self):
+        columns = Columns.from_pages([{"Items": [invoice(i) for i in range(3)]}])
+        df = columns.to_pandas()
+        self.assertEqual(df["TotalAmount"].sum(), 31.5)
+        self.assertTrue(
+            np.shares_memory(df["TotalAmount"].to_numpy(), columns["TotalAmount"].values)
+        )
+        self.assertEqual(df["Customer.UID"].tolist(), CUSTOMERS)
+        self.assertEqual(df["Customer.UID"].dtype, "category")
+        self.assertEqual(df.groupby("Customer.UID", observed=True)["TotalAmount"].sum()["c1"], 21.0)
+
+    @skipUnless(pa, "pyarrow not installed")
+    def test_to_arrow(self):
+        columns = Columns.from_pages([{"Items": [invoice(0), invoice(1, TotalAmount=None)]}])
+        table = columns.to_arrow()
+        self.assertEqual(table["TotalAmount"].to_pylist(), [0.0, None])
+        self.assertEqual(table["Customer.UID"].to_pylist(), ["c1", "c2"])
+        self.assertTrue(pa.types.is_dictionary(table["Customer.UID"].type))
+        self.assertTrue(pa.types.is_timestamp(table["Date"].type))
+        amounts = table["TotalAmount"].chunk(0)
+        self.assertEqual(amounts.buffers()[1].address, columns["TotalAmount"].values.ctypes.data)
+
+    @skipUnless(pa, "pyarrow not installed")
+    def test_to_arrow_mixed_objects(self):
+        columns = Columns.from_pages([{"Items": [invoice(0, Notes=5), invoice(1, Notes="late")]}])
+        columns.extend([invoice(2)])
+        table = columns.to_arrow()
+        self.assertEqual(table["Notes"].to_pylist(), ["5", "late", None])
@@ -0,0 +1,144 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from unittest.mock import patch
+
+from myob import Myob
+from myob.concurrency import SingleFlight, read_ahead
+from myob.credentials import PartnerCredentials
+
+CID = "DummyCompanyId"
+
+
+class SingleFlightTests(TestCase):
+    def test_coalesces_concurrent_calls(self):
+        single_flight = SingleFlight()
+        calls = []
+        release = threading.Event()
+
+        def func():
+            calls.append(1)
+            release.wait(1)
+            return {"Items": []}
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = [executor.submit(single_flight.do, "key", func) for _ in range(5)]
+            while single_flight.in_flight() == 0:
+                time.sleep(0.001)
+            time.sleep(0.05)
+            release.set()
+            results = [f.result() for f in futures]
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(r is results[0] for r in results))
+        self.assertEqual(single_flight.in_flight(), 0)
+
+    def test_errors_reach_every_waiter(self):
+        single_flight = SingleFlight()
+        release = threading.Event()
+
+        def func():
+            release.wait(1)
+            raise ValueError("boom")
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [executor.submit(single_flight.do, "key", func) for _ in range(3)]
+            time.sleep(0.05)
+            release.set()
+            for future in futures:
+                with self.assertRaises(ValueError):
+                    future.result()
+
+    def test_sequential_calls_not_coalesced(self):
+        single_flight = SingleFlight()
+        self.assertEqual(single_flight.do("key", lambda: 1), 1)
+        self.assertEqual(single_flight.do("key", lambda: 2), 2)
+
+
+class ReadAheadTests(TestCase):
+    def test_fetches_ahead_with_bounded_buffer(self):
+        produced = []
+
+        def pages():
+            for i in range(10):
+                produced.append(i)
+                yield i
+
+        iterator = read_ahead(pages(), depth=2)
+        self.assertEqual(next(iterator), 0)
+        time.sleep(0.05)
+        # One being consumed, two buffered and one waiting to go in.
+        self.assertEqual(len(produced), 4)
+        self.assertEqual(list(iterator), list(range(1, 10)))
+
+    def test_errors_propagate(self):
+        def pages():
+            yield 1
+            raise ValueError("boom")
+
+        iterator = read_ahead(pages(), depth=3)
+        self.assertEqual(next(iterator), 1)
+        with self.assertRaises(ValueError):
+            next(iterator)
+
+    def test_early_exit_stops_producer(self):
+        closed = threading.Event()
+
+        def pages():
+            try:
+                for i in range(1000):
+                    yield i
+            finally:
+                closed.set()
+
+        iterator = read_ahead(pages(), depth=1)
+        next(iterator)
+        iterator.close()
+        self.assertTrue(closed.wait(1))
+
+    def test_no_depth(self):
+        self.assertEqual(list(read_ahead(range(3), depth=0)), [0, 1, 2])
+
+
+class CoalescedRequestTests(TestCase):
+    def setUp(self):
+        cred = PartnerCredentials(
+            consumer_key="KeyToTheKingdom",
+            consumer_secret="TellNoOne",  # noqa: S106
+            callback_uri="CallOnlyWhenCalledTo",
+        )
+        self.companyfile = Myob(cred, coalesce=True).companyfiles.get(CID, call=False)
+
+    @patch("myob.managers.requests.request")
+    def test_identical_gets_share_request(self, mock_request):
+        release = threading.Event()
+
+        def request(*args, **kwargs):
+            release.wait(1)
+            return mock_request.return_value
+
+        mock_request.side_effect = request
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.headers = {"content-type": "application/json"}
+        mock_request.return_value.json.return_value = {"Items": []}
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(self.companyfile.general_ledger.taxcode) for _ in range(4)]
+            time.sleep(0.05)
+            release.set()
+            for future in futures:
+                self.assertEqual(future.result(), {"Items": []})
+        self.assertEqual(mock_request.call_count, 1)
+
+        # Differing params are separate requests.
+        self.companyfile.general_ledger.taxcode(Code="GST")
+        self.companyfile.general_ledger.taxcode(Code="FRE")
+        self.assertEqual(mock_request.call_count, 3)
+
+    @patch("myob.managers.requests.request")
+    def test_writes_not_coalesced(self, mock_request):
+        mock_request.return_value.status_code = 201
+        self.companyfile.general_ledger.post_taxcode(data={})
+        self.companyfile.general_ledger.post_taxcode(data={})
+        self.assertEqual(mock_request.call_count, 2)
@@ -0,0 +1,77 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from unittest import TestCase
+from unittest.mock import patch
+
+from myob.credentials import PartnerCredentials
+
+STATE = {
+    "consumer_key": "KeyToTheKingdom",
+    "consumer_secret": "TellNoOne",
+    "callback_uri": "CallOnlyWhenCalledTo",
+    "verified": True,
+    "companyfile_credentials": {},
+    "oauth_token": "token",
+    "refresh_token": "refresh",
+    "oauth_expires_at": datetime(2030, 1, 1),
+}
+
+
+class PartnerCredentialsTests(TestCase):
+    @patch("myob.credentials.OAuth2Session")
+    def test_oauth_session_is_lazy(self, mock_session):
+        cred = PartnerCredentials.from_state(STATE)
+        mock_session.assert_not_called()
+        self.assertEqual(cred.state, STATE)
+
+        mock_session.return_value.authorization_url.return_value = ("https://auth", "state")
+        self.assertEqual(cred.url, "https://auth&scope=CompanyFile")
+        self.assertEqual(cred.url, "https://auth&scope=CompanyFile")
+        mock_session.assert_called_once_with("KeyToTheKingdom", redirect_uri="CallOnlyWhenCalledTo")
+
+    def test_url(self):
+        cred = PartnerCredentials(
+            consumer_key="KeyToTheKingdom",
+            consumer_secret="TellNoOne",  # noqa: S106
+            callback_uri="CallOnlyWhenCalledTo",
+            state="abc",
+        )
+        self.assertTrue(cred.url.startswith("https://secure.myob.com/oauth2/account/authorize/?"))
+        self.assertIn("state=abc", cred.url)
+        self.assertTrue(cred.url.endswith("&scope=CompanyFile"))
+
+    @patch("myob.credentials.OAuth2Session")
+    def test_refresh_builds_session(self, mock_session):
+        cred = PartnerCredentials.from_state(STATE)
+        mock_session.return_value.refresh_token.return_value = {
+            "access_token": "new-token",
+            "refresh_token": "new-refresh",
+            "expires_at": 1900000000,
+        }
+        cred.refresh()
+        mock_session.assert_called_once()
+        self.assertEqual(cred.oauth_token, "new-token")
+        self.assertEqual(cred.refresh_token, "new-refresh")
+
+    def test_companyfile_credentials_not_shared(self):
+        a = PartnerCredentials("a", "a", "a")
+        b = PartnerCredentials("b", "b", "b")
+        a.authenticate_companyfile("cf", "user", "pass")
+        self.assertEqual(b.companyfile_credentials, {})
+        self.assertEqual(STATE["companyfile_credentials"], {})
+
+    @patch("myob.credentials.OAuth2Session")
+    def test_refresh_if_expired_refreshes_once(self, mock_session):
+        cred = PartnerCredentials.from_state({**STATE, "oauth_expires_at": datetime(2000, 1, 1)})
+
+        def refresh_token(*args, **kwargs):
+            time.sleep(0.05)
+            return {"access_token": "new", "refresh_token": "new", "expires_at": 4102444800}
+
+        mock_session.return_value.refresh_token.side_effect = refresh_token
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            refreshed = list(executor.map(lambda _: cred.refresh_if_expired(), range(8)))
+        self.assertEqual(refreshed.count(True), 1)
+        self.assertEqual(mock_session.return_value.refresh_token.call_count, 1)
+        self.assertEqual(cred.oauth_token, "new")
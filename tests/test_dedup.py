@@ -0,0 +1,134 @@
+import json
+import pickle
+from unittest import TestCase
+from unittest.mock import patch
+
+from myob import Myob
+from myob.credentials import PartnerCredentials
+from myob.dedup import SkippedWrite, WriteDedup
+
+CID = "DummyCompanyId"
+URL = f"https://api.myob.com/accountright/{CID}/Contact/Customer/"
+CUSTOMER = {"UID": "1", "Name": "Bob", "IsActive": True, "RowVersion": "1", "URI": URL + "1"}
+
+
+class WriteDedupTests(TestCase):
+    def setUp(self):
+        self.dedup = WriteDedup()
+
+    def test_hash_ignores_key_order_and_managed_fields(self):
+        self.assertEqual(
+            self.dedup.hash({"a": 1, "b": [1, 2]}), self.dedup.hash({"b": [1, 2], "a": 1})
+        )
+        self.assertEqual(
+            self.dedup.hash(CUSTOMER), self.dedup.hash({**CUSTOMER, "RowVersion": "2"})
+        )
+        self.assertNotEqual(self.dedup.hash(CUSTOMER), self.dedup.hash({**CUSTOMER, "Name": "B"}))
+
+    def test_unchanged(self):
+        self.assertFalse(self.dedup.unchanged(URL + "1/", CUSTOMER))
+        self.dedup.remember(URL + "1/", CUSTOMER)
+        self.assertTrue(self.dedup.unchanged(URL + "1/", dict(reversed(CUSTOMER.items()))))
+        self.assertFalse(self.dedup.unchanged(URL + "1/", {**CUSTOMER, "Name": "B"}))
+        self.assertFalse(self.dedup.unchanged(URL + "2/", CUSTOMER))
+        # Only PUTs actually made (see `record`) count as sent.
+        self.assertEqual((self.dedup.skipped, self.dedup.sent), (1, 0))
+
+    def test_forgets_least_recently_used(self):
+        self.dedup.max_entries = 2
+        for uid in "123":
+            self.dedup.remember(URL + uid + "/", CUSTOMER)
+        self.assertFalse(self.dedup.unchanged(URL + "1/", CUSTOMER))
+        self.assertTrue(self.dedup.unchanged(URL + "3/", CUSTOMER))
+
+    def test_record(self):
+        self.dedup.record("POST", URL, {"Name": "Bob"}, CUSTOMER)
+        self.assertTrue(self.dedup.unchanged(URL + "1/", CUSTOMER))
+        # What was sent is remembered too, in case MYOB's response differs.
+        self.dedup.record("PUT", URL + "1/", {"Name": "Al"}, {**CUSTOMER, "Name": "Al"})
+        self.assertTrue(self.dedup.unchanged(URL + "1/", {"Name": "Al"}))
+        self.assertEqual(self.dedup.sent, 1)
+        self.dedup.record("DELETE", URL + "1/", None, None)
+        self.assertFalse(self.dedup.unchanged(URL + "1/", {"Name": "Al"}))
+        # Non-entities aren't remembered.
+        self.dedup.record("GET", URL + "2/", None, b"%PDF")
+        self.assertFalse(self.dedup.unchanged(URL + "2/", CUSTOMER))
+
+    def test_record_pages(self):
+        # Items are remembered at the URL of their URI, on our host, or else by UID.
+        supplier = {
+            "UID": "2",
+            "Name": "Sue",
+            "URI": f"https://arl2.api.myob.com/accountright/{CID}/Contact/Supplier/2",
+        }
+        contacts = f"https://api.myob.com/accountright/{CID}/Contact/"
+        self.dedup.record("ALL", contacts, None, {"Items": [CUSTOMER, supplier, {"UID": "3"}]})
+        self.assertTrue(self.dedup.unchanged(URL + "1/", CUSTOMER))
+        self.assertTrue(self.dedup.unchanged(contacts + "Supplier/2/", supplier))
+        self.assertTrue(self.dedup.unchanged(contacts + "3/", {"UID": "3"}))
+        self.assertFalse(self.dedup.unchanged(contacts, {"Items": [CUSTOMER]}))
+
+    def test_pickle(self):
+        self.dedup.remember(URL + "1/", CUSTOMER)
+        dedup = pickle.loads(pickle.dumps(self.dedup))
+        self.assertEqual(dedup.max_entries, self.dedup.max_entries)
+        self.assertFalse(dedup.unchanged(URL + "1/", CUSTOMER))
+
+
+class DedupManagerTests(TestCase):
+    def setUp(self):
+        cred = PartnerCredentials(
+            consumer_key="KeyToTheKingdom",
+            consumer_secret="TellNoOne",  # noqa: S106
+            callback_uri="CallOnlyWhenCalledTo",
+        )
+        self.dedup = WriteDedup()
+        myob = Myob(cred, dedup=self.dedup)
+        self.companyfile = myob.companyfiles.get(CID, call=False)
+
+    def mock_response(self, mock_request, body):
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.headers = {"content-type": "application/json"}
+        mock_request.return_value.content = json.dumps(body).encode()
+        mock_request.return_value.json.return_value = body
+
+    @patch("myob.managers.requests.request")
+    def test_skips_unchanged_puts(self, mock_request):
+        self.mock_response(mock_request, CUSTOMER)
+        customer = self.companyfile.contacts.get_customer(uid="1")
+
+        result = self.companyfile.contacts.put_customer(uid="1", data=customer)
+        self.assertIsInstance(result, SkippedWrite)
+        self.assertEqual(result, CUSTOMER)
+        self.assertEqual(mock_request.call_count, 1)
+
+        changed = {**customer, "Name": "Al"}
+        self.mock_response(mock_request, changed)
+        result = self.companyfile.contacts.put_customer(uid="1", data=changed)
+        self.assertNotIsInstance(result, SkippedWrite)
+        self.assertEqual(mock_request.call_count, 2)
+        # Sending it again is a no-op.
+        self.companyfile.contacts.put_customer(uid="1", data=changed)
+        self.assertEqual(mock_request.call_count, 2)
+        self.assertEqual((self.dedup.skipped, self.dedup.sent), (2, 1))
+
+    @patch("myob.managers.requests.request")
+    def test_skips_puts_of_listed_entities(self, mock_request):
+        self.mock_response(mock_request, {"Items": [CUSTOMER], "NextPageLink": None})
+        self.companyfile.contacts.customer()
+        self.companyfile.contacts.put_customer(uid="1", data=CUSTOMER)
+        self.assertEqual(mock_request.call_count, 1)
+
+    @patch("myob.managers.requests.request")
+    def test_failed_puts_not_counted(self, mock_request):
+        mock_request.side_effect = ConnectionError
+        with self.assertRaises(ConnectionError):
+            self.companyfile.contacts.put_customer(uid="1", data=CUSTOMER)
+        self.assertEqual((self.dedup.skipped, self.dedup.sent), (0, 0))
+
+    @patch("myob.managers.requests.request")
+    def test_other_managers_unaffected(self, mock_request):
+        self.mock_response(mock_request, CUSTOMER)
+        self.companyfile.contacts.get_customer(uid="1")
+        self.companyfile.contacts.put_supplier(uid="1", data=CUSTOMER)
+        self.assertEqual(mock_request.call_count, 2)
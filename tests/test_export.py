@@ -0,0 +1,195 @@
+import csv
+import importlib.util
+import json
+import os
+import tempfile
+from unittest import TestCase, skipUnless
+from unittest.mock import MagicMock, patch
+
+from myob.__main__ import main, parse_filters
+from myob.export import CsvWriter, export, flatten
+
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+ITEMS = [
+    {"UID": f"uid-{i}", "Customer": {"UID": "c", "Name": "Acme"}, "Lines": [i]} for i in range(5)
+]
+
+
+def fake_all(page, limit, **kwargs):
+    items = ITEMS[(page - 1) * limit : page * limit]
+    return {
+        "Items": items,
+        "Count": len(ITEMS),
+        "NextPageLink": "next" if page * limit < len(ITEMS) else None,
+    }
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.dir.name, name)
+
+    def read_ndjson(self, path):
+        with open(path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_flatten(self):
+        self.assertEqual(
+            flatten(ITEMS[1]),
+            {"UID": "uid-1", "Customer.UID": "c", "Customer.Name": "Acme", "Lines": "[1]"},
+        )
+
+    def test_ndjson(self):
+        func = MagicMock(side_effect=fake_all)
+        self.assertEqual(
+            export(func, self.path("out.ndjson"), limit=2, workers=2, Type="Customer"), 5
+        )
+        self.assertEqual(self.read_ndjson(self.path("out.ndjson")), ITEMS)
+        # Count lets us stop at the last page.
+        self.assertEqual(func.call_count, 3)
+        func.assert_called_with(page=3, limit=2, Type="Customer")
+
+    def test_csv(self):
+        export(fake_all, self.path("out.csv"), format="csv", limit=2)
+        with open(self.path("out.csv")) as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([r["UID"] for r in rows], [i["UID"] for i in ITEMS])
+        self.assertEqual(rows[0]["Customer.Name"], "Acme")
+
+    def test_csv_warns_of_dropped_columns(self):
+        writer = CsvWriter(self.path("out.csv"))
+        writer.write([{"UID": "1", "Customer": None}])
+        with self.assertWarnsRegex(UserWarning, "Customer.UID"):
+            writer.write([{"UID": "2", "Customer": {"UID": "c"}}])
+        writer.close()
+        self.assertEqual(writer.dropped, {"Customer.UID"})
+
+    def test_resume(self):
+        for format in ("ndjson", "csv"):
+            output, checkpoint = self.path(f"out.{format}"), self.path(f"{format}.checkpoint")
+            calls = []
+
+            def flaky(page, limit, **kwargs):
+                calls.append(page)
+                if page == 3 and calls.count(3) == 1:
+                    raise ConnectionError
+                return fake_all(page, limit, **kwargs)
+
+            with self.assertRaises(ConnectionError):
+                export(
+                    flaky,
+                    output,
+                    format=format,
+                    checkpoint_path=checkpoint,
+                    endpoint="x",
+                    limit=2,
+                    workers=1,
+                )
+            with open(checkpoint) as f:
+                self.assertEqual(json.load(f)["page"], 2)
+
+            with self.assertRaises(ValueError):
+                export(
+                    flaky, output, format=format, checkpoint_path=checkpoint, endpoint="y", limit=2
+                )
+
+            count = export(
+                flaky,
+                output,
+                format=format,
+                checkpoint_path=checkpoint,
+                endpoint="x",
+                limit=2,
+                workers=1,
+            )
+            self.assertEqual(count, 5)
+            self.assertEqual(calls, [1, 2, 3, 3])
+            self.assertFalse(os.path.exists(checkpoint))
+            if format == "ndjson":
+                self.assertEqual(self.read_ndjson(output), ITEMS)
+            else:
+                with open(output) as f:
+                    self.assertEqual(
+                        [r["UID"] for r in csv.DictReader(f)], [i["UID"] for i in ITEMS]
+                    )
+
+    @skipUnless(HAS_PYARROW, "pyarrow not installed")
+    def test_parquet(self):
+        import pyarrow.parquet as pq
+
+        export(fake_all, self.path("out"), format="parquet", limit=2)
+        table = pq.read_table(self.path("out"))
+        self.assertEqual(table.column("UID").to_pylist(), [i["UID"] for i in ITEMS])
+        self.assertEqual(table.column("Customer.Name").to_pylist(), ["Acme"] * 5)
+
+
+class CommandTests(TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.credentials = os.path.join(self.dir.name, "cred.json")
+        with open(self.credentials, "w") as f:
+            json.dump(
+                {
+                    "consumer_key": "KeyToTheKingdom",
+                    "consumer_secret": "TellNoOne",
+                    "callback_uri": "CallOnlyWhenCalledTo",
+                    "oauth_token": "token",
+                    "oauth_expires_at": "2100-01-01T00:00:00",
+                },
+                f,
+            )
+
+    def test_parse_filters(self):
+        self.assertEqual(
+            parse_filters(
+                ["Type=Customer", "Type=Supplier", "IsActive=true", "DisplayID__gt=5-0000"]
+            ),
+            {"Type": ["Customer", "Supplier"], "IsActive": True, "DisplayID__gt": "5-0000"},
+        )
+
+    @patch("myob.managers.requests.request")
+    def test_export(self, mock_request):
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.headers = {"content-type": "application/json"}
+        mock_request.return_value.json.return_value = {
+            "Items": ITEMS,
+            "Count": 5,
+            "NextPageLink": None,
+        }
+        output = os.path.join(self.dir.name, "out.ndjson")
+        with patch("sys.stderr"):
+            code = main(
+                [
+                    "export",
+                    "--credentials", self.credentials,
+                    "--company-id", "cid",
+                    "--endpoint", "contacts.customer",
+                    "--filter", "IsActive=true",
+                    "--output", output,
+                ]
+            )  # fmt: skip
+        self.assertEqual(code, 0)
+        args, kwargs = mock_request.call_args
+        self.assertEqual(args[1], "https://api.myob.com/accountright/cid/Contact/Customer/")
+        self.assertEqual(kwargs["params"]["$filter"], "(IsActive eq true)")
+        with open(output) as f:
+            self.assertEqual(len(f.readlines()), 5)
+
+    def test_unknown_endpoint(self):
+        for endpoint in ("nope", "contacts.get_customer"):
+            with patch("sys.stderr"):
+                code = main(
+                    [
+                        "export",
+                        "--credentials", self.credentials,
+                        "--company-id", "cid",
+                        "--endpoint", endpoint,
+                        "--output", os.path.join(self.dir.name, "out.ndjson"),
+                    ]
+                )  # fmt: skip
+            self.assertEqual(code, 2)
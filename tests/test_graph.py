@@ -0,0 +1,137 @@
+import json
+import threading
+from unittest import TestCase
+from unittest.mock import patch
+
+from myob import Myob
+from myob.credentials import PartnerCredentials
+from myob.graph import Ref, WriteGraph, substitute
+
+CID = "DummyCompanyId"
+
+
+def write(log, fail=False):
+    def func(**kwargs):
+        log.append(kwargs)
+        if fail:
+            raise ValueError("Nope")
+        return {"UID": f"uid-{len(log)}", "Lines": [{"Number": len(log)}]}
+
+    func.method = "POST"
+    return func
+
+
+class RefTests(TestCase):
+    def test_substitute(self):
+        results = {"a": {"UID": "1", "Lines": [{"Number": 7}]}}
+        value = {"x": [Ref("a"), {"y": Ref("a", "Lines.0.Number")}], "z": (Ref("a"), 2)}
+        self.assertEqual(substitute(value, results), {"x": ["1", {"y": 7}], "z": ("1", 2)})
+        # The original is left alone, so it can be run again.
+        self.assertIsInstance(value["x"][0], Ref)
+
+
+class WriteGraphTests(TestCase):
+    def setUp(self):
+        self.graph = WriteGraph()
+        self.log = []
+
+    def test_rejects_non_writes(self):
+        def func(**kwargs):
+            pass
+
+        func.method = "GET"
+        with self.assertRaises(ValueError):
+            self.graph.add("a", func)
+
+    def test_rejects_duplicates_unknowns_and_cycles(self):
+        self.graph.add("a", write(self.log))
+        with self.assertRaises(ValueError):
+            self.graph.add("a", write(self.log))
+
+        graph = WriteGraph()
+        graph.add("a", write(self.log), data=graph.ref("b"))
+        with self.assertRaisesRegex(ValueError, "unknown"):
+            graph.run()
+
+        graph.add("b", write(self.log), data=graph.ref("a"))
+        with self.assertRaisesRegex(ValueError, "each other"):
+            graph.run()
+        self.assertEqual(self.log, [])
+
+    def test_resolves_references_in_order(self):
+        customer = self.graph.add("customer", write(self.log), data={"Name": "Bob"})
+        self.graph.add(
+            "invoice",
+            write(self.log),
+            data={"Customer": {"UID": customer}, "Line": self.graph.ref("item", "Lines.0.Number")},
+        )
+        self.graph.add("item", write(self.log), data={"Name": "Widget"})
+        self.graph.add("report", write(self.log), after=("invoice",))
+
+        outcome = self.graph.run()
+        self.assertEqual(set(outcome["results"]), {"customer", "item", "invoice", "report"})
+        self.assertEqual(outcome["failed"], {})
+        self.assertEqual(outcome["skipped"], [])
+        invoice = next(kwargs for kwargs in self.log if "Customer" in kwargs.get("data", {}))
+        self.assertEqual(invoice["data"]["Customer"]["UID"], outcome["results"]["customer"]["UID"])
+        self.assertEqual(invoice["data"]["Line"], outcome["results"]["item"]["Lines"][0]["Number"])
+        self.assertEqual(self.log[-1], {})
+
+    def test_independent_writes_run_concurrently(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def func(**kwargs):
+            barrier.wait()
+            return {"UID": "1"}
+
+        func.method = "PUT"
+        for name in "abc":
+            self.graph.add(name, func)
+        self.assertEqual(len(self.graph.run(workers=3)["results"]), 3)
+
+    def test_partial_failure(self):
+        self.graph.add("customer", write(self.log, fail=True))
+        self.graph.add("item", write(self.log))
+        self.graph.add("invoice", write(self.log), data=self.graph.ref("customer"))
+        self.graph.add("payment", write(self.log), data=self.graph.ref("invoice"))
+
+        outcome = self.graph.run()
+        self.assertEqual(list(outcome["results"]), ["item"])
+        self.assertIsInstance(outcome["failed"]["customer"], ValueError)
+        self.assertEqual(outcome["skipped"], ["invoice", "payment"])
+
+    def test_unresolvable_reference_fails(self):
+        self.graph.add("customer", write(self.log))
+        self.graph.add("invoice", write(self.log), data=self.graph.ref("customer", "Missing"))
+        outcome = self.graph.run()
+        self.assertIsInstance(outcome["failed"]["invoice"], KeyError)
+
+
+class WriteGraphManagerTests(TestCase):
+    @patch("myob.managers.requests.request")
+    def test_posts_across_managers(self, mock_request):
+        def respond(method, url, **kwargs):
+            response = mock_request.return_value
+            response.status_code = 200
+            response.headers = {"content-type": "application/json"}
+            body = {"UID": url.rstrip("/").rsplit("/", 1)[-1]}
+            response.content = json.dumps(body).encode()
+            response.json.return_value = body
+            return response
+
+        mock_request.side_effect = respond
+        cred = PartnerCredentials(
+            consumer_key="KeyToTheKingdom",
+            consumer_secret="TellNoOne",  # noqa: S106
+            callback_uri="CallOnlyWhenCalledTo",
+        )
+        comp = Myob(cred).companyfiles.get(CID, call=False)
+
+        graph = WriteGraph()
+        customer = graph.add("customer", comp.contacts.post_customer, data={"Name": "Bob"})
+        graph.add("invoice", comp.invoices.post_item, data={"Customer": {"UID": customer}})
+        outcome = graph.run()
+
+        self.assertEqual(outcome["results"]["customer"], {"UID": "Customer"})
+        _, kwargs = mock_request.call_args_list[1]
+        self.assertEqual(kwargs["json"], {"Customer": {"UID": "Customer"}})
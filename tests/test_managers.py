@@ -1,9 +1,24 @@
+import re
 from datetime import date, datetime
+from decimal import Decimal
+from functools import partial
 from unittest import TestCase
+from unittest.mock import MagicMock, patch
+from uuid import UUID, uuid4
 
-from myob.constants import DEFAULT_PAGE_SIZE
+from myob.constants import DEFAULT_PAGE_SIZE, MAX_FILTER_LENGTH
 from myob.credentials import PartnerCredentials
-from myob.managers import Manager
+from myob.endpoints import CRUD
+from myob.exceptions import MyobConflict
+from myob.filters import build_filter, chunk_values
+from myob.managers import Manager, merge_changes
+from myob.pagination import (
+    PageSizeTuner,
+    iter_adaptive_pages,
+    iter_items,
+    iter_pages,
+    iter_pages_parallel,
+)
 
 
 class QueryParamTests(TestCase):
@@ -55,6 +70,50 @@ class QueryParamTests(TestCase):
         self.assertParamsEqual({"IsActive": True}, {"$filter": "(IsActive eq true)"})
         self.assertParamsEqual({"IsActive": False}, {"$filter": "(IsActive eq false)"})
 
+    def test_filter_lookups(self):
+        self.assertParamsEqual({"Type__ne": "Customer"}, {"$filter": "(Type ne 'Customer')"})
+        self.assertParamsEqual(
+            {"Type__ne": ["Customer", "Supplier"]},
+            {"$filter": "(Type ne 'Customer' and Type ne 'Supplier')"},
+        )
+        self.assertParamsEqual({"Amount__ge": 5}, {"$filter": "(Amount ge 5)"})
+        self.assertParamsEqual({"Amount__lt": Decimal("10.50")}, {"$filter": "(Amount lt 10.50)"})
+        # Only comparisons take numbers as numbers, as eq always has taken them as strings.
+        self.assertParamsEqual({"Number": 5}, {"$filter": "(Number eq '5')"})
+        self.assertParamsEqual(
+            {"Date__le": date(2020, 1, 1)}, {"$filter": "(Date le datetime'2020-01-01')"}
+        )
+        self.assertParamsEqual(
+            {"Type__in": ("Customer", "Supplier")},
+            {"$filter": "(Type eq 'Customer' or Type eq 'Supplier')"},
+        )
+        self.assertParamsEqual(
+            {"CompanyName__startswith": "Acme"},
+            {"$filter": "(startswith(CompanyName, 'Acme'))"},
+        )
+        self.assertParamsEqual(
+            {"CompanyName__endswith": "Ltd"}, {"$filter": "(endswith(CompanyName, 'Ltd'))"}
+        )
+        self.assertParamsEqual(
+            {"CompanyName__contains": "Acme"},
+            {"$filter": "(substringof('Acme', CompanyName))"},
+        )
+        self.assertParamsEqual({"Notes__isnull": True}, {"$filter": "(Notes eq null)"})
+        self.assertParamsEqual({"Notes__isnull": False}, {"$filter": "(Notes ne null)"})
+        # Unknown suffixes are part of the field name.
+        self.assertParamsEqual({"Some__Field": "x"}, {"$filter": "(Some__Field eq 'x')"})
+        with self.assertRaises(ValueError):
+            self.manager.build_request_kwargs("GET", **{"Type__in": []})
+
+    def test_filter_escaping(self):
+        self.assertParamsEqual(
+            {"CompanyName": "O'Brien's"}, {"$filter": "(CompanyName eq 'O''Brien''s')"}
+        )
+        self.assertParamsEqual(
+            {"CompanyName__contains": "O'Brien"},
+            {"$filter": "(substringof('O''Brien', CompanyName))"},
+        )
+
     def test_datetime_filter(self):
         self.assertParamsEqual(
             {"DateOccurred__lt": datetime(1992, 11, 14)},
@@ -72,6 +131,7 @@ class QueryParamTests(TestCase):
         self.assertParamsEqual({"page": 7}, {"$skip": 6 * DEFAULT_PAGE_SIZE})
         self.assertParamsEqual({"limit": 20}, {"$top": 20})
         self.assertParamsEqual({"limit": 20, "page": 7}, {"$top": 20, "$skip": 120})
+        self.assertParamsEqual({"limit": 20, "offset": 35}, {"$top": 20, "$skip": 35})
 
     def test_format(self):
         self.assertParamsEqual({"format": "json"}, {"format": "json"})
@@ -104,3 +164,228 @@ class QueryParamTests(TestCase):
                 "format": "json",
             },
         )
+
+
+class UpdateTests(TestCase):
+    def setUp(self):
+        cred = PartnerCredentials(
+            consumer_key="KeyToTheKingdom",
+            consumer_secret="TellNoOne",  # noqa: S106
+            callback_uri="CallOnlyWhenCalledTo",
+        )
+        self.manager = Manager("Contact/", credentials=cred, endpoints=[(CRUD, "Customer/", "")])
+        self.manager.get_customer = MagicMock(
+            side_effect=[
+                {
+                    "UID": "abc",
+                    "RowVersion": "2",
+                    "Name": "Acme",
+                    "Address": {"City": "A", "Zip": 1},
+                },
+                {
+                    "UID": "abc",
+                    "RowVersion": "3",
+                    "Name": "Acme",
+                    "Address": {"City": "A", "Zip": 2},
+                },
+            ]
+        )
+
+    def test_merge_changes(self):
+        entity = {"A": 1, "B": {"C": 2, "D": 3}, "E": [1]}
+        self.assertEqual(
+            merge_changes(entity, {"B": {"C": 4}, "E": [2]}),
+            {"A": 1, "B": {"C": 4, "D": 3}, "E": [2]},
+        )
+        self.assertEqual(entity, {"A": 1, "B": {"C": 2, "D": 3}, "E": [1]})
+
+    def test_update(self):
+        self.manager.put_customer = MagicMock(return_value={"UID": "abc"})
+        self.assertEqual(
+            self.manager.update("customer", "abc", {"Name": "Acme Ltd"}), {"UID": "abc"}
+        )
+        self.manager.put_customer.assert_called_once_with(
+            uid="abc",
+            data={
+                "UID": "abc",
+                "RowVersion": "2",
+                "Name": "Acme Ltd",
+                "Address": {"City": "A", "Zip": 1},
+            },
+        )
+
+    def test_retries_conflicts(self):
+        self.manager.put_customer = MagicMock(
+            side_effect=[MyobConflict(MagicMock()), {"UID": "abc"}]
+        )
+        self.manager.update(
+            "customer",
+            "abc",
+            {"Address": {"City": "B"}},
+            entity={"UID": "abc", "RowVersion": "1", "Address": {"City": "A", "Zip": 0}},
+            priority="background",
+        )
+        self.assertEqual(
+            [c.kwargs["data"] for c in self.manager.put_customer.call_args_list],
+            [
+                {"UID": "abc", "RowVersion": "1", "Address": {"City": "B", "Zip": 0}},
+                {
+                    "UID": "abc",
+                    "RowVersion": "2",
+                    "Name": "Acme",
+                    "Address": {"City": "B", "Zip": 1},
+                },
+            ],
+        )
+        self.manager.get_customer.assert_called_once_with(uid="abc", priority="background")
+
+    def test_gives_up(self):
+        self.manager.put_customer = MagicMock(side_effect=MyobConflict(MagicMock()))
+        with self.assertRaises(MyobConflict):
+            self.manager.update("customer", "abc", {"Name": "Acme Ltd"}, retries=1)
+        self.assertEqual(self.manager.put_customer.call_count, 2)
+
+    def test_custom_merge(self):
+        self.manager.put_customer = MagicMock()
+        self.manager.update(
+            "customer",
+            "abc",
+            {"Balance": 5},
+            merge=lambda e, c: {**e, "Balance": e.get("Balance", 0) + c["Balance"]},
+        )
+        self.assertEqual(self.manager.put_customer.call_args.kwargs["data"]["Balance"], 5)
+
+    def test_unknown_name(self):
+        with self.assertRaises(AttributeError):
+            self.manager.update("supplier", "abc", {})
+
+
+class GetManyTests(TestCase):
+    def setUp(self):
+        cred = PartnerCredentials(
+            consumer_key="KeyToTheKingdom",
+            consumer_secret="TellNoOne",  # noqa: S106
+            callback_uri="CallOnlyWhenCalledTo",
+        )
+        self.manager = Manager("Contact/", credentials=cred, endpoints=[(CRUD, "Customer/", "")])
+        self.uids = [str(uuid4()) for _ in range(100)]
+        self.existing = set(self.uids[:90])
+
+        def customer(UID, limit):  # noqa: N803
+            self.assertEqual(limit, len(UID))
+            return {"Items": [{"UID": str(u)} for u in UID if str(u) in self.existing]}
+
+        self.manager.customer = MagicMock(side_effect=customer)
+        self.manager.customer.method = "ALL"
+
+    def test_get_many(self):
+        result = self.manager.get_many("customer", self.uids + self.uids[:5])
+        self.assertEqual(set(result["found"]), self.existing)
+        self.assertEqual(result["missing"], self.uids[90:])
+        # Batched, rather than a call per UID.
+        self.assertEqual(self.manager.customer.call_count, len(chunk_values("UID", self.uids)))
+        self.assertGreater(self.manager.customer.call_count, 1)
+
+    def test_case_insensitive(self):
+        result = self.manager.get_many("customer", [self.uids[0].upper()])
+        self.assertEqual(list(result["found"]), [self.uids[0]])
+        self.assertEqual(result["missing"], [])
+
+    def test_needs_all_method(self):
+        with self.assertRaises(AttributeError):
+            self.manager.get_many("put_customer", self.uids)
+
+    def test_chunk_values(self):
+        values = [UUID(uid) for uid in self.uids]
+        chunks = chunk_values("UID", values, max_length=500)
+        self.assertEqual([v for chunk in chunks for v in chunk], values)
+        for chunk in chunks:
+            self.assertLessEqual(len(" or ".join(f"UID eq guid'{v}'" for v in chunk)), 500)
+        self.assertEqual(len(chunk_values("Number", list(range(2500)), max_length=10**9)), 3)
+        # Lookups are measured as they're rendered.
+        chunks = chunk_values("Name__contains", ["ab"] * 10, max_length=100)
+        for chunk in chunks:
+            self.assertLessEqual(len(build_filter("Name__contains", chunk)), 100)
+
+
+class SplitFilterTests(TestCase):
+    def setUp(self):
+        cred = PartnerCredentials(
+            consumer_key="KeyToTheKingdom",
+            consumer_secret="TellNoOne",  # noqa: S106
+            callback_uri="CallOnlyWhenCalledTo",
+        )
+        self.manager = Manager("Contact/", credentials=cred, endpoints=[(CRUD, "Customer/", "")])
+        self.ids = [f"CUS-{i:05}" for i in range(300)]
+
+    def request(self, method, url, **kwargs):
+        filter_ = kwargs["params"]["$filter"]
+        self.assertLessEqual(len(filter_), MAX_FILTER_LENGTH)
+        self.assertIn("(IsActive eq true)", filter_)
+        ids = re.findall(r"DisplayID eq '([^']*)'", filter_)
+        response = MagicMock(status_code=200, headers={"content-type": "application/json"})
+        # The same customer turns up in every run.
+        items = [{"UID": "shared"}] + [{"UID": f"uid-{i}", "DisplayID": i} for i in ids]
+        skip = kwargs["params"].get("$skip", 0)
+        top = kwargs["params"].get("$top", DEFAULT_PAGE_SIZE)
+        response.json.return_value = {
+            "Items": items[skip : skip + top],
+            "NextPageLink": "next" if skip + top < len(items) else None,
+            "Count": len(items),
+        }
+        return response
+
+    @patch("myob.managers.requests.request")
+    def test_splits_long_filters(self, mock_request):
+        mock_request.side_effect = self.request
+        result = self.manager.customer(DisplayID=self.ids, IsActive=True)
+        self.assertGreater(mock_request.call_count, 1)
+        self.assertEqual(result["Count"], 301)
+        self.assertEqual(len(result["Items"]), 301)
+        self.assertEqual(sum(item["UID"] == "shared" for item in result["Items"]), 1)
+        self.assertIsNone(result["NextPageLink"])
+
+    @patch("myob.managers.requests.request")
+    def test_pages_merged_results(self, mock_request):
+        mock_request.side_effect = self.request
+        result = self.manager.customer(DisplayID=self.ids, IsActive=True, page=2, limit=100)
+        self.assertEqual(len(result["Items"]), 100)
+        self.assertEqual(result["Count"], 301)
+        self.assertIn("%24skip=200", result["NextPageLink"])
+
+        items = list(
+            iter_items(self.manager.customer, limit=100, DisplayID=self.ids, IsActive=True)
+        )
+        self.assertEqual(len(items), 301)
+
+    @patch("myob.managers.requests.request")
+    def test_walk_fetches_runs_once(self, mock_request):
+        mock_request.side_effect = self.request
+        self.manager.customer(DisplayID=self.ids, IsActive=True)
+        runs = mock_request.call_count
+        walks = (
+            iter_pages,
+            partial(iter_pages_parallel, workers=1),
+            partial(iter_adaptive_pages, tuner=PageSizeTuner()),
+        )
+        for walk in walks:
+            mock_request.reset_mock()
+            pages = list(walk(self.manager.customer, DisplayID=self.ids, IsActive=True))
+            # Each run is walked by itself, rather than every page merging them all.
+            self.assertEqual(mock_request.call_count, runs)
+            items = [item for page in pages for item in page["Items"]]
+            self.assertEqual(len(items), 301)
+
+    @patch("myob.managers.requests.request")
+    def test_nothing_kept_between_calls(self, mock_request):
+        mock_request.side_effect = self.request
+        self.manager.customer(DisplayID=self.ids, IsActive=True, limit=100)
+        runs = mock_request.call_count
+        self.manager.customer(DisplayID=self.ids, IsActive=True, limit=100, page=2)
+        self.assertEqual(mock_request.call_count, 2 * runs)
+
+    @patch("myob.managers.requests.request")
+    def test_short_filters_not_split(self, mock_request):
+        mock_request.side_effect = self.request
+        self.manager.customer(DisplayID=self.ids[:5], IsActive=True)
+        self.assertEqual(mock_request.call_count, 1)
@@ -0,0 +1,193 @@
+import os
+import pickle
+import sqlite3
+import tempfile
+import time
+from decimal import Decimal
+from unittest import TestCase
+from unittest.mock import patch
+
+from myob import Myob
+from myob.codecs import JsonCodec
+from myob.credentials import PartnerCredentials
+from myob.exceptions import MyobOutboxFailed
+from myob.outbox import DONE, FAILED, IN_FLIGHT, PENDING, Outbox, OutboxFlusher
+
+CID = "DummyCompanyId"
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "outbox.db")
+        self.outbox = Outbox(self.path)
+        cred = PartnerCredentials(
+            consumer_key="KeyToTheKingdom",
+            consumer_secret="TellNoOne",  # noqa: S106
+            callback_uri="CallOnlyWhenCalledTo",
+        )
+        self.myob = Myob(cred, outbox=self.outbox)
+        self.companyfile = self.myob.companyfiles.get(CID, call=False)
+        self.flusher = OutboxFlusher(self.outbox, self.myob, backoff=0)
+
+    def tearDown(self):
+        self.outbox.close()
+        self.tmp.cleanup()
+
+    @patch("myob.managers.requests.request")
+    def test_deferred_write_flushed(self, mock_request):
+        handle = self.companyfile.contacts.post_customer(data={"Name": "Acme"}, defer=True)
+        self.assertEqual(mock_request.call_count, 0)
+        self.assertEqual(handle.status(), PENDING)
+        self.assertEqual(self.outbox.pending(), 1)
+
+        mock_request.return_value.status_code = 201
+        mock_request.return_value.content = b""
+        self.assertEqual(self.flusher.flush(), 1)
+        self.assertEqual(mock_request.call_count, 1)
+        self.assertEqual(mock_request.call_args[0][0], "POST")
+        self.assertEqual(mock_request.call_args[1]["json"], {"Name": "Acme"})
+        self.assertEqual(handle.status(), DONE)
+        self.assertTrue(handle.done())
+        self.assertEqual(self.outbox.pending(), 0)
+
+    def test_defer_needs_write_and_outbox(self):
+        with self.assertRaises(ValueError):
+            self.companyfile.contacts.customer(defer=True)
+        self.companyfile.contacts.outbox = None
+        with self.assertRaises(ValueError):
+            self.companyfile.contacts.post_customer(data={}, defer=True)
+
+    def test_writes_to_same_uid_claimed_in_order(self):
+        first = self.companyfile.contacts.put_customer(uid="1", data={"A": 1}, defer=True)
+        second = self.companyfile.contacts.put_customer(uid="1", data={"A": 2}, defer=True)
+        other = self.companyfile.contacts.put_customer(uid="2", data={"A": 3}, defer=True)
+
+        rows = self.outbox.claim(10)
+        self.assertEqual([r["id"] for r in rows], [first.id, other.id])
+        # The second write waits until the first is done.
+        self.assertEqual(self.outbox.claim(10), [])
+        self.outbox.complete(first.id, None)
+        self.assertEqual([r["id"] for r in self.outbox.claim(10)], [second.id])
+
+    @patch("myob.managers.requests.request")
+    def test_retryable_errors_retried(self, mock_request):
+        handle = self.companyfile.contacts.put_customer(uid="1", data={}, defer=True)
+        mock_request.return_value.status_code = 504
+        self.flusher.backoff = 60
+        self.assertEqual(self.flusher.flush(), 1)
+        self.assertEqual(handle.status(), PENDING)
+        self.assertGreater(self.outbox.next_due(), time.time() + 30)
+        # Not due yet.
+        self.assertEqual(self.flusher.flush(), 0)
+
+    @patch("myob.managers.requests.request")
+    def test_gives_up_after_max_attempts(self, mock_request):
+        handle = self.companyfile.contacts.put_customer(uid="1", data={}, defer=True)
+        mock_request.return_value.status_code = 504
+        self.flusher.max_attempts = 3
+        self.assertEqual(self.flusher.flush(), 3)
+        self.assertEqual(handle.status(), FAILED)
+        with self.assertRaises(MyobOutboxFailed):
+            handle.result(timeout=0)
+
+    @patch("myob.managers.requests.request")
+    def test_permanent_errors_fail_straight_away(self, mock_request):
+        handle = self.companyfile.contacts.put_customer(uid="1", data={}, defer=True)
+        later = self.companyfile.contacts.put_customer(uid="1", data={}, defer=True)
+        mock_request.return_value.status_code = 400
+        self.assertEqual(self.flusher.flush(), 2)
+        self.assertEqual(handle.status(), FAILED)
+        self.assertEqual(later.status(), FAILED)
+        self.assertEqual(mock_request.call_count, 2)
+
+    def test_result_times_out(self):
+        handle = self.companyfile.contacts.delete_customer(uid="1", defer=True)
+        with self.assertRaises(TimeoutError):
+            handle.result(timeout=0.01)
+
+    @patch("myob.managers.requests.request")
+    def test_background_flushing_survives_errors(self, mock_request):
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.content = b""
+        handle = self.companyfile.contacts.delete_customer(uid="1", defer=True)
+        claim = self.outbox.claim
+        errors = [sqlite3.OperationalError("database is locked")]
+
+        def flaky_claim(limit):
+            if errors:
+                raise errors.pop()
+            return claim(limit)
+
+        with (
+            patch.object(self.outbox, "claim", side_effect=flaky_claim),
+            self.assertLogs("myob.outbox", "ERROR"),
+        ):
+            self.flusher.start(interval=0.01)
+            try:
+                self.assertIsNone(handle.result(timeout=5))
+            finally:
+                self.flusher.stop()
+
+    def test_survives_restart(self):
+        handle = self.companyfile.contacts.put_customer(uid="1", data={"A": 1}, defer=True)
+        self.outbox.claim(10)
+        self.assertEqual(handle.status(), IN_FLIGHT)
+        self.outbox.close()
+
+        self.outbox = Outbox(self.path, recover=True)
+        rows = self.outbox.claim(10)
+        self.assertEqual([r["id"] for r in rows], [handle.id])
+        self.assertEqual(rows[0]["method_name"], "put_customer")
+
+    def test_unpickling_leaves_writes_in_flight(self):
+        handle = self.companyfile.contacts.put_customer(uid="1", data={"A": 1}, defer=True)
+        self.outbox.claim(10)
+        companyfile = pickle.loads(pickle.dumps(self.companyfile))
+        self.addCleanup(companyfile.contacts.outbox.close)
+        self.assertEqual(handle.status(), IN_FLIGHT)
+        self.assertEqual(self.outbox.claim(10), [])
+
+
+class OutboxCodecTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.outbox = Outbox(os.path.join(self.tmp.name, "outbox.db"))
+        cred = PartnerCredentials(
+            consumer_key="KeyToTheKingdom",
+            consumer_secret="TellNoOne",  # noqa: S106
+            callback_uri="CallOnlyWhenCalledTo",
+        )
+        self.myob = Myob(cred, codec=JsonCodec(use_decimal=True), outbox=self.outbox)
+        self.companyfile = self.myob.companyfiles.get(CID, call=False)
+        self.flusher = OutboxFlusher(self.outbox, self.myob, backoff=0)
+
+    def tearDown(self):
+        self.outbox.close()
+        self.tmp.cleanup()
+
+    @patch("myob.managers.requests.request")
+    def test_decimals_survive(self, mock_request):
+        handle = self.companyfile.invoices.put_item(
+            uid="1", data={"Total": Decimal("1.10")}, defer=True
+        )
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.headers = {"content-type": "application/json"}
+        mock_request.return_value.content = b'{"UID":"1","Total":1.10}'
+        self.assertEqual(self.flusher.flush(), 1)
+        self.assertEqual(mock_request.call_args[1]["data"], b'{"Total":1.10}')
+        self.assertEqual(handle.result(timeout=0), {"UID": "1", "Total": Decimal("1.10")})
+
+    def test_unstorable_result_completes_write(self):
+        handle = self.companyfile.contacts.put_customer(uid="1", data={}, defer=True)
+        later = self.companyfile.contacts.put_customer(uid="1", data={}, defer=True)
+        with patch.object(self.flusher, "_method") as method:
+            method.return_value.return_value = {"Tags": {"a", "b"}}
+            method.return_value.manager.codec = None
+            self.assertEqual(self.flusher.flush(), 2)
+        # It was sent, so it's done (not failed, inviting a retry), just without its result.
+        self.assertEqual(handle.status(), DONE)
+        self.assertIsNone(handle.result(timeout=0))
+        self.assertIn("couldn't store the result", self.outbox._row(handle.id)["error"])
+        # Later writes to the entity aren't left stuck behind it.
+        self.assertEqual(later.status(), DONE)
@@ -0,0 +1,262 @@
+from datetime import date, datetime, timedelta
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from myob.exceptions import MyobGatewayTimeout
+from myob.pagination import (
+    PageSizeTuner,
+    iter_adaptive_items,
+    iter_date_range_items,
+    iter_items,
+    iter_keyset_items,
+    iter_keyset_pages,
+    iter_pages_parallel,
+)
+
+
+class OffsetPaginationTests(TestCase):
+    def test_iter_items_walks_pages(self):
+        pages = {
+            1: {"Items": [1, 2], "NextPageLink": "next"},
+            2: {"Items": [3, 4], "NextPageLink": "next"},
+            3: {"Items": [5], "NextPageLink": None},
+        }
+        func = MagicMock(side_effect=lambda page, limit, **kwargs: pages[page])
+        self.assertEqual(list(iter_items(func, limit=2, Type="Customer")), [1, 2, 3, 4, 5])
+        func.assert_called_with(page=3, limit=2, Type="Customer")
+        self.assertEqual(list(iter_items(func, limit=2, read_ahead=2)), [1, 2, 3, 4, 5])
+
+    def test_iter_pages_parallel(self):
+        def func(page, limit, **kwargs):
+            items = list(range(10))[(page - 1) * limit : page * limit]
+            return {"Items": items, "Count": 10, "NextPageLink": "next" if items else None}
+
+        func = MagicMock(side_effect=func)
+        pages = list(iter_pages_parallel(func, limit=3, workers=3, page=2))
+        self.assertEqual([p["Items"] for p in pages], [[3, 4, 5], [6, 7, 8], [9]])
+        self.assertEqual(sorted(c.kwargs["page"] for c in func.call_args_list), [2, 3, 4])
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.rows = [
+            {"UID": f"uid-{i:02}", "LastModified": f"2024-01-{i // 2 + 1:02}"} for i in range(5)
+        ]
+
+    def test_walks_by_key(self):
+        def func(orderby, limit, raw_filter=None, **kwargs):
+            self.assertEqual(orderby, "UID")
+            after = raw_filter and raw_filter.split("'")[1]
+            rows = [r for r in self.rows if after is None or r["UID"] > after]
+            return {"Items": rows[:limit]}
+
+        func = MagicMock(side_effect=func)
+        self.assertEqual(
+            list(iter_keyset_items(func, key="UID", limit=2, Type="Customer")), self.rows
+        )
+        self.assertEqual(
+            [c.kwargs.get("raw_filter") for c in func.call_args_list],
+            [None, "(UID gt 'uid-01')", "(UID gt 'uid-03')"],
+        )
+        self.assertTrue(all(c.kwargs["Type"] == "Customer" for c in func.call_args_list))
+
+    def test_tiebreak(self):
+        func = MagicMock(return_value={"Items": self.rows[:2]})
+        pages = iter_keyset_pages(
+            func, key="LastModified", tiebreak="UID", limit=2, raw_filter="X eq 1"
+        )
+        next(pages)
+        func.assert_called_with(orderby="LastModified,UID", limit=2, raw_filter="(X eq 1)")
+        next(pages)
+        func.assert_called_with(
+            orderby="LastModified,UID",
+            limit=2,
+            raw_filter=(
+                "(X eq 1) and (LastModified gt datetime'2024-01-01' or "
+                "(LastModified eq datetime'2024-01-01' and UID gt 'uid-01'))"
+            ),
+        )
+
+    def test_keys_filtered_as_their_type(self):
+        uid = "9d8bc0a4-1f3e-4c9f-9d36-1a2b3c4d5e6f"
+        func = MagicMock(return_value={"Items": [{"UID": uid, "LastModified": "x"}] * 2})
+        pages = iter_keyset_pages(func, key="UID", limit=2)
+        next(pages)
+        next(pages)
+        func.assert_called_with(orderby="UID", limit=2, raw_filter=f"(UID gt guid'{uid}')")
+
+    def test_tiebreak_with_single_start_key(self):
+        func = MagicMock(return_value={"Items": []})
+        list(
+            iter_keyset_pages(
+                func, key="LastModified", tiebreak="UID", LastModified__gt="2024-01-01T00:00:00"
+            )
+        )
+        func.assert_called_once_with(
+            orderby="LastModified,UID",
+            limit=400,
+            raw_filter="(LastModified gt datetime'2024-01-01T00:00:00')",
+        )
+
+    def test_after(self):
+        func = MagicMock(return_value={"Items": []})
+        list(iter_keyset_pages(func, key="RowVersion", after="123"))
+        func.assert_called_once_with(
+            orderby="RowVersion", limit=400, raw_filter="(RowVersion gt '123')"
+        )
+        # Numeric keys are compared as numbers.
+        func.reset_mock()
+        list(iter_keyset_pages(func, key="Number", after=7))
+        func.assert_called_once_with(orderby="Number", limit=400, raw_filter="(Number gt 7)")
+
+    def test_rejects_offset_kwargs(self):
+        with self.assertRaises(ValueError):
+            next(iter_keyset_pages(MagicMock(), key="UID", page=2))
+        with self.assertRaises(ValueError):
+            next(iter_keyset_pages(MagicMock(), key="UID", orderby="Name"))
+
+
+class AdaptivePaginationTests(TestCase):
+    def test_tuner(self):
+        tuner = PageSizeTuner(target_seconds=2, max_page_bytes=1000, initial_size=100)
+        # Fast full pages grow.
+        tuner.record("a", 100, 100, 0.1, 100)
+        self.assertEqual(tuner.size("a"), 150)
+        # Fast partial pages tell us nothing.
+        tuner.record("a", 150, 20, 0.1, 100)
+        self.assertEqual(tuner.size("a"), 150)
+        # Slow pages shrink in proportion, but by no more than half.
+        tuner.record("a", 150, 150, 3, 100)
+        self.assertEqual(tuner.size("a"), 100)
+        tuner.record("a", 100, 100, 60, 100)
+        self.assertEqual(tuner.size("a"), 50)
+        # As do fat pages.
+        tuner.record("a", 50, 50, 0.1, 1250)
+        self.assertEqual(tuner.size("a"), 40)
+        # Errors halve, down to the minimum.
+        for _ in range(5):
+            tuner.record_error("a", tuner.size("a"))
+        self.assertEqual(tuner.size("a"), 25)
+        # Endpoints are tuned independently, and within MYOB's limit.
+        self.assertEqual(tuner.size("b"), 100)
+        for _ in range(20):
+            tuner.record("b", tuner.size("b"), tuner.size("b"), 0.1, 10)
+        self.assertEqual(tuner.size("b"), 1000)
+        self.assertEqual(PageSizeTuner(sizes=tuner.sizes).size("b"), 1000)
+
+    def test_iter_adaptive_items(self):
+        rows = list(range(1000))
+
+        def func(offset, limit, **kwargs):
+            if limit > 200:
+                raise MyobGatewayTimeout(MagicMock())
+            items = rows[offset : offset + limit]
+            return {"Items": items, "NextPageLink": "next" if offset + limit < len(rows) else None}
+
+        func = MagicMock(side_effect=func)
+        tuner = PageSizeTuner(initial_size=400)
+        self.assertEqual(
+            list(iter_adaptive_items(func, tuner=tuner, key="x", Type="Customer")), rows
+        )
+        self.assertLessEqual(tuner.size("x"), 300)
+        self.assertEqual(
+            func.call_args_list[0].kwargs, {"offset": 0, "limit": 400, "Type": "Customer"}
+        )
+        self.assertEqual(func.call_args_list[1].kwargs["limit"], 200)
+
+    def test_default_tuner_shared_between_walks(self):
+        func = MagicMock(side_effect=MyobGatewayTimeout(MagicMock()))
+        func.endpoint = "Sale/Invoice/Item/"
+        with patch("myob.pagination.DEFAULT_TUNER", PageSizeTuner(initial_size=400)):
+            with self.assertRaises(MyobGatewayTimeout):
+                list(iter_adaptive_items(func, retries=0))
+            func.reset_mock()
+            with self.assertRaises(MyobGatewayTimeout):
+                list(iter_adaptive_items(func, retries=0))
+        # The second walk starts from what the first learned.
+        self.assertEqual(func.call_args.kwargs["limit"], 200)
+
+    def test_gives_up_after_retries(self):
+        func = MagicMock(side_effect=MyobGatewayTimeout(MagicMock()))
+        with self.assertRaises(MyobGatewayTimeout):
+            list(iter_adaptive_items(func, retries=2))
+        self.assertEqual(func.call_count, 3)
+
+
+class DateRangePaginationTests(TestCase):
+    def setUp(self):
+        start = datetime(2024, 1, 1)
+        # Most rows fall in one busy week.
+        self.rows = [
+            {"UID": f"uid-{i:03}", "Date": start + timedelta(days=i % 60)} for i in range(60)
+        ] + [
+            {"UID": f"busy-{i:03}", "Date": start + timedelta(days=20, hours=i)} for i in range(150)
+        ]
+
+    def func(self, orderby, offset, limit, Date__ge, Date__lt, **kwargs):  # noqa: N803
+        self.assertEqual(orderby, "Date,UID")
+        rows = sorted(
+            (r for r in self.rows if Date__ge <= r["Date"] < Date__lt),
+            key=lambda r: (r["Date"], r["UID"]),
+        )
+        items = rows[offset : offset + limit]
+        return {
+            "Items": items,
+            "Count": len(rows),
+            "NextPageLink": "next" if offset + limit < len(rows) else None,
+        }
+
+    def expected(self):
+        return sorted(self.rows, key=lambda r: (r["Date"], r["UID"]))
+
+    def test_walks_partitions_in_order(self):
+        func = MagicMock(side_effect=self.func)
+        items = list(
+            iter_date_range_items(
+                func, "Date", datetime(2024, 1, 1), datetime(2024, 3, 1), partitions=4, limit=20
+            )
+        )
+        self.assertEqual(items, self.expected())
+
+    def test_subdivides_dense_partitions(self):
+        func = MagicMock(side_effect=self.func)
+        items = list(
+            iter_date_range_items(
+                func,
+                "Date",
+                datetime(2024, 1, 1),
+                datetime(2024, 3, 1),
+                partitions=2,
+                max_rows=40,
+                Type="Sale",
+            )
+        )
+        self.assertEqual(items, self.expected())
+        self.assertTrue(all(c.kwargs["Type"] == "Sale" for c in func.call_args_list))
+        # The busy spans were halved.
+        spans = [c for c in func.call_args_list if c.kwargs["offset"] == 0]
+        self.assertGreater(len(spans), 2)
+
+    def test_dates(self):
+        self.rows = [
+            {"UID": str(i), "Date": date(2024, 1, 1) + timedelta(days=i)} for i in range(10)
+        ]
+        func = MagicMock(side_effect=self.func)
+        items = list(
+            iter_date_range_items(
+                func, "Date", date(2024, 1, 1), date(2024, 1, 4), partitions=8, max_rows=0
+            )
+        )
+        self.assertEqual([r["UID"] for r in items], ["0", "1", "2"])
+        # Spans can't be split finer than a day.
+        self.assertTrue(
+            all(c.kwargs["Date__lt"] > c.kwargs["Date__ge"] for c in func.call_args_list)
+        )
+
+    def test_rejects_paging_kwargs(self):
+        with self.assertRaises(ValueError):
+            next(
+                iter_date_range_items(
+                    MagicMock(), "Date", date(2024, 1, 1), date(2024, 2, 1), page=2
+                )
+            )
@@ -0,0 +1,105 @@
+import os
+import pickle
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from unittest import TestCase
+from unittest.mock import patch
+
+from myob import Myob
+from myob.breaker import CircuitBreaker
+from myob.codecs import JsonCodec
+from myob.credentials import PartnerCredentials
+from myob.managers import Manager
+from myob.outbox import Outbox
+from myob.scheduler import Scheduler
+
+CID = "DummyCompanyId"
+
+
+def describe(companyfile):
+    # Runs in a worker process.
+    return companyfile.contacts.customer.endpoint, companyfile.credentials.oauth_token
+
+
+class PickleTests(TestCase):
+    def setUp(self):
+        self.cred = PartnerCredentials(
+            consumer_key="KeyToTheKingdom",
+            consumer_secret="TellNoOne",  # noqa: S106
+            callback_uri="CallOnlyWhenCalledTo",
+            oauth_token="Token",  # noqa: S106
+            oauth_expires_at=datetime(2030, 1, 1),
+        )
+        self.tmp = tempfile.TemporaryDirectory()
+        self.outbox = Outbox(os.path.join(self.tmp.name, "outbox.db"))
+        self.myob = Myob(
+            self.cred,
+            coalesce=True,
+            codec=JsonCodec(use_decimal=True),
+            scheduler=Scheduler(per_company=2),
+            breaker=CircuitBreaker(failure_threshold=3),
+            outbox=self.outbox,
+        )
+        self.companyfile = self.myob.companyfiles.get(CID, call=False)
+
+    def tearDown(self):
+        self.outbox.close()
+        self.tmp.cleanup()
+
+    def test_credentials(self):
+        self.cred.state_listeners.append(lambda cred: None)
+        cred = pickle.loads(pickle.dumps(self.cred))
+        self.assertEqual(cred.state, self.cred.state)
+        self.assertEqual(cred.state_listeners, [])
+
+    def test_manager(self):
+        manager = pickle.loads(pickle.dumps(self.companyfile.contacts))
+        self.assertIsInstance(manager, Manager)
+        self.assertEqual(manager.company_id, CID)
+        self.assertEqual(manager.method_details, self.companyfile.contacts.method_details)
+        self.assertEqual(manager.customer.endpoint, self.companyfile.contacts.customer.endpoint)
+        self.assertTrue(manager.codec.use_decimal)
+        self.assertEqual(manager.scheduler.per_company, 2)
+        self.assertEqual(manager.breaker.failure_threshold, 3)
+        self.assertEqual(manager.outbox.path, self.outbox.path)
+        manager.outbox.close()
+
+    def test_manager_pickles_endpoints_by_key(self):
+        self.assertNotIn(b"supplier contact", pickle.dumps(self.companyfile.contacts))
+        manager = pickle.loads(pickle.dumps(self.myob.companyfiles._manager))
+        self.assertEqual(manager.name, "CompanyFile")
+        self.assertEqual(set(manager.method_details), {"all", "get"})
+
+    def test_companyfile(self):
+        companyfile = pickle.loads(pickle.dumps(self.companyfile))
+        self.assertEqual(companyfile.id, CID)
+        # Managers share one set of credentials and options, as before pickling.
+        self.assertIs(companyfile.contacts.credentials, companyfile.invoices.credentials)
+        self.assertIs(companyfile.contacts.single_flight, companyfile.invoices.single_flight)
+        self.assertIsNot(
+            companyfile.contacts.single_flight, self.companyfile.contacts.single_flight
+        )
+        self.assertIn(
+            companyfile.reference_data._on_write, companyfile.general_ledger.write_listeners
+        )
+        companyfile.contacts.outbox.close()
+
+    @patch("myob.managers.requests.request")
+    def test_unpickled_companyfile_makes_requests(self, mock_request):
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.content = b'{"Items": []}'
+        companyfile = pickle.loads(pickle.dumps(self.companyfile))
+        self.assertEqual(companyfile.contacts.customer(), {"Items": []})
+        self.assertEqual(
+            mock_request.call_args[0][1],
+            f"https://api.myob.com/accountright/{CID}/Contact/Customer/",
+        )
+        companyfile.contacts.outbox.close()
+
+    def test_process_pool(self):
+        myob = Myob(self.cred, coalesce=True)
+        companyfile = myob.companyfiles.get(CID, call=False)
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            result = executor.submit(describe, companyfile).result(timeout=30)
+        self.assertEqual(result, (companyfile.contacts.customer.endpoint, "Token"))
@@ -0,0 +1,70 @@
+from datetime import datetime
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from myob.pool import ClientPool
+
+
+def load_state(tenant):
+    return {
+        "consumer_key": "KeyToTheKingdom",
+        "consumer_secret": "TellNoOne",
+        "callback_uri": "CallOnlyWhenCalledTo",
+        "verified": True,
+        "oauth_token": f"token-{tenant}",
+        "refresh_token": f"refresh-{tenant}",
+        "oauth_expires_at": datetime(2100, 1, 1),
+    }
+
+
+class ClientPoolTests(TestCase):
+    def test_reuses_clients(self):
+        loader = MagicMock(side_effect=load_state)
+        pool = ClientPool(loader)
+        myob = pool.get("a")
+        self.assertIs(pool.get("a"), myob)
+        self.assertEqual(myob.credentials.oauth_token, "token-a")
+        comp = pool.companyfile("a", "cid")
+        self.assertIs(pool.companyfile("a", "cid"), comp)
+        self.assertIs(comp.contacts.session, pool.checkout("a").session)
+        loader.assert_called_once_with("a")
+
+    def test_lru_eviction(self):
+        pool = ClientPool(load_state, max_clients=2)
+        a = pool.checkout("a")
+        pool.get("b")
+        pool.get("a")
+        pool.get("c")
+        self.assertEqual(len(pool), 2)
+        self.assertIn("a", pool)
+        self.assertNotIn("b", pool)
+        self.assertIs(pool.checkout("a"), a)
+
+    def test_weight_budget(self):
+        pool = ClientPool(load_state, max_weight=3, weigh=lambda c: 1 + len(c.companyfiles))
+        pool.companyfile("a", "cid-1")
+        pool.companyfile("a", "cid-2")
+        pool.get("b")
+        self.assertNotIn("a", pool)
+        self.assertIn("b", pool)
+        with self.assertRaises(ValueError):
+            ClientPool(load_state, max_weight=3)
+
+    def test_state_change_callback(self):
+        on_state_change = MagicMock()
+        pool = ClientPool(load_state, on_state_change=on_state_change)
+        pool.get("a").credentials.save_token(
+            {"access_token": "new", "refresh_token": "new-refresh", "expires_at": 4102444800}
+        )
+        on_state_change.assert_called_once()
+        tenant, state = on_state_change.call_args.args
+        self.assertEqual(tenant, "a")
+        self.assertEqual(state["oauth_token"], "new")
+
+    def test_refreshes_expired_tokens(self):
+        pool = ClientPool(
+            lambda tenant: {**load_state(tenant), "oauth_expires_at": datetime(2000, 1, 1)}
+        )
+        with patch("myob.credentials.PartnerCredentials.refresh") as mock_refresh:
+            pool.get("a")
+        mock_refresh.assert_called_once()
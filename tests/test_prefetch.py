@@ -0,0 +1,156 @@
+import json
+import re
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+from uuid import UUID, uuid4
+
+from myob import Myob
+from myob.credentials import PartnerCredentials
+from myob.filters import build_value
+from myob.prefetch import fetch_by_uid, references
+
+CID = "DummyCompanyId"
+BASE_URL = f"https://api.myob.com/accountright/{CID}/"
+
+
+def ref(collection, uid):
+    return {"UID": uid, "URI": f"{BASE_URL}{collection}{uid}"}
+
+
+class ReferencesTests(TestCase):
+    def test_dotted_paths(self):
+        items = [
+            {"Customer": {"UID": "c1"}, "Lines": [{"Item": {"UID": "i1"}}, {"Item": None}]},
+            {"Customer": None, "Lines": [{"Item": {"UID": "i2"}}, {}]},
+        ]
+        self.assertEqual([r["UID"] for r in references(items, "Customer")], ["c1"])
+        self.assertEqual([r["UID"] for r in references(items, "Lines.Item")], ["i1", "i2"])
+        self.assertEqual(list(references(items, "Missing.Path")), [])
+
+    def test_guid_values(self):
+        uid = uuid4()
+        self.assertEqual(build_value(uid), f"guid'{uid}'")
+
+
+class PrefetchTests(TestCase):
+    def setUp(self):
+        cred = PartnerCredentials(
+            consumer_key="KeyToTheKingdom",
+            consumer_secret="TellNoOne",  # noqa: S106
+            callback_uri="CallOnlyWhenCalledTo",
+        )
+        self.companyfile = Myob(cred).companyfiles.get(CID, call=False)
+        self.customers = [str(uuid4()) for _ in range(50)]
+        self.items = [str(uuid4()) for _ in range(3)]
+        self.invoices = [
+            {
+                "UID": str(uuid4()),
+                "Customer": ref("Contact/Customer/", self.customers[i % 50]),
+                "Lines": [
+                    {"Item": ref("Inventory/Item/", self.items[i % 3])},
+                    {"Item": ref("Inventory/Item/", self.items[(i + 1) % 3])},
+                ],
+            }
+            for i in range(100)
+        ]
+
+    def request(self, method, url, **kwargs):
+        response = MagicMock(status_code=200, headers={"content-type": "application/json"})
+        if url == f"{BASE_URL}Sale/Invoice/Item/":
+            body = {"Items": self.invoices}
+        else:
+            uids = re.findall(r"guid'([^']*)'", kwargs["params"]["$filter"])
+            body = {"Items": [{"UID": uid, "Name": f"Name {uid}"} for uid in uids]}
+        # Fresh dicts each time, as from the wire.
+        response.json.return_value = json.loads(json.dumps(body))
+        return response
+
+    @patch("myob.managers.requests.request")
+    def test_prefetch(self, mock_request):
+        mock_request.side_effect = self.request
+        page = self.companyfile.invoices.item(prefetch=["Customer", "Lines.Item"])
+
+        # One for the invoices, two batches of customers and one of items.
+        self.assertEqual(mock_request.call_count, 4)
+        urls = sorted(call[0][1] for call in mock_request.call_args_list)
+        self.assertEqual(
+            urls,
+            [
+                f"{BASE_URL}Contact/Customer/",
+                f"{BASE_URL}Contact/Customer/",
+                f"{BASE_URL}Inventory/Item/",
+                f"{BASE_URL}Sale/Invoice/Item/",
+            ],
+        )
+        for invoice in page["Items"]:
+            customer = invoice["Customer"]
+            self.assertEqual(customer["Name"], f"Name {customer['UID']}")
+            for line in invoice["Lines"]:
+                self.assertEqual(line["Item"]["Name"], f"Name {line['Item']['UID']}")
+
+    @patch("myob.managers.requests.request")
+    def test_prefetch_single_entity(self, mock_request):
+        invoice = self.invoices[0]
+
+        def request(method, url, **kwargs):
+            if url.endswith(f"/{invoice['UID']}/"):
+                response = MagicMock(status_code=200, headers={"content-type": "application/json"})
+                response.json.return_value = invoice
+                return response
+            return self.request(method, url, **kwargs)
+
+        mock_request.side_effect = request
+        result = self.companyfile.invoices.get_item(uid=invoice["UID"], prefetch=["Customer"])
+        self.assertEqual(mock_request.call_count, 2)
+        self.assertIn("Name", result["Customer"])
+
+    @patch("myob.managers.requests.request")
+    def test_prefetch_from_other_hosts(self, mock_request):
+        # MYOB may point references at another host; fetch them through our own.
+        for invoice in self.invoices:
+            invoice["Customer"]["URI"] = invoice["Customer"]["URI"].replace("api.", "arl2.api.")
+        mock_request.side_effect = self.request
+        page = self.companyfile.invoices.item(prefetch=["Customer"])
+        urls = {call[0][1] for call in mock_request.call_args_list}
+        self.assertEqual(urls, {f"{BASE_URL}Contact/Customer/", f"{BASE_URL}Sale/Invoice/Item/"})
+        self.assertIn("Name", page["Items"][0]["Customer"])
+
+    @patch("myob.managers.requests.request")
+    def test_coalesced_results_left_alone(self, mock_request):
+        cred = PartnerCredentials(
+            consumer_key="KeyToTheKingdom",
+            consumer_secret="TellNoOne",  # noqa: S106
+            callback_uri="CallOnlyWhenCalledTo",
+        )
+        manager = Myob(cred, coalesce=True).companyfiles.get(CID, call=False).invoices
+        mock_request.side_effect = self.request
+        # As handed to every caller waiting on the same request.
+        shared = {"Items": json.loads(json.dumps(self.invoices))}
+        calls = []
+
+        def do(key, call):
+            # The invoices come from the shared result; the prefetches are made as usual.
+            calls.append(key)
+            return shared if len(calls) == 1 else call()
+
+        with patch.object(manager.single_flight, "do", side_effect=do):
+            page = manager.item(prefetch=["Customer"])
+        self.assertIn("Name", page["Items"][0]["Customer"])
+        self.assertNotIn("Name", shared["Items"][0]["Customer"])
+
+    def test_prefetch_reads_only(self):
+        with self.assertRaises(ValueError):
+            self.companyfile.invoices.put_item(uid="1", data={}, prefetch=["Customer"])
+
+    @patch("myob.managers.requests.request")
+    def test_fetch_by_uid(self, mock_request):
+        mock_request.side_effect = self.request
+        manager = self.companyfile.contacts
+        found = fetch_by_uid(
+            manager, f"{BASE_URL}Contact/Customer/", self.customers, max_length=20 * 53
+        )
+        self.assertEqual(set(found), set(self.customers))
+        self.assertEqual(mock_request.call_count, 3)
+        tops = sorted(call[1]["params"]["$top"] for call in mock_request.call_args_list)
+        self.assertEqual(tops, [10, 20, 20])
+        UUID(re.findall(r"guid'([^']*)'", mock_request.call_args[1]["params"]["$filter"])[0])
@@ -0,0 +1,90 @@
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from myob import Myob
+from myob.credentials import PartnerCredentials
+
+CID = "DummyCompanyId"
+BASE = f"https://api.myob.com/accountright/{CID}/GeneralLedger/"
+
+COLLECTIONS = {
+    BASE + "TaxCode/": [{"UID": "tax-1", "Code": "GST"}, {"UID": "tax-2", "Code": "FRE"}],
+    BASE + "Account/": [{"UID": "acc-1", "DisplayID": "1-1100"}],
+    BASE + "Category/": [{"UID": "cat-1", "DisplayID": "CAT1"}],
+}
+
+
+def fake_request(method, url, **kwargs):
+    response = MagicMock()
+    response.headers = {"content-type": "application/json"}
+    if method == "GET":
+        response.status_code = 200
+        response.json.return_value = {"Items": COLLECTIONS[url], "NextPageLink": None}
+    else:
+        response.status_code = 200
+        response.json.return_value = {}
+    return response
+
+
+@patch("myob.managers.requests.request", side_effect=fake_request)
+class ReferenceDataTests(TestCase):
+    def setUp(self):
+        cred = PartnerCredentials(
+            consumer_key="KeyToTheKingdom",
+            consumer_secret="TellNoOne",  # noqa: S106
+            callback_uri="CallOnlyWhenCalledTo",
+        )
+        self.myob = Myob(cred)
+        self.companyfile = self.myob.companyfiles.get(CID, call=False)
+        self.reference_data = self.companyfile.reference_data
+
+    def test_lookup(self, mock_request):
+        self.assertEqual(self.reference_data.taxcode("GST")["UID"], "tax-1")
+        self.assertEqual(self.reference_data.taxcode("tax-2")["Code"], "FRE")
+        self.assertEqual(self.reference_data.account("1-1100")["UID"], "acc-1")
+        self.assertEqual(self.reference_data.category("cat-1")["DisplayID"], "CAT1")
+        self.assertIsNone(self.reference_data.taxcode("N-T"))
+        self.assertEqual(len(self.reference_data.all("taxcode")), 2)
+        # All three collections loaded once.
+        self.assertEqual(mock_request.call_count, 3)
+        with self.assertRaises(KeyError):
+            self.reference_data.get("job", "x")
+
+    def test_ttl(self, mock_request):
+        self.reference_data.ttl = -1
+        self.reference_data.taxcode("GST")
+        self.reference_data.taxcode("GST")
+        self.assertEqual(mock_request.call_count, 6)
+
+    def test_invalidated_by_writes(self, mock_request):
+        self.reference_data.taxcode("GST")
+        self.companyfile.general_ledger.put_taxcode(uid="tax-1", data={})
+        self.reference_data.taxcode("GST")
+        self.assertEqual(mock_request.call_count, 3 + 1 + 3)
+
+        # Writes to unrelated collections leave the cache alone.
+        self.companyfile.general_ledger.delete_job(uid="job-1")
+        self.reference_data.taxcode("GST")
+        self.assertEqual(mock_request.call_count, 3 + 1 + 3 + 1)
+
+    def test_shared_across_companyfiles(self, mock_request):
+        other = self.myob.companyfiles.get(CID, call=False)
+        self.assertIs(other.reference_data, self.reference_data)
+        self.reference_data.taxcode("GST")
+        other.general_ledger.put_taxcode(uid="tax-1", data={})
+        self.reference_data.taxcode("GST")
+        self.assertEqual(mock_request.call_count, 3 + 1 + 3)
+
+    def test_invalidated_while_loading(self, mock_request):
+        # A write landing mid-load means the load may have missed it, so it isn't kept as fresh.
+        def request(method, url, **kwargs):
+            if url == BASE + "TaxCode/" and mock_request.call_count == 1:
+                self.reference_data.invalidate()
+            return fake_request(method, url, **kwargs)
+
+        mock_request.side_effect = request
+        self.assertEqual(self.reference_data.taxcode("GST")["UID"], "tax-1")
+        self.reference_data.taxcode("GST")
+        self.assertEqual(mock_request.call_count, 6)
+        self.reference_data.taxcode("GST")
+        self.assertEqual(mock_request.call_count, 6)
@@ -0,0 +1,94 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from unittest.mock import patch
+
+from myob import Myob
+from myob.credentials import PartnerCredentials
+from myob.scheduler import Scheduler
+
+
+def wait_for(condition, timeout=1):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out waiting for condition.")
+        time.sleep(0.001)
+
+
+class SchedulerTests(TestCase):
+    def run_waiters(self, scheduler, requests):
+        """Queue up (company_id, lane) requests behind a held slot, returning their start order."""
+        started = []
+
+        def run(company_id, lane):
+            with scheduler.slot(company_id, lane):
+                started.append((company_id, lane))
+
+        with ThreadPoolExecutor(max_workers=len(requests) + 1) as executor:
+            scheduler.acquire("blocker")
+            for i, (company_id, lane) in enumerate(requests):
+                executor.submit(run, company_id, lane)
+                wait_for(lambda i=i: scheduler.waiting() == i + 1)
+            scheduler.release("blocker")
+            wait_for(lambda: len(started) == len(requests))
+        return started
+
+    def test_caps(self):
+        scheduler = Scheduler(per_company=2, max_concurrent=3)
+        release = threading.Event()
+        peak = {"a": 0, "b": 0, "total": 0}
+        lock = threading.Lock()
+
+        def run(company_id):
+            with scheduler.slot(company_id):
+                with lock:
+                    peak[company_id] = max(peak[company_id], scheduler.active_for(company_id))
+                    peak["total"] = max(peak["total"], scheduler.active())
+                release.wait(0.05)
+
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            list(executor.map(run, ["a"] * 5 + ["b"] * 5))
+        self.assertEqual(peak, {"a": 2, "b": 2, "total": 3})
+        self.assertEqual(scheduler.active(), 0)
+
+    def test_priority_lanes(self):
+        scheduler = Scheduler(per_company=1, max_concurrent=1)
+        started = self.run_waiters(
+            scheduler, [("a", "background"), ("a", "normal"), ("a", "interactive")]
+        )
+        self.assertEqual([lane for _, lane in started], ["interactive", "normal", "background"])
+
+    def test_round_robin(self):
+        scheduler = Scheduler(per_company=1, max_concurrent=1)
+        started = self.run_waiters(scheduler, [("a", None), ("a", None), ("a", None), ("b", None)])
+        self.assertEqual([company_id for company_id, _ in started], ["a", "b", "a", "a"])
+
+    def test_unknown_lane(self):
+        with self.assertRaises(ValueError):
+            Scheduler().acquire("a", "urgent")
+        with self.assertRaises(ValueError):
+            Scheduler(default_lane="urgent")
+
+
+class ManagerSchedulerTests(TestCase):
+    @patch("myob.managers.requests.request")
+    def test_requests_scheduled(self, mock_request):
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.headers = {"content-type": "application/json"}
+        scheduler = Scheduler()
+        cred = PartnerCredentials(
+            consumer_key="KeyToTheKingdom",
+            consumer_secret="TellNoOne",  # noqa: S106
+            callback_uri="CallOnlyWhenCalledTo",
+        )
+        companyfile = Myob(cred, scheduler=scheduler).companyfiles.get("cid", call=False)
+
+        with patch.object(scheduler, "slot", wraps=scheduler.slot) as mock_slot:
+            companyfile.contacts.customer(priority="interactive")
+            mock_slot.assert_called_once_with("cid", "interactive")
+            companyfile.contacts.customer()
+            mock_slot.assert_called_with("cid", None)
+        # Priority isn't mistaken for a filter.
+        self.assertEqual(mock_request.call_args.kwargs["params"], {})
@@ -0,0 +1,125 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase
+from unittest.mock import patch
+
+from myob import Myob
+from myob.concurrency import ThreadLocalSession
+from myob.credentials import PartnerCredentials
+
+CID = "DummyCompanyId"
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 64
+
+
+class Handler(BaseHTTPRequestHandler):
+    # Keep connections alive, so they're reused from the pool.
+    protocol_version = "HTTP/1.1"
+
+    def _respond(self, status):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+        self.server.seen.append(
+            (
+                self.command,
+                self.path,
+                self.headers["Authorization"],
+                self.headers.get("x-myobapi-cftoken"),
+                body,
+            )
+        )
+        content = json.dumps({"Path": self.path, "Body": body}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET(self):  # noqa: N802
+        self._respond(200)
+
+    def do_PUT(self):  # noqa: N802
+        self._respond(200)
+
+    def log_message(self, *args):
+        pass
+
+
+class SharedClientStressTests(TestCase):
+    def setUp(self):
+        self.server = Server(("127.0.0.1", 0), Handler)
+        self.server.seen = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{self.server.server_address[1]}/accountright/"
+        patcher = patch("myob.managers.MYOB_BASE_URL", base_url)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.cred = PartnerCredentials(
+            consumer_key="KeyToTheKingdom",
+            consumer_secret="TellNoOne",  # noqa: S106
+            callback_uri="CallOnlyWhenCalledTo",
+            oauth_token="token-0",  # noqa: S106
+        )
+        self.session = ThreadLocalSession(pool_maxsize=16)
+        self.companyfile = Myob(self.cred, session=self.session).companyfiles.get(CID, call=False)
+
+    def tearDown(self):
+        self.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_many_threads_share_one_client(self):
+        threads, calls = 16, 25
+        stop = threading.Event()
+
+        def swap_credentials():
+            # Keep swapping tokens and company file credentials while requests are in flight.
+            i = 0
+            while not stop.is_set():
+                i += 1
+                self.cred.save_token(
+                    {"access_token": f"token-{i}", "refresh_token": "r", "expires_at": 4102444800}
+                )
+                self.cred.authenticate_companyfile(CID, f"user-{i}", "pass")
+
+        def work(n):
+            results = []
+            for i in range(calls):
+                if i % 2:
+                    results.append(self.companyfile.contacts.get_customer(uid=f"{n}-{i}"))
+                else:
+                    results.append(
+                        self.companyfile.contacts.put_customer(
+                            uid=f"{n}-{i}", data={"N": n, "I": i}
+                        )
+                    )
+            return n, results
+
+        swapper = threading.Thread(target=swap_credentials)
+        swapper.start()
+        try:
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                results = list(executor.map(work, range(threads)))
+        finally:
+            stop.set()
+            swapper.join()
+
+        # Every response went back to the thread that asked for it.
+        for n, responses in results:
+            for i, response in enumerate(responses):
+                self.assertTrue(
+                    response["Path"].split("?")[0].endswith(f"/Contact/Customer/{n}-{i}/")
+                )
+                expected = None if i % 2 else {"N": n, "I": i}
+                self.assertEqual(response["Body"], expected)
+
+        self.assertEqual(len(self.server.seen), threads * calls)
+        for _, _, authorization, cftoken, _ in self.server.seen:
+            self.assertRegex(authorization, r"^Bearer token-\d+$")
+            self.assertTrue(cftoken is None or cftoken.startswith("dXNlci"))